@@ -0,0 +1,51 @@
+# tests/test_bench.py
+
+import os
+import tempfile
+import unittest
+from codebuilder import bench
+
+class TestBench(unittest.TestCase):
+    def test_summary(self):
+        summary = bench.summarize([1.0, 2.0, 3.0, 4.0, 10.0])
+        self.assertEqual((summary["min"], summary["median"], summary["max"]), (1.0, 3.0, 10.0))
+        self.assertAlmostEqual(summary["p95"], 8.8)
+        self.assertAlmostEqual(summary["stddev"], 3.5355339, places=6)
+
+    def test_welch_p_value(self):
+        # t = 2.228 at 10 degrees of freedom is the two-sided 5% critical value
+        self.assertAlmostEqual(bench.betainc(5.0, 0.5, 10 / (10 + 2.228 ** 2)), 0.05, places=3)
+        _, _, p = bench.welch_t_test([1.0, 1.1, 0.9, 1.0, 1.05], [2.0, 2.1, 1.9, 2.05, 2.0])
+        self.assertLess(p, 0.001)
+        _, _, p = bench.welch_t_test([1.0, 1.2, 0.8, 1.1], [1.1, 0.9, 1.0, 1.2])
+        self.assertGreater(p, 0.5)
+
+    def test_save_and_compare(self):
+        def result(times, source):
+            samples = [{"wall_time": t, "user_time": t, "sys_time": 0.0, "max_rss_kb": 1000} for t in times]
+            return {"version": bench.RESULTS_VERSION, "file": "/x/prog.c", "source_sha256": source,
+                    "samples": samples, "summary": bench.summarize_samples(samples)}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = bench.save_results(result([0.10, 0.11, 0.09, 0.10], "a"), os.path.join(tmp, "base.json"))
+            comparison = bench.compare(bench.load_results(path), result([0.20, 0.21, 0.19, 0.20], "b"))
+        self.assertTrue(comparison["significant"])
+        self.assertAlmostEqual(comparison["change"], 1.0)
+        self.assertFalse(comparison["same_source"])
+
+    def test_parse_cpus(self):
+        self.assertEqual(bench.parse_cpus("0,2-3"), {0, 2, 3})
+        with self.assertRaises(ValueError):
+            bench.parse_cpus("a-b")
+
+    @unittest.skipUnless(hasattr(os, "sched_setaffinity"), "CPU pinning is Linux only")
+    def test_pinning_is_restored(self):
+        class FailingHandler:
+            def compile(self, file_path):
+                return False, "error"
+        before = os.sched_getaffinity(0)
+        with self.assertRaises(bench.BenchmarkError):
+            bench.run_benchmark(FailingHandler(), "prog.c", "c", cpus={min(before)})
+        self.assertEqual(os.sched_getaffinity(0), before)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# tests/test_build_cache.py
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+from codebuilder.utils import build_cache
+from codebuilder.utils.build_cache import BuildCache
+
+class TestBuildCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmp, "main.c")
+        with open(self.source, "w") as f:
+            f.write("int main() { return 0; }\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_key_depends_on_source_and_flags(self):
+        cache = BuildCache(os.path.join(self.tmp, "cache"))
+        key = cache.key("c", sys.executable, [], [self.source])
+        self.assertEqual(key, cache.key("c", sys.executable, [], [self.source]))
+        self.assertNotEqual(key, cache.key("c", sys.executable, ["-O2"], [self.source]))
+        with open(self.source, "a") as f:
+            f.write("// changed\n")
+        self.assertNotEqual(key, cache.key("c", sys.executable, [], [self.source]))
+        self.assertIsNone(cache.key("c", "no-such-compiler-xyz", [], [self.source]))
+
+    def test_hit_skips_build_and_lru_eviction(self):
+        cache = BuildCache(os.path.join(self.tmp, "cache"), max_bytes=150)
+        binary = os.path.join(self.tmp, "main")
+        builds = []
+
+        def build():
+            builds.append(1)
+            with open(binary, "wb") as f:
+                f.write(b"x" * 100)
+            return True, ""
+
+        with mock.patch.object(build_cache, "get_build_cache", return_value=cache), \
+             mock.patch.object(cache, "compiler_identity", return_value=["cc", "1.0"]):
+            self.assertTrue(build_cache.compile_cached("c", "cc", [], [self.source], self.tmp, [binary], build)[0])
+            os.remove(binary)
+            success, output = build_cache.compile_cached("c", "cc", [], [self.source], self.tmp, [binary], build)
+            self.assertTrue(success)
+            self.assertIn("[cache]", output)
+            self.assertEqual(len(builds), 1)
+            self.assertTrue(os.path.exists(binary))
+
+            time.sleep(0.01)
+            build_cache.compile_cached("c", "cc", ["-O2"], [self.source], self.tmp, [binary], build)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 2, 1))
+        self.assertEqual(stats["entries"], 1)
+
+    def _compile_twice_editing(self, handler, files, edited, binary):
+        """Compiles, edits a file the main source includes, compiles again; returns the two outputs."""
+        for name, content in files.items():
+            with open(os.path.join(self.tmp, name), "w") as f:
+                f.write(content)
+        cache = BuildCache(os.path.join(self.tmp, "cache"))
+        main = os.path.join(self.tmp, list(files)[0])
+        with mock.patch.object(build_cache, "get_build_cache", return_value=cache):
+            self.assertTrue(handler.compile(main)[0])
+            success, output = handler.compile(main)
+            self.assertIn("[cache]", output)
+            with open(os.path.join(self.tmp, edited[0]), "w") as f:
+                f.write(edited[1])
+            success, output = handler.compile(main)
+            self.assertTrue(success, output)
+            self.assertNotIn("[cache]", output)
+        return subprocess.run([os.path.join(self.tmp, binary)], capture_output=True, text=True)
+
+    @unittest.skipUnless(shutil.which("gcc"), "needs gcc")
+    def test_header_edit_invalidates(self):
+        from codebuilder.languages import c
+        result = self._compile_twice_editing(
+            c, {"app.c": '#include "v.h"\nint main() { return V; }\n', "v.h": "#define V 3\n"},
+            ("v.h", "#define V 4\n"), "app")
+        self.assertEqual(result.returncode, 4)
+
+    @unittest.skipUnless(shutil.which("rustc"), "needs rustc")
+    def test_rust_module_edit_invalidates(self):
+        from codebuilder.languages import rust
+        result = self._compile_twice_editing(
+            rust, {"app.rs": "mod util;\nfn main() { util::hello(); }\n",
+                   "util.rs": 'pub fn hello() { println!("one"); }\n'},
+            ("util.rs", 'pub fn hello() { println!("two"); }\n'), "app")
+        self.assertEqual(result.stdout.strip(), "two")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# tests/test_cli_server.py
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import cli_server
+
+@unittest.skipUnless(cli_server.is_supported(), "needs Unix domain sockets with descriptor passing")
+class TestCliServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.socket = os.path.join(self.folder, "ca.sock")
+        self.assertTrue(cli_server.start(idle_timeout=60, path=self.socket, cwd=self.folder))
+
+    def tearDown(self):
+        cli_server.stop(self.socket)
+        self.tmp.cleanup()
+
+    def write(self, name, source):
+        path = os.path.join(self.folder, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+        return path
+
+    def test_forwarded_commands(self):
+        self.write("hello.py", "import os\nprint('hello from', os.getcwd())\n")
+        self.write("fail.py", "raise SystemExit(3)\n")
+        code, output = cli_server.capture(["run", "hello.py"], cwd=self.folder, path=self.socket)
+        self.assertEqual(code, 0, output)
+        self.assertIn(f"hello from {os.path.realpath(self.folder)}", output)
+        self.assertTrue(os.path.exists(os.path.join(self.folder, "build_logs", "history.db")))
+        code, output = cli_server.capture(["run", "fail.py"], cwd=self.folder, path=self.socket)
+        self.assertEqual(code, 1)
+        self.assertIn("Run failed", output)
+        self.assertEqual(cli_server.capture(["no-such-command"], cwd=self.folder, path=self.socket)[0], 2)
+
+    def test_client_interrupt_stops_command(self):
+        self.write("slow.py", "import time\nprint('started', flush=True)\ntime.sleep(60)\n")
+        self.write("quick.py", "print('quick')\n")
+        client = subprocess.Popen([sys.executable, cli_server.CLI_PATH, "run", "slow.py"], cwd=self.folder,
+                                  stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                  env=dict(os.environ, CODEACCOUNTANT_SOCKET=self.socket))
+        time.sleep(1.0)
+        client.send_signal(signal.SIGINT)
+        self.assertEqual(client.wait(10), 130)
+        client.stdout.close()
+        started = time.monotonic()
+        code, output = cli_server.capture(["run", "quick.py"], cwd=self.folder, path=self.socket)
+        self.assertEqual(code, 0, output)
+        self.assertLess(time.monotonic() - started, 10)  # Not queued behind the interrupted run
+
+    def test_unavailable(self):
+        missing = os.path.join(self.folder, "missing.sock")
+        self.assertIsNone(cli_server.forward(["snapshot", "list"], path=missing))
+        self.assertFalse(cli_server.stop(missing))
+
+    def test_refuses_socket_in_shared_directory(self):
+        # Anyone who can create the socket first would receive the client's environment and stdio
+        shared = os.path.join(self.folder, "shared")
+        os.mkdir(shared)
+        os.chmod(shared, 0o777)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(os.path.join(shared, "ca.sock"))
+        listener.listen(1)
+        try:
+            self.assertIsNone(cli_server.forward(["snapshot", "list"], path=os.path.join(shared, "ca.sock")))
+        finally:
+            listener.close()
+        self.assertTrue(cli_server.is_private_dir(self.folder))
+        with self.assertRaises(PermissionError):
+            cli_server.make_private_dir(shared)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+# tests/test_cli_startup.py
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cli.py")
+LAZY_MODULES = ["codebuilder", "dependency_checker_pkg", "filetracker", "snapshot", "venv_cache", "subprocess",
+                "logging", "rapidfuzz", "PIL", "mutagen"]
+BUDGET_US = 100000  # Generous: argparse and config on a slow machine are well under this
+
+def import_times(args, cwd):
+    """
+    The process result, every module imported and {module: cumulative import time in microseconds}
+    of the top-level imports (nested imports are included in their importer's time), from -X importtime.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args, cwd=cwd, capture_output=True, text=True)
+    modules, times = [], {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            modules.append(name.strip())
+            if not name.startswith("  "):
+                times[name.strip()] = int(cumulative)
+    return result, modules, times
+
+class TestCliStartup(unittest.TestCase):
+    def test_help_imports_no_subcommand(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            result, modules, times = import_times([CLI, "--help"], cwd)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertIn("snapshot", result.stdout)
+            loaded = [m for m in modules if m.split(".")[0] in LAZY_MODULES]
+            self.assertEqual(loaded, [])
+            self.assertFalse(os.path.exists(os.path.join(cwd, "codeaccountant.log")))
+
+            _, _, baseline = import_times(["-c", "pass"], cwd)
+            extra = sum(t for m, t in times.items() if m not in baseline)
+            self.assertLess(extra, BUDGET_US)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# tests/test_csharp_workspace.py
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from codebuilder.languages import csharp
+
+STUB_DOTNET = '''#!{python}
+import os, sys
+with open(os.environ["DOTNET_STUB_LOG"], "a") as f:
+    f.write(" ".join(sys.argv[1:3]) + "\\n")
+if sys.argv[1] == "new":
+    out = sys.argv[sys.argv.index("--output") + 1]
+    os.makedirs(out, exist_ok=True)
+    open(os.path.join(out, "CodeBuilderApp.csproj"), "w").close()
+    open(os.path.join(out, "Program.cs"), "w").close()
+elif sys.argv[1] == "run":
+    print(open(os.path.join(sys.argv[sys.argv.index("--project") + 1], "Program.cs")).read())
+'''
+
+@unittest.skipIf(os.name == "nt", "stub dotnet is a POSIX script")
+class TestCSharpWorkspace(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        bin_dir = os.path.join(self.tmp, "bin")
+        os.makedirs(bin_dir)
+        stub = os.path.join(bin_dir, "dotnet")
+        with open(stub, "w") as f:
+            f.write(STUB_DOTNET.format(python=sys.executable))
+        os.chmod(stub, 0o755)
+        self.log = os.path.join(self.tmp, "calls.log")
+        self.source = os.path.join(self.tmp, "Hello.cs")
+        with open(self.source, "w") as f:
+            f.write('Console.WriteLine("hi");')
+        env = {"PATH": bin_dir + os.pathsep + os.environ["PATH"], "DOTNET_STUB_LOG": self.log,
+               "CODEBUILDER_CSHARP_WORKSPACES": os.path.join(self.tmp, "workspaces")}
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def calls(self):
+        with open(self.log) as f:
+            return [line.split()[0] for line in f]
+
+    def test_workspace_is_created_once_and_reused(self):
+        self.assertTrue(csharp.compile(self.source)[0])
+        success, output = csharp.run(self.source)
+        self.assertTrue(success)
+        self.assertIn('Console.WriteLine("hi");', output)
+        self.assertEqual(self.calls(), ["new", "build", "build", "run"])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp, "workspaces"))), ["ws0"])
+
+        csharp.clean_workspaces()
+        self.assertEqual(os.listdir(os.path.join(self.tmp, "workspaces")), [])
+
+if __name__ == "__main__":
+    unittest.main()
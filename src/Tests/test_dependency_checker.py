@@ -0,0 +1,234 @@
+# tests/test_dependency_checker.py
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from dependency_checker_pkg.dependency_env import InstalledIndex, get_installed_index
+from dependency_checker_pkg.dependency_imports import extract_import_details, extract_imports_parallel, ImportCache
+from dependency_checker_pkg.dependency_cache import ScanCache
+from dependency_checker_pkg.dependency_graph import ImportGraph
+from dependency_checker_pkg import dependency_core
+from dependency_checker_pkg.dependency_core import (check_package_installed, scan_dependencies_logic, iter_scan_events,
+                                                    FileScanned, ModuleResolved, ScanSummary, DirectoryScanCache)
+
+SAMPLE_SOURCE = '''"""Docstring mentioning: import fake_in_docstring"""
+import os, json as j
+from requests.adapters import (
+    HTTPAdapter,
+)
+from . import sibling
+try:
+    import ujson
+except ImportError:
+    ujson = None
+if sys.platform == "win32":
+    import winreg
+
+def load():
+    import yaml
+    text = "import fake_in_string"
+'''
+
+class TestInstalledIndex(unittest.TestCase):
+    def test_lookup_by_distribution_and_import_name(self):
+        index = InstalledIndex(["scikit-learn", "Pillow"], {"sklearn": ["scikit-learn"], "PIL": ["Pillow"]})
+        self.assertTrue(index.is_installed("scikit_learn"))
+        self.assertTrue(index.is_installed("pillow"))
+        self.assertTrue(index.is_installed("PIL"))
+        self.assertFalse(index.is_installed("numpy"))
+
+    def test_current_environment(self):
+        index = get_installed_index()
+        self.assertIs(index, get_installed_index(sys.executable))
+        self.assertTrue(check_package_installed("pytest"))
+        self.assertFalse(check_package_installed("surely-not-an-installed-package"))
+
+class TestImportExtraction(unittest.TestCase):
+    def test_ast_extraction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sample.py")
+            with open(path, "w") as f:
+                f.write(SAMPLE_SOURCE)
+            self.assertEqual(extract_import_details(path), {
+                "os": False, "json": False, "requests": False, "ujson": True, "winreg": True, "yaml": False
+            })
+
+    def test_cache_skips_unchanged_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "a.py")
+            with open(path, "w") as f:
+                f.write("import numpy\n")
+            cache = ImportCache()
+            self.assertEqual(extract_imports_parallel([path], cache=cache), {path: {"numpy": False}})
+            cache.entries[path][2] = {"cached": False}
+            self.assertEqual(extract_imports_parallel([path], cache=cache), {path: {"cached": False}})
+
+class TestScan(unittest.TestCase):
+    def test_each_module_resolved_once_with_all_sources(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "pkg"))
+            for rel in ("a.py", os.path.join("pkg", "b.py")):
+                with open(os.path.join(tmp, rel), "w") as f:
+                    f.write("import os\nimport numpy\nimport pkg\n")
+            with open(os.path.join(tmp, "requirements.txt"), "w") as f:
+                f.write("numpy>=1.0\n")
+            with mock.patch.object(dependency_core, "check_package_installed", return_value=False) as check:
+                missing, _ = scan_dependencies_logic(tmp)
+            check.assert_called_once()
+            self.assertEqual(list(missing), ["numpy"])
+            self.assertEqual(missing["numpy"].count("import in"), 2)
+            self.assertIn("requirements.txt", missing["numpy"])
+
+    def test_structured_events(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "app.py"), "w") as f:
+                f.write("import json\ntry:\n    import not_installed_optional\nexcept ImportError:\n    pass\n")
+            events = list(iter_scan_events(tmp))
+        self.assertIn(FileScanned("app.py", "PY", ("json", "not_installed_optional")), events)
+        self.assertIn(ModuleResolved("json", "json", "standard", ()), events)
+        summary = events[-1]
+        self.assertIsInstance(summary, ScanSummary)
+        self.assertEqual(summary.missing, {})
+        self.assertEqual(summary.optional_missing, {"not_installed_optional": ["import in app.py"]})
+
+    def test_directory_cache_rescans_only_after_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, f"m{i}.py") for i in range(5)]
+            for path in paths:
+                with open(path, "w") as f:
+                    f.write("import json\n")
+            cache = DirectoryScanCache()
+            with mock.patch.object(dependency_core, "_collect_project_files",
+                                   wraps=dependency_core._collect_project_files) as walk:
+                for path in paths:
+                    cache.check_file(path)
+                    cache.get_summary(tmp)
+                self.assertEqual(walk.call_count, 1)
+                with open(paths[0], "w") as f:
+                    f.write("import not_installed_anywhere\n")
+                cache.check_file(paths[0])
+                summary = cache.get_summary(tmp)
+                self.assertEqual(walk.call_count, 2)
+            self.assertIn("not_installed_anywhere", summary.missing)
+
+    def test_directory_cache_ignores_unchanged_empty_init_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = os.path.realpath(tmp)
+            paths = []
+            for package in ("pkg_a", "pkg_b"):
+                os.makedirs(os.path.join(tmp, package))
+                for name, text in (("__init__.py", ""), ("mod.py", "import json\n")):
+                    paths.append(os.path.join(tmp, package, name))
+                    with open(paths[-1], "w") as f:
+                        f.write(text)
+            cache = DirectoryScanCache()
+            with mock.patch.object(dependency_core, "_collect_project_files",
+                                   wraps=dependency_core._collect_project_files) as walk:
+                cache.get_summary(tmp)
+                for _ in range(2):
+                    for path in paths:
+                        cache.check_file(path)
+                        cache.get_summary(os.path.dirname(path))
+                self.assertEqual(walk.call_count, 1)
+                with open(paths[0], "w") as f:
+                    f.write("import not_installed_anywhere\n" * 3)
+                cache.check_file(paths[0])
+                self.assertIn("not_installed_anywhere", cache.get_summary(os.path.dirname(paths[0])).missing)
+                self.assertEqual(walk.call_count, 2)
+
+    def test_directory_cache_fills_subdirectories_from_one_walk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = os.path.realpath(tmp)
+            files = {"app.py": "import helper\nimport missing_top\n", "requirements.txt": "requests\n",
+                     "pkg/helper.py": "import app\nimport missing_pkg\n", "pkg/deep/mod.py": "import helper\n"}
+            for name, text in files.items():
+                os.makedirs(os.path.dirname(os.path.join(tmp, name)), exist_ok=True)
+                with open(os.path.join(tmp, name), "w") as f:
+                    f.write(text)
+            cache = DirectoryScanCache()
+            with mock.patch.object(dependency_core, "_collect_project_files",
+                                   wraps=dependency_core._collect_project_files) as walk:
+                cache.get_summary(tmp)
+                subdirectories = [cache.get_summary(os.path.join(tmp, d)) for d in ("pkg", os.path.join("pkg", "deep"))]
+                self.assertEqual(walk.call_count, 1)
+            for summary in subdirectories:
+                self.assertEqual(summary, dependency_core.scan_dependencies(summary.folder))
+
+    def test_persistent_cache_reuses_previous_run(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "app.py"), "w") as f:
+                f.write("import numpy\n")
+            cache_path = os.path.join(tmp, "cache", "scan.json")
+            with mock.patch.object(dependency_core, "check_package_installed", return_value=False) as check:
+                cache = ScanCache.load(cache_path)
+                dependency_core.scan_dependencies(tmp, cache=cache)
+                cache.save()
+                with mock.patch.object(dependency_core, "iter_imports_parallel",
+                                       wraps=dependency_core.iter_imports_parallel) as extract:
+                    summary = dependency_core.scan_dependencies(tmp, cache=ScanCache.load(cache_path))
+            check.assert_called_once()
+            self.assertEqual(list(extract.call_args[0][1].entries), [os.path.join(tmp, "app.py")])
+            self.assertEqual(list(summary.missing), ["numpy"])
+
+class TestImportGraph(unittest.TestCase):
+    def test_queries_and_incremental_update(self):
+        files = {
+            "pkg/__init__.py": "",
+            "pkg/a.py": "import requests\n",
+            "pkg/b.py": "from . import a\n",
+            "app.py": "from pkg.b import helper\nimport os\n",
+            "other.py": "import json\n",
+            "requirements.txt": "requests\nunused-package>=1.0\n",
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            for rel, text in files.items():
+                os.makedirs(os.path.join(tmp, os.path.dirname(rel)), exist_ok=True)
+                with open(os.path.join(tmp, rel), "w") as f:
+                    f.write(text)
+            graph_path = os.path.join(tmp, "graph.json")
+            graph = ImportGraph.load(tmp, graph_path)
+            graph.update()
+            graph.save()
+            self.assertEqual(graph.dependents("pkg.a"), ["app.py", "pkg/b.py"])
+            self.assertEqual(graph.dependents("pkg/a.py", transitive=False), ["pkg/b.py"])
+            self.assertEqual(graph.dependents("requests"), ["app.py", "pkg/a.py", "pkg/b.py"])
+            self.assertEqual(graph.unused_packages(), ["unused-package"])
+
+            with open(os.path.join(tmp, "other.py"), "w") as f:
+                f.write("import pkg.a\n")
+            graph = ImportGraph.load(tmp, graph_path)
+            self.assertEqual(graph.update(), (["other.py"], []))
+            self.assertIn("other.py", graph.dependents("requests"))
+
+    def test_update_skips_configured_blacklist(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for rel in ("app.py", os.path.join("generated", "gen.py"), os.path.join("pkg.egg-info", "x.py")):
+                os.makedirs(os.path.join(tmp, os.path.dirname(rel)), exist_ok=True)
+                open(os.path.join(tmp, rel), "w").close()
+            self.assertEqual(ImportGraph(tmp, exclude=["generated/"]).update(), (["app.py"], []))
+
+class TestInstall(unittest.TestCase):
+    def test_batch_install_uses_one_pip_run(self):
+        with mock.patch.object(dependency_core, "_run_pip_command", return_value=(0, "", "")) as pip:
+            ok, failed, _ = dependency_core.install_dependencies_logic(
+                {"cv2": "import in a.py", "numpy": "import in a.py"}, batch=True, wheelhouse="wheels", no_index=True
+            )
+        pip.assert_called_once()
+        args = pip.call_args[0][0]
+        self.assertEqual(args[0], "install")
+        self.assertIn("--no-index", args)
+        self.assertEqual(args[args.index("--find-links") + 1], os.path.abspath("wheels"))
+        self.assertEqual(args[-2:], ["opencv-python", "numpy"])
+        self.assertEqual((ok, failed), (["opencv-python", "numpy"], []))
+
+    def test_failed_batch_retries_each_package(self):
+        results = [(1, "", "conflict"), (0, "", ""), (1, "", "No matching distribution found for nope")]
+        with mock.patch.object(dependency_core, "_run_pip_command", side_effect=results) as pip:
+            ok, failed, _ = dependency_core.install_dependencies_logic({"numpy": "", "nope": ""}, batch=True)
+        self.assertEqual(pip.call_count, 3)
+        self.assertEqual((ok, failed), (["numpy"], ["nope"]))
+
+if __name__ == "__main__":
+    unittest.main()
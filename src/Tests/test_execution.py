@@ -0,0 +1,56 @@
+# tests/test_execution.py
+
+import os
+import sys
+import time
+import unittest
+from codebuilder.utils.execution import execute, recording, Limits
+
+class TestExecution(unittest.TestCase):
+    def test_capture_matches_subprocess_run(self):
+        with recording() as recorder:
+            result = execute([sys.executable, "-c", "import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"])
+        self.assertEqual((result.returncode, result.stdout, result.stderr), (3, "out\n", "err\n"))
+        self.assertEqual(recorder.stats, [result.stats])
+        self.assertIsNone(result.stats.limit)
+        if os.name == "posix":
+            self.assertGreater(result.stats.max_rss_kb, 0)
+
+    def test_output_tail_is_bounded(self):
+        with recording() as recorder:
+            result = execute([sys.executable, "-c", "print('x' * 100000 + 'END')"], max_bytes=1000)
+        self.assertTrue(result.stdout.endswith("xEND\n"))
+        self.assertLess(len(result.stdout), 1100)
+        self.assertTrue(recorder.truncated)
+        self.assertIn(b"xEND", b"".join(recorder.iter_output()))
+
+    def test_zero_tail_keeps_no_output(self):
+        result = execute([sys.executable, "-c", "print('x' * 1000)"], max_bytes=0)
+        self.assertEqual(result.returncode, 0)
+        self.assertRegex(result.stdout, r"^\[\.\.\. 100\d bytes of output omitted \.\.\.\]\n$")
+
+    def test_timeout(self):
+        started = time.perf_counter()
+        result = execute([sys.executable, "-c", "import time; time.sleep(30)"], limits=Limits(0.5, None, None))
+        self.assertLess(time.perf_counter() - started, 10)
+        self.assertNotEqual(result.returncode, 0)
+        if os.name == "posix":
+            self.assertEqual(result.returncode, -9)
+        self.assertEqual(result.stats.limit, "timeout")
+        self.assertIn("[limit]", result.stderr)
+
+    @unittest.skipUnless(os.name == "posix", "rlimits are POSIX only")
+    def test_cpu_limit(self):
+        result = execute([sys.executable, "-c", "while True: pass"], limits=Limits(None, 1, None))
+        self.assertEqual(result.stats.limit, "cpu")
+        self.assertGreaterEqual(result.stats.user_time + result.stats.sys_time, 0.9)
+
+    @unittest.skipUnless(os.name == "posix", "rlimits are POSIX only")
+    def test_memory_limit_applies_from_start(self):
+        # The limit is set in the child before exec, so even the first allocation is capped
+        result = execute([sys.executable, "-c", "bytearray(1024 * 1024 * 1024)"], limits=Limits(None, None, 256))
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("MemoryError", result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
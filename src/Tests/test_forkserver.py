@@ -0,0 +1,55 @@
+# tests/test_forkserver.py
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from codebuilder import forkserver
+
+SCRIPT = """import os, sys
+print("args", sys.argv[1:], os.path.basename(os.getcwd()))
+print("to stderr", file=sys.stderr)
+if sys.argv[1:] == ["fail"]:
+    raise RuntimeError("boom")
+sys.exit(int(sys.argv[1]) if sys.argv[1:] else 0)
+"""
+
+@unittest.skipUnless(forkserver.is_supported(), "fork server needs fork() and SCM_RIGHTS")
+class TestForkServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.script = os.path.join(self.tmp.name, "script.py")
+        with open(self.script, "w") as f:
+            f.write(SCRIPT)
+        env = {"XDG_RUNTIME_DIR": self.tmp.name, "CODEBUILDER_PY_FORKSERVER_IDLE": "5"}
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_matches_cold_run(self):
+        for args in ([], ["3"], ["fail"]):
+            cold = subprocess.run([sys.executable, self.script] + args, capture_output=True, text=True, cwd=self.tmp.name)
+            returncode, output, usage = forkserver.run(self.script, args, cwd=self.tmp.name,
+                                                       python_executable=sys.executable, preload=["json"])
+            self.assertEqual((returncode, output), (cold.returncode, (cold.stdout, cold.stderr)))
+            self.assertGreater(usage["max_rss_kb"], 0)
+
+    def test_timeout_kills_run(self):
+        with open(self.script, "w") as f:
+            f.write("import time\ntime.sleep(30)\n")
+        returncode, _, usage = forkserver.run(self.script, python_executable=sys.executable, timeout=0.5)
+        self.assertTrue(usage["timed_out"])
+        self.assertEqual(returncode, -9)
+
+    def test_refuses_shared_socket_directory(self):
+        # The client would hand its environment and stdio to whoever listens there
+        folder = os.path.dirname(forkserver.socket_path(sys.executable, []))
+        os.mkdir(folder)
+        os.chmod(folder, 0o777)
+        self.assertIsNone(forkserver.run(self.script, python_executable=sys.executable))
+
+if __name__ == "__main__":
+    unittest.main()
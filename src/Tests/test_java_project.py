@@ -0,0 +1,74 @@
+# tests/test_java_project.py
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from codebuilder.languages import java
+
+STUB_JAVAC = '''#!{python}
+import os, re, shlex, sys
+args = sys.argv[1:]
+files = [p for a in args if a.startswith("@") for p in shlex.split(open(a[1:]).read())]
+with open(os.environ["JAVAC_STUB_LOG"], "a") as f:
+    f.write(" ".join(sorted(os.path.basename(p) for p in files)) + "\\n")
+out = args[args.index("-d") + 1]
+for path in files:
+    code = open(path).read()
+    package = re.search(r"package ([\\w.]+);", code)
+    target = os.path.join(out, *package.group(1).split(".")) if package else out
+    os.makedirs(target, exist_ok=True)
+    for name in re.findall(r"class (\\w+)", code):
+        open(os.path.join(target, name + ".class"), "w").close()
+'''
+
+@unittest.skipIf(os.name == "nt", "stub javac is a POSIX script")
+class TestJavaProject(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        bin_dir = os.path.join(self.tmp, "bin")
+        os.makedirs(bin_dir)
+        stub = os.path.join(bin_dir, "javac")
+        with open(stub, "w") as f:
+            f.write(STUB_JAVAC.format(python=sys.executable))
+        os.chmod(stub, 0o755)
+        self.log = os.path.join(self.tmp, "calls.log")
+        patcher = mock.patch.dict(os.environ, {"PATH": bin_dir + os.pathsep + os.environ["PATH"],
+                                               "JAVAC_STUB_LOG": self.log})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.root = os.path.join(self.tmp, "project")
+        self.write("Util.java", "public class Util { static int v() { return 1; } }")
+        self.write(os.path.join("app", "Main.java"),
+                   "package app;\npublic class Main { public static void main(String[] a) { Util.v(); } }")
+        self.write("Other.java", "public class Other { }")
+
+    def write(self, rel, text):
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def calls(self):
+        with open(self.log) as f:
+            return f.read().splitlines()
+
+    def test_batched_incremental_compile(self):
+        self.assertTrue(java.compile_project(self.root)[0])
+        self.assertTrue(java.compile_project(self.root)[0])
+        self.write("Util.java", "public class Util { static int v() { return 2; } }")
+        success, output = java.compile_project(self.root)
+        self.assertTrue(success, output)
+        # One javac run for everything, none when nothing changed, then the change plus its dependent
+        self.assertEqual(self.calls(), ["Main.java Other.java Util.java", "Main.java Util.java"])
+        self.assertTrue(os.path.exists(os.path.join(self.root, java.PROJECT_CLASSES, "app", "Main.class")))
+
+        main = os.path.join(self.root, "app", "Main.java")
+        root, info = java._project_of(main)
+        self.assertEqual((root, java._qualified_name(main, info)), (self.root, "app.Main"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+# tests/test_native_project.py
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from codebuilder.languages import native_project
+
+class TestNativeProject(unittest.TestCase):
+    def test_parse_depfile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            depfile = os.path.join(tmp, "a.c.d")
+            with open(depfile, "w") as f:
+                f.write("obj/a.c.o: a.c include/my\\ header.h \\\n b.h\ninclude/my\\ header.h:\nb.h:\n")
+            self.assertEqual(native_project.parse_depfile(depfile), ["a.c", "include/my header.h", "b.h"])
+
+    @unittest.skipUnless(shutil.which("gcc"), "gcc not installed")
+    def test_incremental_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            files = {"main.c": '#include "lib.h"\nint main(void) { return value() - 42; }\n',
+                     "lib.h": "int value(void);\n",
+                     "lib.c": '#include "lib.h"\nint value(void) { return 42; }\n',
+                     "other.c": "int other(void) { return 0; }\n"}
+            for name, text in files.items():
+                with open(os.path.join(tmp, name), "w") as f:
+                    f.write(text)
+            success, output = native_project.compile_project(tmp, "c")
+            self.assertTrue(success, output)
+            self.assertIn("3 of 3", output)
+            self.assertTrue(native_project.run_project(tmp)[0])
+
+            success, output = native_project.compile_project(tmp, "c")
+            self.assertIn("0 of 3", output)
+            self.assertIn("up to date", output)
+
+            time.sleep(0.01)
+            os.utime(os.path.join(tmp, "lib.h"))  # main.c and lib.c include it, other.c doesn't
+            success, output = native_project.compile_project(tmp, "c")
+            self.assertTrue(success, output)
+            self.assertIn("2 of 3", output)
+
+if __name__ == "__main__":
+    unittest.main()
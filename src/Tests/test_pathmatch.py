@@ -0,0 +1,42 @@
+# tests/test_pathmatch.py
+
+import os
+import tempfile
+import unittest
+from pathmatch import PathMatcher
+
+class TestPathMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = PathMatcher([".venv", "*.pyc", "build/", "docs/_build", "logs/**"])
+
+    def test_patterns(self):
+        self.assertTrue(self.matcher.match("pkg/mod.pyc"))
+        self.assertTrue(self.matcher.match("a/.venv", is_dir=True))
+        self.assertTrue(self.matcher.match("build", is_dir=True))
+        self.assertFalse(self.matcher.match("build"))
+        self.assertTrue(self.matcher.match("docs/_build", is_dir=True))
+        self.assertFalse(self.matcher.match("src/docs/_build", is_dir=True))
+        self.assertTrue(self.matcher.match("logs/2026/run.txt"))
+        self.assertFalse(self.matcher.match("src/main.py"))
+
+    def test_is_excluded_checks_parents(self):
+        self.assertTrue(self.matcher.is_excluded("proj/.venv/lib/site.py"))
+        self.assertTrue(self.matcher.is_excluded(os.path.join("build", "out.o")))
+        self.assertFalse(self.matcher.is_excluded("src/build.py"))
+
+    def test_walk_prunes_directories(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for rel in ("main.py", "main.pyc", ".venv/lib/x.py", "src/build/out.o", "src/app.py"):
+                path = os.path.join(tmp, rel)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, "w").close()
+            visited = []
+            found = []
+            for root, _, files in self.matcher.walk(tmp):
+                visited.append(os.path.relpath(root, tmp))
+                found.extend(os.path.relpath(os.path.join(root, f), tmp) for f in files)
+            self.assertEqual(sorted(visited), [".", "src"])
+            self.assertEqual(sorted(found), ["main.py", os.path.join("src", "app.py")])
+
+if __name__ == "__main__":
+    unittest.main()
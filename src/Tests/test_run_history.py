@@ -0,0 +1,41 @@
+# tests/test_run_history.py
+
+import os
+import tempfile
+import time
+import unittest
+from codebuilder.utils.run_history import RunHistory, find_history
+
+class TestRunHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.history = RunHistory(os.path.join(self.tmp.name, "build_logs", "history.db"))
+        self.addCleanup(self.history.close)
+
+    def test_queries(self):
+        now = time.time()
+        source = os.path.join(self.tmp.name, "a.c")
+        self.history.record(source, "c", "compile", True, "ok", 1.0, started_at=now - 10 * 86400)
+        self.history.record(source, "c", "run", False, "boom", 3.0, {"max_rss_kb": 2048, "limits": ["cpu"]},
+                            started_at=now - 60)
+        self.history.record(os.path.join(self.tmp.name, "b.py"), "python", "run", True, "hi", 2.0, started_at=now)
+
+        self.assertEqual([r["output_tail"] for r in self.history.failures()], ["boom"])
+        self.assertEqual([r["duration"] for r in self.history.slowest(since=now - 7 * 86400)], [3.0, 2.0])
+        self.assertEqual([r["action"] for r in self.history.trend(source)], ["compile", "run"])
+        latest = self.history.latest(source)
+        self.assertEqual((latest["success"], latest["max_rss_kb"], latest["limits"]), (False, 2048, ["cpu"]))
+        self.assertEqual(find_history(source), self.history.path)
+
+    def test_full_output_only_on_request(self):
+        output = "line\n" * 10000
+        kept = self.history.record("x.py", "python", "run", True, output[-100:], full_output=output, keep_output=True)
+        dropped = self.history.record("x.py", "python", "run", True, output[-100:], full_output=output)
+        self.assertEqual(self.history.output(kept), output)
+        self.assertIsNone(self.history.output(dropped))
+        self.assertEqual(self.history.get(kept)["output_bytes"], len(output))
+        self.assertEqual(self.history.get(kept)["output_sha256"], self.history.get(dropped)["output_sha256"])
+
+if __name__ == "__main__":
+    unittest.main()
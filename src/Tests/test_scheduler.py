@@ -0,0 +1,57 @@
+# tests/test_scheduler.py
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from codebuilder.scheduler import discover_jobs, run_jobs, BuildJob
+
+class TestScheduler(unittest.TestCase):
+    def test_discovery_skips_build_dirs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for rel in ("a.c", "b.py", "notes.txt", os.path.join("__pycache__", "x.py")):
+                os.makedirs(os.path.dirname(os.path.join(tmp, rel)), exist_ok=True)
+                open(os.path.join(tmp, rel), "w").close()
+            jobs = discover_jobs(tmp, "compile")
+        self.assertEqual([(os.path.basename(j.path), j.language) for j in jobs], [("a.c", "c"), ("b.py", "python")])
+
+    def test_discovery_skips_configured_blacklist(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for rel in ("a.c", os.path.join("vendor", "v.c"), os.path.join(".hidden", "h.c"), "gen_a.c"):
+                os.makedirs(os.path.dirname(os.path.join(tmp, rel)), exist_ok=True)
+                open(os.path.join(tmp, rel), "w").close()
+            jobs = discover_jobs(tmp, "compile", exclude=["vendor/", "gen_*"])
+        self.assertEqual([os.path.relpath(j.path, tmp) for j in jobs], ["a.c"])
+
+    def test_parallel_with_language_cap(self):
+        lock = threading.Lock()
+        running = {"c": 0, "java": 0}
+        peak = {"c": 0, "java": 0}
+
+        def handler(lang):
+            def compile(path):
+                with lock:
+                    running[lang] += 1
+                    peak[lang] = max(peak[lang], running[lang])
+                time.sleep(0.1)
+                with lock:
+                    running[lang] -= 1
+                return path != "fail.c", "output"
+            return SimpleNamespace(compile=compile)
+
+        handlers = {"c": handler("c"), "java": handler("java")}
+        jobs = [BuildJob(f"{i}.c", "c", "compile") for i in range(4)] + [BuildJob("fail.c", "c", "compile")]
+        jobs += [BuildJob(f"{i}.java", "java", "compile") for i in range(2)]
+        started = time.perf_counter()
+        results = list(run_jobs(jobs, handlers, max_workers=8, language_limits={"java": 1}))
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(results), 7)
+        self.assertEqual([r.path for r in results if not r.success], ["fail.c"])
+        self.assertEqual(peak["java"], 1)
+        self.assertEqual(peak["c"], 5)
+        self.assertLess(elapsed, 0.5)  # Serial would take 0.7s; java's cap makes 0.2s the floor
+
+if __name__ == "__main__":
+    unittest.main()
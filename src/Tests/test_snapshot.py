@@ -0,0 +1,116 @@
+# tests/test_snapshot.py
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+import snapshot
+from snapshot import (create_snapshot, list_snapshots, iter_manifest, open_snapshot_file, restore_paths,
+                      select_snapshots_to_prune, apply_retention, GarbageCollector)
+from snapshot_worker import SnapshotWorker
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.project = os.path.join(self.tmp.name, "project")
+        self.store = os.path.join(self.tmp.name, "snapshots")
+        os.makedirs(os.path.join(self.project, "conf"))
+        os.makedirs(os.path.join(self.project, "__pycache__"))
+        with open(os.path.join(self.project, "main.py"), "w") as f:
+            f.write("print('hi')\n")
+        with open(os.path.join(self.project, "conf", "app.json"), "w") as f:
+            f.write("{}\n")
+        with open(os.path.join(self.project, "__pycache__", "main.pyc"), "w") as f:
+            f.write("junk")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_manifest_skips_blacklist_and_dedupes(self):
+        first = create_snapshot(self.project, self.store)
+        second = create_snapshot(self.project, self.store)
+        self.assertEqual(list_snapshots(self.store), [first, second])
+        paths = sorted(e["path"] for e in iter_manifest(second, self.store))
+        self.assertEqual(paths, ["conf/app.json", "main.py"])
+        objects = [f for _, _, files in os.walk(os.path.join(self.store, "objects")) for f in files]
+        self.assertEqual(len(objects), 2)
+
+    def test_passed_blacklist_replaces_config_json(self):
+        with mock.patch.object(snapshot, "load_config_cached") as load_config:
+            snapshot_id = create_snapshot(self.project, self.store, blacklist=["conf/", "__pycache__/"])
+        load_config.assert_not_called()
+        self.assertEqual([e["path"] for e in iter_manifest(snapshot_id, self.store)], ["main.py"])
+
+    def test_partial_restore(self):
+        snapshot_id = create_snapshot(self.project, self.store)
+        with open_snapshot_file(snapshot_id, "main.py", self.store) as f:
+            self.assertEqual(f.read(), b"print('hi')\n")
+        dest = os.path.join(self.tmp.name, "restored")
+        restored = restore_paths(snapshot_id, ["conf"], dest, self.store)
+        self.assertEqual(restored, [os.path.join(dest, "conf", "app.json")])
+        self.assertFalse(os.path.exists(os.path.join(dest, "main.py")))
+        with self.assertRaises(FileNotFoundError):
+            restore_paths(snapshot_id, ["missing.txt"], dest, self.store)
+
+    def test_retention_policy(self):
+        ids = [f"snapshot_20260101_{h:02d}{m:02d}00" for h in range(10, 13) for m in (0, 30)]
+        now = datetime(2026, 1, 1, 12, 45)
+        pruned = select_snapshots_to_prune(ids, {"keep_last": 1, "keep_hourly": 2}, now=now)
+        self.assertEqual(pruned, ["snapshot_20260101_100000", "snapshot_20260101_103000",
+                                  "snapshot_20260101_110000", "snapshot_20260101_120000"])
+        self.assertEqual(select_snapshots_to_prune(ids, {}, now=now), ids[:-1])
+
+    def test_gc_frees_only_unreferenced_blobs(self):
+        old = create_snapshot(self.project, self.store)
+        with open(os.path.join(self.project, "main.py"), "w") as f:
+            f.write("print('changed')\n")
+        new = create_snapshot(self.project, self.store)
+        self.assertEqual(apply_retention(self.store, {"keep_last": 1}), [old])
+        gc = GarbageCollector(self.store, grace_period=-60)
+        while not gc.step(time_budget=0):
+            pass
+        self.assertEqual(gc.stats["objects_removed"], 1)
+        dest = os.path.join(self.tmp.name, "restored")
+        self.assertEqual(len(restore_paths(new, [], dest, self.store)), 2)
+
+    def test_ledger_is_compacted_and_not_reread(self):
+        old = create_snapshot(self.project, self.store)
+        with mock.patch.object(snapshot, "_read_ledger", side_effect=AssertionError("ledger reread")):
+            new = create_snapshot(self.project, self.store)  # Compared against the project's head instead
+        apply_retention(self.store, {"keep_last": 1})
+        with open(os.path.join(self.store, "ledger.jsonl"), encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["snapshot_id"] for line in f], [new])
+        self.assertNotIn(old, list_snapshots(self.store))
+
+    def test_gc_removes_stale_temporary_files(self):
+        create_snapshot(self.project, self.store)
+        tmp_dir = os.path.join(self.store, "objects", "tmp")
+        for name in ("stale", "fresh"):
+            with open(os.path.join(tmp_dir, name), "w") as f:
+                f.write("partial blob")
+        os.utime(os.path.join(tmp_dir, "stale"), (0, 0))
+        GarbageCollector(self.store, grace_period=60).collect(time_budget=1)
+        self.assertEqual(os.listdir(tmp_dir), ["fresh"])
+
+    def test_worker_merges_requests_and_flushes_on_close(self):
+        config_path = os.path.join(self.tmp.name, "config.json")
+        with open(config_path, "w") as f:
+            json.dump({"debounce_seconds": 60, "snapshot_interval": 0}, f)
+        seen = []
+        worker = SnapshotWorker(self.store, config_path, before_snapshot=lambda project, paths: seen.append(paths),
+                                gc_time_slice=None)
+        for i in range(50):
+            self.assertTrue(worker.request(self.project, {f"file{i % 5}.py": "modified"}))
+        worker.close(flush=True)
+        metrics = worker.metrics()
+        self.assertEqual(metrics["snapshots"], 1)
+        self.assertEqual(metrics["merged_requests"], 49)
+        self.assertEqual(metrics["files_scanned"], 2)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(len(seen[0]), 5)
+        self.assertEqual(len(list_snapshots(self.store)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+# tests/test_venv_cache.py
+
+import os
+import subprocess
+import tempfile
+import unittest
+from venv_cache import create_venv, is_pinned, read_requirements, template_key
+
+class TestVenvCache(unittest.TestCase):
+    def test_requirement_set_is_normalised(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "requirements.txt"), "w") as f:
+                f.write("requests>=2.0  # http\n\n# comment\nnumpy\n")
+            self.assertEqual(read_requirements(tmp), ["numpy", "requests>=2.0"])
+            self.assertEqual(template_key(["numpy", "requests>=2.0"]), template_key(read_requirements(tmp)))
+            with open(os.path.join(tmp, "requirements.txt"), "a") as f:
+                f.write("-e .\n")
+            self.assertIsNone(read_requirements(tmp))
+
+    def test_only_pinned_requirements_are_templated(self):
+        # "requests>=2.0" resolves to a newer release over time, so its template would go stale
+        self.assertTrue(is_pinned("numpy==1.26.4"))
+        self.assertTrue(is_pinned('pywin32==306 ; sys_platform == "win32"'))
+        for requirement in ("numpy", "requests>=2.0", "numpy==1.*", "numpy==1.26,!=1.26.1", "pkg @ https://host/pkg.whl"):
+            self.assertFalse(is_pinned(requirement), requirement)
+
+    def test_second_venv_is_cloned_and_relocated(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "cache")
+            first, second = os.path.join(tmp, "a", ".venv"), os.path.join(tmp, "b", ".venv")
+            self.assertFalse(create_venv(tmp, first, cache_dir=cache_dir, with_pip=False))
+            self.assertTrue(create_venv(tmp, second, cache_dir=cache_dir, with_pip=False))
+            python = os.path.join(second, "Scripts" if os.name == "nt" else "bin", "python")
+            prefix = subprocess.run([python, "-c", "import sys; print(sys.prefix)"],
+                                    capture_output=True, text=True, check=True).stdout.strip()
+            self.assertEqual(os.path.realpath(prefix), os.path.realpath(second))
+            with open(os.path.join(second, "pyvenv.cfg"), encoding="utf-8") as f:
+                self.assertNotIn(cache_dir, f.read())
+            with self.assertRaises(FileExistsError):
+                create_venv(tmp, second, cache_dir=cache_dir, with_pip=False)
+            self.assertEqual(sorted(os.listdir(os.path.join(tmp, "b"))), [".venv"])
+
+    def test_without_templates_nothing_is_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "cache")
+            self.assertFalse(create_venv(tmp, os.path.join(tmp, ".venv"), cache_dir=cache_dir, with_pip=False,
+                                         use_templates=False))
+            self.assertTrue(os.path.isfile(os.path.join(tmp, ".venv", "pyvenv.cfg")))
+            self.assertFalse(os.path.exists(cache_dir))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,32 +1,49 @@
 # cli.py
 import argparse
+import importlib
 import os
 import sys
-import subprocess
-import logging
-logging.basicConfig(level=logging.DEBUG, filename="codeaccountant.log")
-logging.debug(f"Running command: {sys.argv}")
-try:
-    from codebuilder.cli import main as codebuilder_main
-except ImportError as e:
-    logging.error(f"Error importing codebuilder: {e}")
-    print(f"Error importing codebuilder: {e}")
-    codebuilder_main = None
-try:
-    from python_dependency_checker.dependency_cli import main as depcheck_main
-except ImportError as e:
-    logging.error(f"Error importing python-dependency-checker: {e}")
-    print(f"Error importing python-dependency-checker: {e}")
-    depcheck_main = None
-try:
-    from filetracker.filetracker_cli import main as filetracker_main
-except ImportError as e:
-    logging.error(f"Error importing filetracker: {e}")
-    print(f"Error importing filetracker: {e}")
-    filetracker_main = None
 from config import load_config, save_config
 
-def main():
+# Editor integrations start the CLI on every save, so startup only pays for argparse and the
+# config module: each subcommand's implementation is imported when that subcommand runs, and
+# the log file is only set up once something is logged (see Tests/test_cli_startup.py).
+
+_logger = None
+
+def log():
+    """The CLI's logger, writing DEBUG records to codeaccountant.log; configured on first use."""
+    global _logger
+    if _logger is None:
+        import logging
+        logging.basicConfig(level=logging.DEBUG, filename="codeaccountant.log")
+        _logger = logging.getLogger("codeaccountant")
+    return _logger
+
+def load_main(module, label):
+    """Imports a subcommand's entry point on dispatch; None (reported) if the component is not installed."""
+    try:
+        return importlib.import_module(module).main
+    except ImportError as e:
+        log().error(f"Error importing {label}: {e}")
+        print(f"Error importing {label}: {e}")
+        return None
+
+def _limit_args(args):
+    """CodeBuilder resource-limit options to forward."""
+    forwarded = []
+    for option, value in (("--timeout", args.timeout), ("--cpu-limit", args.cpu_limit),
+                          ("--memory-limit", args.memory_limit)):
+        if value:
+            forwarded.extend([option, str(value)])
+    return forwarded
+
+def _exclude_args(config):
+    """The blacklist as CodeBuilder --exclude options, so folder and project walks skip the same paths."""
+    return [f"--exclude={pattern}" for pattern in config["blacklist"]]
+
+def main(argv=None, forward=True):
+    """Runs a command line (default: sys.argv); forwarded to a running `serve` daemon when there is one."""
     parser = argparse.ArgumentParser(
         description="CodeAccountant: A private, newbie-friendly IDE for solo coders.",
         formatter_class=argparse.RawTextHelpFormatter
@@ -37,6 +54,7 @@ def main():
     # VENV initialization
     parser_init_venv = subparsers.add_parser("init-venv", help="Initialize a VENV for the project folder")
     parser_init_venv.add_argument("folder", help="Project folder path")
+    parser_init_venv.add_argument("--no-cache", action="store_true", help="Build from scratch instead of cloning a cached template")
 
     # Dependency commands
     parser_deps = subparsers.add_parser("deps", help="Manage dependencies")
@@ -49,6 +67,10 @@ def main():
     parser_deps_install.add_argument("folder", help="Project folder path")
     parser_deps_install.add_argument("-r", "--recursive", action="store_true", help="Scan recursively")
     parser_deps_install.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    parser_deps_install.add_argument("--batch", action="store_true", help="Install all packages in one pip run")
+    parser_deps_install.add_argument("--wheelhouse", help="Local wheel directory (pip --find-links)")
+    parser_deps_install.add_argument("--no-index", action="store_true", help="Install from the wheelhouse only")
+    parser_deps_install.add_argument("-j", "--jobs", type=int, default=0, help="Parallel wheel downloads/builds")
 
     # Build/run commands
     parser_build = subparsers.add_parser("build", help="Compile a source file")
@@ -57,6 +79,25 @@ def main():
     parser_run = subparsers.add_parser("run", help="Run a source file")
     parser_run.add_argument("file", help="Source file path")
     parser_run.add_argument("--lang", help="Override language detection")
+    for name, help_text in (("build-all", "Compile every source file under a folder in parallel"),
+                            ("run-all", "Compile and run every source file under a folder in parallel")):
+        parser_all = subparsers.add_parser(name, help=help_text)
+        parser_all.add_argument("folder", help="Folder to scan for source files")
+        parser_all.add_argument("--lang", help="Only process this language")
+        parser_all.add_argument("-j", "--jobs", type=int, help="Parallel jobs (default: CPU count)")
+        parser_all.add_argument("--limit", action="append", metavar="LANG=N", help="Per-language concurrency cap")
+    parser_bench = subparsers.add_parser("bench", help="Compile once, then time repeated runs of a program")
+    parser_bench.add_argument("file", help="Source file path (or a saved result .json, with --compare)")
+    parser_bench.add_argument("--lang", help="Override language detection")
+    parser_bench.add_argument("-n", "--iterations", type=int, help="Measured runs (default: 20)")
+    parser_bench.add_argument("--warmup", type=int, help="Unmeasured warm-up runs (default: 3)")
+    parser_bench.add_argument("--cpus", help="Pin the runs to these CPUs, e.g. 0,2-3 (Linux)")
+    parser_bench.add_argument("--save", help="Result file (default: bench_results/<name>_<time>.json)")
+    parser_bench.add_argument("--compare", help="Saved result to compare against")
+    for parser_exec in (parser_build, parser_run, parser_bench) + tuple(subparsers.choices[n] for n in ("build-all", "run-all")):
+        parser_exec.add_argument("--timeout", type=float, help="Wall-clock limit per compile/run in seconds")
+        parser_exec.add_argument("--cpu-limit", type=float, metavar="SECONDS", help="CPU time limit per process")
+        parser_exec.add_argument("--memory-limit", type=float, metavar="MB", help="Address-space limit per process")
 
     # Import command
     parser_import = subparsers.add_parser("import", help="Clone a GitHub repository")
@@ -68,7 +109,40 @@ def main():
     parser_analyze.add_argument("--pii", action="store_true", help="Check for sensitive data")
     parser_analyze.add_argument("--compare", nargs=2, metavar=("snapshot1", "snapshot2"), help="Compare two snapshots")
 
-    args = parser.parse_args()
+    # Snapshot commands
+    parser_snapshot = subparsers.add_parser("snapshot", help="Create, inspect and restore snapshots")
+    parser_snapshot.add_argument("--snapshot-dir", default="snapshots", help="Snapshot store directory")
+    snapshot_subparsers = parser_snapshot.add_subparsers(dest="snapshot_command")
+    parser_snapshot_create = snapshot_subparsers.add_parser("create", help="Take a snapshot of a project folder")
+    parser_snapshot_create.add_argument("folder", help="Project folder path")
+    snapshot_subparsers.add_parser("list", help="List available snapshots")
+    parser_snapshot_show = snapshot_subparsers.add_parser("show", help="List the files recorded in a snapshot")
+    parser_snapshot_show.add_argument("snapshot_id", help="Snapshot ID")
+    parser_snapshot_restore = snapshot_subparsers.add_parser("restore", help="Extract files or folders from a snapshot")
+    parser_snapshot_restore.add_argument("snapshot_id", help="Snapshot ID")
+    parser_snapshot_restore.add_argument("paths", nargs="*", help="Files or folders to restore (default: everything)")
+    parser_snapshot_restore.add_argument("--dest", default=".", help="Destination folder")
+    parser_snapshot_restore.add_argument("-j", "--jobs", type=int, help="Number of parallel extraction workers")
+    parser_snapshot_gc = snapshot_subparsers.add_parser("gc", help="Prune snapshots by retention policy and free unreferenced data")
+    parser_snapshot_gc.add_argument("--dry-run", action="store_true", help="Only list the snapshots that would be pruned")
+
+    # Daemon
+    parser_serve = subparsers.add_parser("serve", help="Keep a daemon running that the CLI and GUI forward commands to (POSIX)")
+    parser_serve.add_argument("--idle-timeout", type=float, help="Exit after this many seconds without requests")
+    parser_serve.add_argument("--stop", action="store_true", help="Stop the running daemon")
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parser.parse_args(argv)
+    if forward and args.command != "serve" and not os.environ.get("CODEACCOUNTANT_NO_DAEMON"):
+        try:
+            import cli_server
+        except ImportError:  # Installed without the daemon module: run in-process
+            code = None
+        else:
+            code = cli_server.forward(argv)
+        if code is not None:
+            sys.exit(code)
+    log().debug(f"Running command: {argv}")  # Only now: --help and usage errors leave no log file behind
     config = load_config(args.config)
 
     if args.command == "init-venv":
@@ -76,34 +150,84 @@ def main():
             os.makedirs(args.folder)
         print(f"Initializing VENV in {args.folder}...")
         venv_path = os.path.join(args.folder, ".venv")
-        subprocess.run([sys.executable, "-m", "venv", venv_path], check=True)
+        from venv_cache import create_venv
+        # Cloned from a template built for this interpreter and requirements.txt, if one exists;
+        # --no-cache installs the same packages without one
+        try:
+            from_template = create_venv(args.folder, venv_path, cache_dir=config["venv_template_dir"],
+                                        link=config["venv_template_links"], max_templates=config["venv_templates_max"],
+                                        use_templates=not args.no_cache)
+        except FileExistsError:
+            print(f"Error: {venv_path} already exists; remove it to create a new VENV")
+            sys.exit(1)
         config["venv_path"] = venv_path
         save_config(config)
-        print(f"VENV initialized at {venv_path}")
+        print(f"VENV initialized at {venv_path}" + (" (from cached template)" if from_template else ""))
         sys.exit(0)
 
     elif args.command == "deps":
+        depcheck_main = load_main("dependency_checker_pkg.dependency_cli", "python-dependency-checker")
         if not depcheck_main:
-            logging.error("python-dependency-checker not installed")
+            log().error("python-dependency-checker not installed")
             print("Error: python-dependency-checker not installed")
             sys.exit(1)
-        depcheck_args = [args.deps_command, args.folder]
+        # depcheck takes the folder and its global options before the subcommand
+        depcheck_args = [args.folder]
         if args.recursive:
             depcheck_args.append("--recursive")
         if args.verbose:
             depcheck_args.append("--verbose")
-        sys.argv = ["depcheck"] + depcheck_args
-        depcheck_main()
+        for pattern in config["blacklist"]:
+            depcheck_args.append(f"--exclude={pattern}")  # "=" so a pattern may start with "-"
+        if config.get("venv_path"):
+            # Check and install against the project VENV rather than the interpreter running CodeAccountant
+            venv_bin = os.path.join(config["venv_path"], "Scripts" if os.name == "nt" else "bin")
+            depcheck_args.extend(["--python", os.path.join(venv_bin, "python")])
+        depcheck_args.append("scan" if args.deps_command == "check" else args.deps_command)
+        if args.deps_command == "install":
+            if args.batch:
+                depcheck_args.append("--batch")
+            if args.wheelhouse:
+                depcheck_args.extend(["--wheelhouse", args.wheelhouse])
+            if args.no_index:
+                depcheck_args.append("--no-index")
+            if args.jobs:
+                depcheck_args.extend(["--jobs", str(args.jobs)])
+        depcheck_main(depcheck_args)
+
+    elif args.command in ("build", "run", "bench"):
+        codebuilder_main = load_main("codebuilder.cli", "codebuilder")
+        if not codebuilder_main:
+            log().error("CodeBuilder not installed")
+            print("Error: CodeBuilder not installed")
+            sys.exit(1)
+        codebuilder_args = [args.command, args.file]
+        if args.lang:
+            codebuilder_args.extend(["--lang", args.lang])
+        if args.command == "bench":
+            for option in ("iterations", "warmup", "cpus", "save", "compare"):
+                if getattr(args, option) is not None:
+                    codebuilder_args.extend([f"--{option}", str(getattr(args, option))])
+        codebuilder_args.extend(_limit_args(args))
+        codebuilder_args.extend(_exclude_args(config))
+        codebuilder_main(codebuilder_args)
 
-    elif args.command in ("build", "run"):
+    elif args.command in ("build-all", "run-all"):
+        codebuilder_main = load_main("codebuilder.cli", "codebuilder")
         if not codebuilder_main:
-            logging.error("CodeBuilder not installed")
+            log().error("CodeBuilder not installed")
             print("Error: CodeBuilder not installed")
             sys.exit(1)
-        sys.argv = ["codebuilder", args.command, args.file]
+        codebuilder_args = [args.command, args.folder]
         if args.lang:
-            sys.argv.extend(["--lang", args.lang])
-        codebuilder_main()
+            codebuilder_args.extend(["--lang", args.lang])
+        if args.jobs:
+            codebuilder_args.extend(["--jobs", str(args.jobs)])
+        for limit in args.limit or ():
+            codebuilder_args.extend(["--limit", limit])
+        codebuilder_args.extend(_limit_args(args))
+        codebuilder_args.extend(_exclude_args(config))
+        codebuilder_main(codebuilder_args)
 
     elif args.command == "import":
         print(f"Importing repository {args.repo_url}...")
@@ -111,16 +235,67 @@ def main():
         sys.exit(0)
 
     elif args.command == "analyze":
+        filetracker_main = load_main("filetracker.filetracker_cli", "filetracker")
         if not filetracker_main:
-            logging.error("FileTracker not installed")
+            log().error("FileTracker not installed")
             print("Error: FileTracker not installed")
             sys.exit(1)
-        sys.argv = ["filetracker", "analyze", args.folder]
+        filetracker_args = ["analyze", args.folder]
         if args.pii:
-            sys.argv.append("--pii")
+            filetracker_args.append("--pii")
         if args.compare:
-            sys.argv.extend(["--compare"] + args.compare)
-        filetracker_main()
+            filetracker_args.extend(["--compare"] + args.compare)
+        filetracker_main(filetracker_args)
+
+    elif args.command == "snapshot":
+        from snapshot import create_snapshot, list_snapshots, iter_manifest, restore_paths, apply_retention, \
+            GarbageCollector
+        try:
+            if args.snapshot_command == "create":
+                snapshot_id = create_snapshot(args.folder, args.snapshot_dir, config["blacklist"])
+                print(f"Snapshot created: {snapshot_id}")
+            elif args.snapshot_command == "list":
+                for snapshot_id in list_snapshots(args.snapshot_dir):
+                    print(snapshot_id)
+            elif args.snapshot_command == "show":
+                for entry in iter_manifest(args.snapshot_id, args.snapshot_dir):
+                    print(f"{entry['size']:>12}  {entry['hash'][:12]}  {entry['path']}")
+            elif args.snapshot_command == "restore":
+                restored = restore_paths(args.snapshot_id, args.paths, args.dest, args.snapshot_dir, max_workers=args.jobs)
+                print(f"Restored {len(restored)} file(s) to {os.path.abspath(args.dest)}")
+            elif args.snapshot_command == "gc":
+                pruned = apply_retention(args.snapshot_dir, config["retention"], dry_run=args.dry_run)
+                for snapshot_id in pruned:
+                    print(f"{'Would prune' if args.dry_run else 'Pruned'} {snapshot_id}")
+                if not args.dry_run:
+                    stats = GarbageCollector(args.snapshot_dir).collect()
+                    print(f"Removed {stats['objects_removed']} object(s), freed {stats['bytes_freed']} bytes")
+            else:
+                parser_snapshot.print_help()
+                sys.exit(1)
+        except FileNotFoundError as e:
+            log().error(str(e))
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    elif args.command == "serve":
+        import cli_server
+        if args.stop:
+            print("Daemon stopped" if cli_server.stop() else "No daemon is running")
+            sys.exit(0)
+        if not cli_server.is_supported():
+            print("Error: serve needs Unix domain sockets with descriptor passing (POSIX)")
+            sys.exit(1)
+        if cli_server.is_running():
+            print(f"Error: a daemon is already serving {cli_server.socket_path()}")
+            sys.exit(1)
+        print(f"Serving on {cli_server.socket_path()}", flush=True)
+        try:
+            # Commands run in this process: the subsystems' main(argv) functions instead of new interpreters
+            cli_server.serve(lambda command: main(command, forward=False), idle_timeout=args.idle_timeout)
+        except PermissionError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
 
     else:
         parser.print_help()
@@ -0,0 +1,428 @@
+# cli_server.py
+
+import hashlib
+import json
+import os
+import socket
+import stat
+import sys
+import time
+
+# `codeaccountant serve` keeps one interpreter running with every subsystem imported and its
+# caches warm (installed-package indexes, run-history connections, FileTracker plugins), and runs
+# CLI commands for thin clients over a Unix domain socket. A client passes its stdin, stdout and
+# stderr over the socket (SCM_RIGHTS) along with its argv, cwd and environment; the daemon puts
+# those descriptors on 0/1/2 and runs the command in-process, so output, child processes and exit
+# codes are those of a cold run. Commands run one at a time, since they share the process's cwd,
+# environment and stdio. A client that goes away (Ctrl-C) interrupts its command.
+#
+# cli.py forwards to a running daemon and runs the command itself when there is none
+# (CODEACCOUNTANT_NO_DAEMON=1 always runs cold); the GUI starts a daemon when it needs one.
+#
+# A client hands the daemon its environment and stdio, so both ends make sure the other is the
+# same user: the socket lives in a directory only the user can access (created 0700, refused
+# if it is a symlink, owned by someone else or open to others), and where the platform reports
+# peer credentials (SO_PEERCRED) connections from or to another uid are dropped.
+
+IDLE_TIMEOUT = 1800  # Seconds without requests after which a daemon started by start() exits
+START_TIMEOUT = 10.0
+CLI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+WARM_MODULES = ["codebuilder.cli", "dependency_checker_pkg.dependency_cli", "filetracker.filetracker_cli", "snapshot",
+                "venv_cache"]
+
+
+def is_supported():
+    return os.name == "posix" and hasattr(socket, "send_fds")
+
+
+def socket_path():
+    """
+    One daemon per user, interpreter and installation, in a per-user directory
+    (CODEACCOUNTANT_SOCKET overrides the path; its directory must be private too).
+    """
+    if os.environ.get("CODEACCOUNTANT_SOCKET"):
+        return os.environ["CODEACCOUNTANT_SOCKET"]
+    identity = [os.path.realpath(sys.executable), os.path.dirname(CLI_PATH)]
+    key = hashlib.sha1(json.dumps(identity).encode()).hexdigest()[:12]
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(base, f"codeaccountant-{os.getuid()}", f"{key}.sock")
+
+
+def is_private_dir(path):
+    """Whether path is a real directory owned by this user that nobody else can access."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def make_private_dir(path):
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    if not is_private_dir(path):
+        raise PermissionError(f"{path} must be a directory owned by this user with mode 0700")
+
+
+def peer_uid(sock):
+    """uid of the process at the other end of a Unix socket, or None where the platform does not tell."""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    import struct
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1]  # pid, uid, gid
+
+
+def _send(sock, message, fds=()):
+    data = json.dumps(message).encode("utf-8")
+    socket.send_fds(sock, [len(data).to_bytes(8, "big") + data], list(fds))
+
+
+def _recv_request(conn):
+    data, fds, _, _ = socket.recv_fds(conn, 1024 * 1024, 3)
+    if len(data) < 8:
+        for fd in fds:
+            os.close(fd)
+        raise ValueError("truncated request")
+    size = int.from_bytes(data[:8], "big")
+    data = data[8:]
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            for fd in fds:
+                os.close(fd)
+            raise ValueError("truncated request")
+        data += chunk
+    return json.loads(data.decode("utf-8")), fds
+
+
+def _reply(conn, message):
+    conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _exit_code(exc):
+    """Exit status the interpreter would report for a SystemExit."""
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    print(code, file=sys.stderr)
+    return 1
+
+
+# --- Server side ---
+
+def warm():
+    """Imports the subsystems and builds the caches that every cold command starts by building."""
+    import importlib
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"[serve] {name} is not available: {e}", file=sys.stderr)
+    if "dependency_checker_pkg.dependency_cli" in sys.modules:
+        from dependency_checker_pkg.dependency_env import get_installed_index
+        get_installed_index()
+
+
+def _code_stamps():
+    # Modules of this installation that are loaded; a daemon must not keep serving edited code
+    root = os.path.dirname(CLI_PATH) + os.sep
+    stamps = {}
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and path.startswith(root):
+            try:
+                stamps[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                stamps[path] = None
+    return stamps
+
+
+class Daemon:
+    """Accepts client connections and runs their commands with dispatch(argv), one at a time."""
+
+    def __init__(self, dispatch, path=None, idle_timeout=None):
+        self.dispatch = dispatch
+        self.path = path or socket_path()
+        self.idle_timeout = idle_timeout
+        self.stamps = {}
+        self.current = None  # Connection whose command is running
+        self.hung_up = None  # Connection whose client went away
+
+    def serve_forever(self):
+        import signal
+        make_private_dir(os.path.dirname(os.path.abspath(self.path)))
+        warm()
+        self.stamps = _code_stamps()
+        signal.signal(signal.SIGUSR1, self._on_hangup)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            os.unlink(self.path)  # Left behind by a daemon that was killed
+        except OSError:
+            pass
+        old_umask = os.umask(0o177)  # Socket only usable by this user
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        server.listen(16)
+        server.settimeout(self.idle_timeout)
+        try:
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    return
+                conn.settimeout(None)
+                with conn:
+                    if peer_uid(conn) not in (None, os.getuid()):
+                        continue
+                    if not self.handle(conn):
+                        return
+        finally:
+            server.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def handle(self, conn):
+        """Serves one connection; returns False when the daemon should exit."""
+        try:
+            request, fds = _recv_request(conn)
+        except (OSError, ValueError):
+            return True
+        runnable = len(fds) == 3 and "argv" in request and not request.get("stop")
+        changed = runnable and any(_code_stamps().get(path, stamp) != stamp for path, stamp in self.stamps.items())
+        if not runnable or changed:
+            for fd in fds:
+                os.close(fd)
+            try:
+                if request.get("stop"):
+                    _reply(conn, {"stopped": True})
+                elif changed:
+                    _reply(conn, {"error": "CodeAccountant was updated; the daemon exits and the command runs cold"})
+                else:
+                    _reply(conn, {"error": "expected a command with stdin, stdout and stderr"})
+            except OSError:
+                pass
+            return not (request.get("stop") or changed)
+        try:
+            _reply(conn, {"accepted": True})
+        except OSError:
+            for fd in fds:
+                os.close(fd)
+            return True
+        code = self.run(conn, request, fds)
+        for path, stamp in _code_stamps().items():
+            self.stamps.setdefault(path, stamp)  # Modules first imported by this command
+        try:
+            _reply(conn, {"exit": code})
+            conn.shutdown(socket.SHUT_RDWR)  # Ends the hang-up watcher's recv()
+        except OSError:
+            pass
+        return True
+
+    def run(self, conn, request, fds):
+        """Runs the command with the client's stdio, cwd and environment, then restores the daemon's."""
+        import threading
+        import traceback
+        saved_fds = [os.dup(fd) for fd in (0, 1, 2)]
+        saved_env = dict(os.environ)
+        saved_cwd = os.getcwd()
+        saved_streams = (sys.stdin, sys.stdout, sys.stderr)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        # Fresh streams, so nothing buffered for one client can reach the next; stdout is buffered
+        # like a cold run's (by line on a terminal)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", buffering=1 if os.isatty(1) else -1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1, errors="backslashreplace", closefd=False)
+        code = 1
+        try:
+            self.current = conn
+            threading.Thread(target=self._watch, args=(conn,), daemon=True).start()
+            try:
+                os.environ.clear()
+                os.environ.update(request["env"])
+                os.chdir(request["cwd"])
+                code = self.dispatch(request["argv"])
+                code = 0 if code is None else code
+            except SystemExit as e:
+                code = _exit_code(e)
+            except Exception:
+                traceback.print_exc()
+                code = 1
+        except KeyboardInterrupt:
+            code = 130
+        finally:
+            self.current = None
+            for stream in (sys.stdout, sys.stderr):
+                try:
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass  # The client's end is gone
+            sys.stdin, sys.stdout, sys.stderr = saved_streams
+            for target, fd in enumerate(saved_fds):
+                os.dup2(fd, target)
+                os.close(fd)
+            os.environ.clear()
+            os.environ.update(saved_env)
+            os.chdir(saved_cwd)
+        return code
+
+    def _watch(self, conn):
+        # Clients send nothing after the request, so recv() only returns when the client hangs up
+        # or handle() shuts the connection down after the command
+        import signal
+        import threading
+        try:
+            conn.recv(1)
+        except OSError:
+            pass
+        if self.current is conn:
+            self.hung_up = conn
+            signal.pthread_kill(threading.main_thread().ident, signal.SIGUSR1)  # Interrupts blocking waits too
+
+    def _on_hangup(self, signum, frame):
+        # Runs in the main thread, so it cannot interrupt a later command than the one it was sent for
+        if self.current is not None and self.hung_up is self.current:
+            raise KeyboardInterrupt
+
+
+def serve(dispatch, path=None, idle_timeout=None):
+    """Runs a daemon in this process until it is stopped, idle for idle_timeout seconds or its code changes."""
+    Daemon(dispatch, path, idle_timeout).serve_forever()
+
+
+# --- Client side ---
+
+def _connect(path):
+    """Connection to this user's daemon at path, or None (no daemon, or one that isn't this user's)."""
+    if not is_private_dir(os.path.dirname(os.path.abspath(path))):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        if peer_uid(client) in (None, os.getuid()):
+            return client
+    except OSError:
+        pass
+    client.close()
+    return None
+
+
+def is_running(path=None):
+    if not is_supported():
+        return False
+    client = _connect(path or socket_path())
+    if client:
+        client.close()
+    return client is not None
+
+
+def _read_reply(replies):
+    line = replies.readline()
+    return json.loads(line) if line else {}
+
+
+def forward(argv, cwd=None, stdio=(0, 1, 2), path=None):
+    """
+    Runs a CLI command in the daemon with the given stdin/stdout/stderr descriptors. Returns its
+    exit code, or None if no daemon took the command (the caller should then run it itself).
+    """
+    if not is_supported():
+        return None
+    client = _connect(path or socket_path())
+    if client is None:
+        return None
+    with client:
+        try:
+            _send(client, {"argv": list(argv), "cwd": os.path.abspath(cwd or os.getcwd()), "env": dict(os.environ)},
+                  stdio)
+        except OSError:
+            return None
+        replies = client.makefile("rb")
+        try:
+            if not _read_reply(replies).get("accepted"):
+                return None
+            reply = _read_reply(replies)
+        except KeyboardInterrupt:
+            return 130  # Closing the connection interrupts the command in the daemon
+    if "exit" not in reply:
+        print("Error: the CodeAccountant daemon stopped while running the command", file=sys.stderr)
+        return 1
+    return reply["exit"]
+
+
+def capture(argv, on_output=None, cwd=None, path=None):
+    """
+    forward() with stdout and stderr read from a pipe. Returns (exit code, output), or None if no
+    daemon took the command. on_output is called with each line as it arrives.
+    """
+    import threading
+    out_r, out_w = os.pipe()
+    stdin = os.open(os.devnull, os.O_RDONLY)
+    result = {}
+
+    def request():
+        try:
+            result["code"] = forward(argv, cwd, (stdin, out_w, out_w), path)
+        finally:
+            os.close(out_w)  # The daemon's copies are closed after the command
+            os.close(stdin)
+    thread = threading.Thread(target=request, daemon=True)
+    thread.start()
+    lines = []
+    with os.fdopen(out_r, "r", errors="replace") as output:
+        for line in output:
+            lines.append(line)
+            if on_output:
+                on_output(line)
+    thread.join()
+    return None if result.get("code") is None else (result["code"], "".join(lines))
+
+
+def start(idle_timeout=IDLE_TIMEOUT, path=None, cwd=None):
+    """
+    Starts a daemon in the background, logging to codeaccountant.log in cwd; returns whether it
+    accepts connections within START_TIMEOUT.
+    """
+    import subprocess
+    if not is_supported():
+        return False
+    env = dict(os.environ, CODEACCOUNTANT_SOCKET=path) if path else None
+    subprocess.Popen(
+        [sys.executable, CLI_PATH, "serve", "--idle-timeout", str(idle_timeout)],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        cwd=cwd, start_new_session=True, close_fds=True, env=env
+    )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if is_running(path):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def stop(path=None):
+    """Asks a running daemon to exit; returns whether one was running."""
+    if not is_supported():
+        return False
+    client = _connect(path or socket_path())
+    if client is None:
+        return False
+    with client:
+        try:
+            _send(client, {"stop": True})
+            return bool(_read_reply(client.makefile("rb")).get("stopped"))
+        except OSError:
+            return False
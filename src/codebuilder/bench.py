@@ -0,0 +1,245 @@
+# codebuilder/bench.py
+
+import hashlib
+import json
+import math
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from .utils.execution import recording
+
+# A benchmark compiles once, discards a few warm-up runs (page cache, JIT, CPU frequency), then
+# records every measured run of the program: the last process the handler's run() starts is the
+# program itself (C# builds incrementally before `dotnet run`). Results are saved as JSON so two
+# runs, or two revisions of the source, can be compared with Welch's t-test on the wall times.
+
+RESULTS_DIR = "bench_results"
+RESULTS_VERSION = 1
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) with linear interpolation between closest ranks."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q / 100.0
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summarize(values):
+    n = len(values)
+    mean = sum(values) / n
+    stddev = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1)) if n > 1 else 0.0
+    return {"n": n, "min": min(values), "median": percentile(values, 50), "p95": percentile(values, 95),
+            "mean": mean, "stddev": stddev, "max": max(values)}
+
+
+def _betacf(a, b, x):
+    # Continued fraction for the incomplete beta function (modified Lentz's method)
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        for numerator in (m * (b - m) * x / ((a + m2 - 1.0) * (a + m2)),
+                          -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1.0))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 1e-12:
+            break
+    return h
+
+
+def betainc(a, b, x):
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1.0 - x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def welch_t_test(a, b):
+    """Welch's unequal-variance t-test. Returns (t, degrees of freedom, two-sided p-value)."""
+    sa, sb = summarize(a), summarize(b)
+    va, vb = sa["stddev"] ** 2 / sa["n"], sb["stddev"] ** 2 / sb["n"]
+    if va + vb == 0:
+        return 0.0, float(sa["n"] + sb["n"] - 2), 1.0 if sa["mean"] == sb["mean"] else 0.0
+    t = (sb["mean"] - sa["mean"]) / math.sqrt(va + vb)
+    df = (va + vb) ** 2 / ((va ** 2 / (sa["n"] - 1) if sa["n"] > 1 else 0) + (vb ** 2 / (sb["n"] - 1) if sb["n"] > 1 else 0))
+    p = betainc(df / 2.0, 0.5, df / (df + t * t))
+    return t, df, p
+
+
+def parse_cpus(value):
+    """"0,2-3" -> {0, 2, 3}"""
+    cpus = set()
+    for part in value.split(","):
+        start, _, end = part.strip().partition("-")
+        if not start.isdigit() or (end and not end.isdigit()):
+            raise ValueError(f"Invalid CPU list '{value}' (expected e.g. 0,2-3)")
+        cpus.update(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+@contextmanager
+def pinned_cpus(cpus):
+    """
+    Restricts this thread, and so the programs it starts, to the given CPUs (Linux only) for the
+    duration of the block. The previous affinity is restored, so a `serve` daemon running the
+    benchmark is not left pinned.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        raise BenchmarkError("CPU pinning is not supported on this platform")
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cpus)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+def _sample(handler, file_path):
+    with recording() as recorder:
+        success, output = handler.run(file_path)
+    recorder.close()
+    if not success or not recorder.stats:
+        raise BenchmarkError(f"Run failed: {output}")
+    stats = recorder.stats[-1]
+    return {"wall_time": stats.wall_time, "user_time": stats.user_time, "sys_time": stats.sys_time,
+            "max_rss_kb": stats.max_rss_kb}
+
+
+def _source_hash(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _measure(handler, file_path, iterations, warmup):
+    started = time.perf_counter()
+    success, output = handler.compile(file_path)
+    compile_time = time.perf_counter() - started
+    if not success:
+        raise BenchmarkError(f"Compile failed: {output}")
+    for _ in range(warmup):
+        _sample(handler, file_path)
+    return compile_time, [_sample(handler, file_path) for _ in range(iterations)]
+
+
+def run_benchmark(handler, file_path, language, iterations=20, warmup=3, cpus=None):
+    """Compiles once, runs warmup + iterations times and returns the result (samples and summaries)."""
+    if iterations < 2:
+        raise BenchmarkError("At least 2 iterations are needed for statistics")
+    if cpus:
+        with pinned_cpus(cpus):
+            compile_time, samples = _measure(handler, file_path, iterations, warmup)
+    else:
+        compile_time, samples = _measure(handler, file_path, iterations, warmup)
+    result = {
+        "version": RESULTS_VERSION,
+        "file": os.path.abspath(file_path),
+        "language": language,
+        "source_sha256": _source_hash(file_path),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "python": sys.version.split()[0],
+        "cpus": sorted(cpus) if cpus else None,
+        "warmup": warmup,
+        "compile_time": compile_time,
+        "samples": samples,
+    }
+    result["summary"] = summarize_samples(samples)
+    return result
+
+
+def summarize_samples(samples):
+    summary = {"wall_time": summarize([s["wall_time"] for s in samples])}
+    if samples[0]["user_time"] is not None:
+        summary["cpu_time"] = summarize([s["user_time"] + s["sys_time"] for s in samples])
+        summary["max_rss_kb"] = summarize([s["max_rss_kb"] for s in samples])
+    return summary
+
+
+def save_results(result, path=None):
+    """Writes the result to path (default: bench_results/<name>_<timestamp>.json) and returns the path."""
+    if path is None:
+        name = os.path.splitext(os.path.basename(result["file"]))[0]
+        path = os.path.join(RESULTS_DIR, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    if result.get("version") != RESULTS_VERSION or len(result.get("samples", ())) < 2:
+        raise BenchmarkError(f"{path} is not a benchmark result")
+    return result
+
+
+def compare(baseline, current, alpha=0.05):
+    """Compares the wall times of two results; significant when Welch's p-value is below alpha."""
+    a = [s["wall_time"] for s in baseline["samples"]]
+    b = [s["wall_time"] for s in current["samples"]]
+    t, df, p = welch_t_test(a, b)
+    base_median, median = percentile(a, 50), percentile(b, 50)
+    return {
+        "baseline_median": base_median,
+        "median": median,
+        "change": (median - base_median) / base_median if base_median else 0.0,
+        "t": t,
+        "df": df,
+        "p_value": p,
+        "alpha": alpha,
+        "significant": p < alpha,
+        "same_source": baseline.get("source_sha256") == current.get("source_sha256"),
+    }
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.3f} ms"
+
+
+def format_result(result):
+    summary = result["summary"]
+    wall = summary["wall_time"]
+    lines = [f"=== bench: {os.path.basename(result['file'])} ({result['language']}) ===",
+             f"compile {result['compile_time']:.2f}s (not measured), {result['warmup']} warm-up run(s), "
+             f"{wall['n']} measured" + (f", pinned to CPUs {result['cpus']}" if result["cpus"] else ""),
+             f"wall   min {_ms(wall['min'])}  median {_ms(wall['median'])}  p95 {_ms(wall['p95'])}  "
+             f"stddev {_ms(wall['stddev'])}"]
+    if "cpu_time" in summary:
+        cpu, rss = summary["cpu_time"], summary["max_rss_kb"]
+        lines.append(f"cpu    min {_ms(cpu['min'])}  median {_ms(cpu['median'])}  p95 {_ms(cpu['p95'])}  "
+                     f"stddev {_ms(cpu['stddev'])}")
+        lines.append(f"rss    median {rss['median'] / 1024:.1f} MB  max {rss['max'] / 1024:.1f} MB")
+    return "\n".join(lines)
+
+
+def format_comparison(comparison):
+    verdict = "significant" if comparison["significant"] else "not significant"
+    direction = "slower" if comparison["change"] > 0 else "faster" if comparison["change"] < 0 else "unchanged"
+    line = (f"median {_ms(comparison['baseline_median'])} -> {_ms(comparison['median'])} "
+            f"({abs(comparison['change']) * 100:.1f}% {direction}), Welch t={comparison['t']:.2f}, "
+            f"df={comparison['df']:.1f}, p={comparison['p_value']:.4f}: {verdict} at alpha={comparison['alpha']}")
+    if comparison["same_source"]:
+        line += "\n(same source in both results: differences are measurement noise or environment)"
+    return line
@@ -1,47 +1,254 @@
 import argparse
+import json
 import os
 import sys
+import time
 from .utils import detector, logger
+from .utils.run_history import get_history
+from .utils.execution import recording, format_stats
 from .languages import python, c, cpp, csharp, java, rust, go
+from .scheduler import discover_jobs, run_jobs, format_report
+from . import bench
 
-def main():
+HANDLERS = {
+    "python": python,
+    "c": c,
+    "cpp": cpp,
+    "csharp": csharp,
+    "java": java,
+    "rust": rust,
+    "go": go
+}
+
+def parse_limits(values):
+    """["java=1", "rust=2"] -> {"java": 1, "rust": 2}"""
+    limits = {}
+    for value in values or ():
+        lang, _, count = value.partition("=")
+        if lang not in HANDLERS or not count.isdigit() or int(count) < 1:
+            raise argparse.ArgumentTypeError(f"Invalid language limit '{value}' (expected e.g. java=1)")
+        limits[lang] = int(count)
+    return limits
+
+def run_all(args):
+    root = os.path.abspath(args.file)
+    if not os.path.isdir(root):
+        print(f"Error: {root} is not a directory")
+        sys.exit(1)
+    try:
+        limits = parse_limits(args.limit)
+    except argparse.ArgumentTypeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    action = "compile" if args.action == "build-all" else "run"
+    jobs = discover_jobs(root, action, [args.lang] if args.lang else None)
+    if not jobs:
+        print(f"No source files found in {root}")
+        sys.exit(0)
+
+    started = time.perf_counter()
+    results = []
+    for result in run_jobs(jobs, HANDLERS, args.jobs, limits):
+        results.append(result)
+        logger.log(result.path, result.language, result.action, result.success, result.output, result.recorder,
+                   result.duration)
+        result.recorder.close()
+        if not args.json:
+            print(f"[{len(results)}/{len(jobs)}] {'✔' if result.success else '✘'} {os.path.relpath(result.path, root)}",
+                  flush=True)
+    wall_time = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps({
+            "action": args.action,
+            "wall_time": wall_time,
+            "results": [dict(r._asdict(), path=os.path.relpath(r.path, root), recorder=None, usage=r.recorder.summary())
+                        for r in results],
+        }))
+    else:
+        print(format_report(results, wall_time, root, args.action))
+    sys.exit(0 if all(r.success for r in results) else 1)
+
+def run_bench(args, file_path, lang, handler):
+    """Benchmarks file_path, or compares two saved results when file_path is a result .json."""
+    try:
+        if file_path.endswith(".json"):
+            if not args.compare:
+                print("Error: comparing saved results needs --compare BASELINE.json")
+                sys.exit(1)
+            result = bench.load_results(file_path)
+        else:
+            cpus = bench.parse_cpus(args.cpus) if args.cpus else None
+            result = bench.run_benchmark(handler, file_path, lang, args.iterations, args.warmup, cpus)
+            saved_path = bench.save_results(result, args.save)
+        comparison = bench.compare(bench.load_results(args.compare), result) if args.compare else None
+    except (bench.BenchmarkError, ValueError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({"result": result, "comparison": comparison}))
+    else:
+        print(bench.format_result(result))
+        if not file_path.endswith(".json"):
+            print(f"Results saved to {saved_path}")
+        if comparison:
+            print(bench.format_comparison(comparison))
+    sys.exit(0)
+
+# Languages with a project mode (a directory compiled as one program), most specific first
+PROJECT_LANGUAGES = ["cpp", "c", "java"]
+
+def detect_project_language(root):
+    languages = {job.language for job in discover_jobs(root, "compile")}
+    return next((lang for lang in PROJECT_LANGUAGES if lang in languages), None)
+
+def _since(days):
+    return time.time() - days * 86400 if days else None
+
+def show_history(args):
+    """`history failures|slowest|trend|show`: queries the run history database."""
+    query = args.file
+    history = get_history()
+    if query == "show":
+        run = history.get(int(args.target)) if args.target and args.target.isdigit() else None
+        if not run:
+            print("Error: history show needs the id of a recorded run")
+            sys.exit(1)
+        full_output = history.output(run["id"])
+        if args.json:
+            print(json.dumps(dict(run, full_output=full_output)))
+        else:
+            print(_format_run(run))
+            print(full_output if full_output is not None else run["output_tail"])
+        sys.exit(0)
+    if query == "failures":
+        runs = history.failures(args.count, _since(args.days))
+    elif query == "slowest":
+        runs = history.slowest(args.count, _since(args.days), args.only)
+    elif query == "trend" and args.target:
+        runs = history.trend(args.target, args.only, args.count)
+    else:
+        print("Error: history query must be one of: failures, slowest, trend FILE, show ID")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(runs))
+    else:
+        print("\n".join(_format_run(run) for run in runs) or "No matching runs.")
+    sys.exit(0)
+
+def _format_run(run):
+    when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started_at"]))
+    line = (f"#{run['id']:<6} {when}  {'✔' if run['success'] else '✘'} {run['language']:<7} {run['action']:<8} "
+            f"{run['duration'] or 0:8.3f}s")
+    if run["max_rss_kb"] is not None:
+        line += f"  cpu {run['user_time'] + run['sys_time']:7.3f}s  rss {run['max_rss_kb'] / 1024:7.1f} MB"
+    return f"{line}  {run['file']}"
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="CodeBuilder: Multi-language code compiler and runner")
-    parser.add_argument("action", choices=["compile", "run"], help="Action to perform")
-    parser.add_argument("file", help="Source file to process")
-    parser.add_argument("--lang", help="Override language detection")
-    args = parser.parse_args()
+    parser.add_argument("action", choices=["compile", "build", "run", "build-all", "run-all", "bench", "history"],
+                        help="Action to perform (build is an alias of compile; *-all process a directory tree; "
+                             "bench compiles once and times repeated runs; history queries past runs)")
+    parser.add_argument("file", help="Source file to process (a directory for build-all/run-all, or a C/C++/Java "
+                                     "project directory for compile/run; "
+                                     "for bench also a saved result .json, with --compare; "
+                                     "for history one of failures, slowest, trend, show)")
+    parser.add_argument("target", nargs="?", help="history: the FILE for trend, the run ID for show; "
+                                                  "project run: the Java main class")
+    parser.add_argument("--lang", help="Override language detection (build-all/run-all: only this language)")
+    parser.add_argument("-j", "--jobs", type=int,
+                        help="Parallel jobs for build-all/run-all and project compiles (default: CPU count)")
+    parser.add_argument("--limit", action="append", metavar="LANG=N",
+                        help="At most N concurrent jobs of a language, e.g. --limit rust=2 (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print the build-all/run-all, bench or history report as JSON")
+    parser.add_argument("--keep-output", action="store_true",
+                        help="Store the full output of each run (compressed) in the run history")
+    parser.add_argument("--exclude", action="append", metavar="PATTERN",
+                        help="Skip matching files and directories when walking a folder or project (e.g. vendor/, gen_*)")
+    parser.add_argument("--publish", action="store_true", help="C#: also publish a self-contained executable")
+    parser.add_argument("--timeout", type=float, help="Kill a compile/run after this many seconds of wall-clock time")
+    parser.add_argument("--cpu-limit", type=float, metavar="SECONDS", help="CPU time limit per process (POSIX)")
+    parser.add_argument("--memory-limit", type=float, metavar="MB",
+                        help="Address-space limit per process in MB (POSIX; too low for JVM/.NET/Go runtimes)")
+    parser.add_argument("-n", "--iterations", type=int, default=20, help="bench: measured runs (default: 20)")
+    parser.add_argument("--warmup", type=int, default=3, help="bench: unmeasured warm-up runs (default: 3)")
+    parser.add_argument("--cpus", help="bench: pin the runs to these CPUs, e.g. 2 or 0,2-3 (Linux)")
+    parser.add_argument("--save", metavar="PATH", help="bench: result file (default: bench_results/<name>_<time>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="bench: saved result to compare against (Welch's t-test)")
+    parser.add_argument("--count", type=int, default=20, help="history: number of runs to list (default: 20)")
+    parser.add_argument("--days", type=float, help="history: only runs of the last N days (failures, slowest)")
+    parser.add_argument("--only", choices=["compile", "run"], help="history: only this action (slowest, trend)")
+    args = parser.parse_args(argv)
+
+    if args.action == "history":
+        show_history(args)
+    if args.keep_output:
+        os.environ["CODEBUILDER_KEEP_OUTPUT"] = "1"
+    if args.exclude:
+        os.environ["CODEBUILDER_EXCLUDE"] = ",".join(args.exclude)
+
+    # Read by every execute() call, including those in build-all/run-all worker threads
+    for name, value in (("CODEBUILDER_TIMEOUT", args.timeout), ("CODEBUILDER_CPU_SECONDS", args.cpu_limit),
+                        ("CODEBUILDER_MEMORY_MB", args.memory_limit)):
+        if value:
+            os.environ[name] = str(value)
+
+    if args.action in ("build-all", "run-all"):
+        run_all(args)
 
     file_path = os.path.abspath(args.file)
     if not os.path.exists(file_path):
         print(f"Error: File {file_path} does not exist")
         sys.exit(1)
+    if args.action == "bench" and file_path.endswith(".json"):
+        run_bench(args, file_path, None, None)
 
-    lang = args.lang or detector.detect_language(file_path)
+    project = os.path.isdir(file_path)
+    if project:
+        lang = args.lang or detect_project_language(file_path)
+        if not lang or args.action == "bench":
+            print(f"Error: {file_path} is a directory; project mode supports {', '.join(PROJECT_LANGUAGES)} "
+                  "with compile/build/run")
+            sys.exit(1)
+    else:
+        lang = args.lang or detector.detect_language(file_path)
     if not lang:
         print(f"Error: Unsupported file extension for {file_path}")
         sys.exit(1)
 
-    handlers = {
-        "python": python,
-        "c": c,
-        "cpp": cpp,
-        "csharp": csharp,
-        "java": java,
-        "rust": rust,
-        "go": go
-    }
-    handler = handlers.get(lang)
-    if not handler:
-        print(f"Error: No handler for language {lang}")
+    handler = HANDLERS.get(lang)
+    if not handler or (project and not hasattr(handler, "compile_project")):
+        print(f"Error: No {'project ' if project else ''}handler for language {lang}")
         sys.exit(1)
 
-    result = handler.run_action(args.action, file_path)
-    logger.log_result(file_path, args.action, result)
-    if result.returncode != 0:
-        print(f"{args.action.capitalize()} failed: {result.stderr}")
+    if args.action == "bench":
+        run_bench(args, file_path, lang, handler)
+
+    action = "compile" if args.action == "build" else args.action
+    started = time.perf_counter()
+    with recording() as recorder:
+        if project:
+            # Incremental: only changed units are recompiled, so run always builds first
+            success, output = handler.compile_project(file_path, args.jobs)
+            if success and action == "run":
+                success, run_output = handler.run_project(file_path, args.target)
+                output = f"{output}\n{run_output}"
+        elif action == "run":
+            success, output = handler.run(file_path)
+        elif args.publish and lang == "csharp":
+            success, output = handler.compile(file_path, publish=True)
+        else:
+            success, output = handler.compile(file_path)
+    logger.log(file_path, lang, action, success, output, recorder, time.perf_counter() - started)
+    recorder.close()
+    if recorder.stats:
+        output += f"\n[usage] {format_stats(recorder.summary())}"
+    if not success:
+        print(f"{action.capitalize()} failed: {output}")
         sys.exit(1)
     else:
-        print(f"{args.action.capitalize()} successful: {result.stdout}")
+        print(f"{action.capitalize()} successful: {output}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
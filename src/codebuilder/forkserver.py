@@ -0,0 +1,388 @@
+# codebuilder/forkserver.py
+
+import hashlib
+import json
+import locale
+import os
+import shutil
+import signal
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Optional fast path for Python runs (POSIX only). A long-lived interpreter imports a set of
+# modules once, then forks a child per run. The client passes its stdin and two pipe ends
+# for stdout/stderr over a Unix socket (SCM_RIGHTS), so the child writes straight to the
+# caller's pipes. The child gets its own argv, cwd, environment and __main__, and the exit
+# code is reported as a cold `python script.py` would report it.
+#
+# Per request the server forks a supervisor, which forks the runner and reports its start and
+# exit status. The server itself stays single-threaded and never waits for runs. On a timeout
+# the client asks the supervisor to kill the runner's process group (so it never signals a pid
+# it was told about); the supervisor also kills it when the client goes away.
+#
+# The client hands over its environment and stdio, so the socket lives in a 0700 directory of
+# the user's, and both ends check with SO_PEERCRED that the other is the same user.
+#
+# Runs are accounted like other CodeBuilder commands: the runner applies the requested rlimits
+# to itself, and the supervisor reports the runner's rusage from wait4().
+#
+# This file is also run as a script by start_server(), so it imports no codebuilder modules.
+
+IDLE_TIMEOUT = 600  # Seconds without requests after which the server exits (CODEBUILDER_PY_FORKSERVER_IDLE)
+START_TIMEOUT = 10.0
+
+
+def is_supported():
+    return os.name == "posix" and hasattr(socket, "send_fds") and hasattr(os, "fork")
+
+
+def _startup_environment():
+    # Read once at interpreter startup (sys.path, flags, stdio encoding), so a server only serves
+    # clients whose cold run would start the same way
+    return {k: v for k, v in os.environ.items() if k.startswith("PYTHON") or k in ("LANG", "LC_ALL", "LC_CTYPE")}
+
+
+def socket_path(python_executable, preload):
+    """One server per (interpreter, preload list, startup environment) and user; short for AF_UNIX limits."""
+    identity = [os.path.realpath(python_executable), sorted(preload), sorted(_startup_environment().items()),
+                os.stat(os.path.abspath(__file__)).st_mtime_ns]  # Never reuse a server running older code
+    key = hashlib.sha1(json.dumps(identity).encode()).hexdigest()[:12]
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"cb-fork-{os.getuid()}", f"{key}.sock")
+
+
+def _is_private_dir(path):
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def _make_private_dir(path):
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    if not _is_private_dir(path):
+        raise PermissionError(f"{path} must be a directory owned by this user with mode 0700")
+
+
+def _peer_is_us(sock):
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True  # Only the private directory protects the socket here
+    import struct
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1] == os.getuid()  # pid, uid, gid
+
+
+# --- Server side ---
+
+def _preload_stamps(preload):
+    # A preloaded module edited on disk would otherwise be served stale; the server exits instead
+    stamps = {}
+    for name in preload:
+        path = getattr(sys.modules.get(name), "__file__", None)
+        if path:
+            try:
+                stamps[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                stamps[path] = None
+    return stamps
+
+
+def _recv_request(conn):
+    data, fds, _, _ = socket.recv_fds(conn, 1024 * 1024, 3)
+    if len(data) < 8:
+        raise ValueError("truncated request")
+    size = int.from_bytes(data[:8], "big")
+    data = data[8:]
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ValueError("truncated request")
+        data += chunk
+    return json.loads(data.decode("utf-8")), fds
+
+
+def _exit_code(exc):
+    """Exit status the interpreter would report for a SystemExit."""
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _run_child(request, fds):
+    """Runs in the forked runner: becomes `python script args...` and never returns."""
+    import atexit
+    import runpy
+    import traceback
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    code = 0
+    try:
+        if request.get("rlimits"):
+            import resource
+            for name, soft, hard in request["rlimits"]:
+                resource.setrlimit(getattr(resource, name), (soft, hard))
+        os.environ.clear()
+        os.environ.update(request["env"])
+        os.chdir(request["cwd"])
+        script = request["path"]
+        sys.argv = [script] + request["args"]
+        sys.path[0] = os.path.dirname(os.path.abspath(script))
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        code = _exit_code(e)
+    except BaseException as e:
+        # Drop the runner's own frames so the traceback reads like a cold run's
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != request["path"]:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        code = 1
+    try:
+        atexit._run_exitfuncs()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        code = code or 120  # Like the interpreter when flushing stdout fails at exit
+    os._exit(code)
+
+
+def _kill_on_request(conn, pid, lock, reaped):
+    # The client sends b"k" when its timeout expires; EOF means it went away
+    try:
+        conn.recv(1)
+    except OSError:
+        pass
+    with lock:
+        if not reaped:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+def _supervise(conn, request, fds):
+    """Runs in the forked supervisor: starts the runner, reports its start, then its exit code."""
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    pid = os.fork()
+    if pid == 0:
+        conn.close()
+        os.setpgid(0, 0)  # So a timeout can kill the whole group, like a separate process
+        _run_child(request, fds)
+    try:
+        os.setpgid(pid, pid)  # Also here, so the group exists before a kill can be asked for
+    except OSError:
+        pass
+    for fd in fds:
+        os.close(fd)
+    conn.sendall(json.dumps({"pid": pid}).encode() + b"\n")
+    lock, reaped = threading.Lock(), []
+    threading.Thread(target=_kill_on_request, args=(conn, pid, lock, reaped), daemon=True).start()
+    os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)  # Unreaped, the pid cannot be reused by a kill
+    with lock:
+        reaped.append(True)
+    _, status, rusage = os.wait4(pid, 0)
+    usage = {"user_time": rusage.ru_utime, "sys_time": rusage.ru_stime,
+             "max_rss_kb": rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss,
+             "read_blocks": rusage.ru_inblock, "write_blocks": rusage.ru_oublock}
+    code = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)  # Python 3.8: no waitstatus_to_exitcode
+    conn.sendall(json.dumps({"exit": code, "usage": usage}).encode() + b"\n")
+    os._exit(0)
+
+
+def serve(path, preload, idle_timeout=None):
+    _make_private_dir(os.path.dirname(os.path.abspath(path)))
+    idle_timeout = idle_timeout or float(os.environ.get("CODEBUILDER_PY_FORKSERVER_IDLE") or IDLE_TIMEOUT)
+    for name in preload:
+        __import__(name)
+    stamps = _preload_stamps(preload)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # Supervisors are reaped automatically
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)  # Socket only usable by this user
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen(64)
+    server.settimeout(idle_timeout)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                return
+            conn.settimeout(None)
+            with conn:
+                if not _peer_is_us(conn):
+                    continue
+                try:
+                    request, fds = _recv_request(conn)
+                except (OSError, ValueError):
+                    continue
+                if _preload_stamps(preload) != stamps:
+                    conn.sendall(json.dumps({"error": "preloaded modules changed"}).encode() + b"\n")
+                    for fd in fds:
+                        os.close(fd)
+                    return
+                sys.stdout.flush()
+                sys.stderr.flush()
+                if os.fork() == 0:
+                    server.close()
+                    _supervise(conn, request, fds)
+                for fd in fds:
+                    os.close(fd)
+    finally:
+        server.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+# --- Client side ---
+
+def start_server(python_executable, preload, path):
+    subprocess.Popen(
+        [python_executable, os.path.abspath(__file__), path] + list(preload),
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True, close_fds=True
+    )
+
+
+def _connect(path):
+    if not _is_private_dir(os.path.dirname(path)):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        if _peer_is_us(client):
+            return client
+    except OSError:
+        pass
+    client.close()
+    return None
+
+
+def _connect_or_start(python_executable, preload):
+    path = socket_path(python_executable, preload)
+    client = _connect(path)
+    if client:
+        return client
+    try:
+        _make_private_dir(os.path.dirname(path))
+    except OSError:
+        return None
+    try:
+        os.unlink(path)  # Left behind by a server that died
+    except OSError:
+        pass
+    start_server(python_executable, preload, path)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        client = _connect(path)
+        if client:
+            return client
+        time.sleep(0.01)
+    return None
+
+
+def _read_all(fd, chunks):
+    with os.fdopen(fd, "rb") as f:
+        chunks.append(f.read())
+
+
+def _collect_all(out_fd, err_fd):
+    chunks = ([], [])
+    readers = [threading.Thread(target=_read_all, args=(fd, c), daemon=True) for fd, c in zip((out_fd, err_fd), chunks)]
+    for reader in readers:
+        reader.start()
+
+    def finish():
+        for reader in readers:
+            reader.join()
+        return _decode(b"".join(chunks[0])), _decode(b"".join(chunks[1]))
+    return finish
+
+
+def _decode(data):
+    # Same result as subprocess.run(..., text=True): locale encoding and universal newlines
+    text = data.decode(locale.getpreferredencoding(False), errors="strict")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def run(file_path, args=(), cwd=None, python_executable=None, preload=(), timeout=None, rlimits=(), collect=None):
+    """
+    Runs a script through the fork server. Returns (returncode, output, usage) like a cold
+    `python file_path args...`, or None if the fork server is unavailable (the caller should then
+    run the script cold). output is what collect(stdout_fd, stderr_fd)() returns, by default
+    the (stdout, stderr) texts. usage holds the runner's rusage and whether the timeout killed it.
+    rlimits are [(resource name, soft, hard)] applied in the runner.
+    """
+    if not is_supported():
+        return None
+    python_executable = python_executable or shutil.which("python") or sys.executable
+    client = _connect_or_start(python_executable, preload)
+    if client is None:
+        return None
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    request = json.dumps({
+        "path": os.path.abspath(file_path),
+        "args": list(args),
+        "cwd": os.path.abspath(cwd or os.getcwd()),
+        "env": dict(os.environ),
+        "rlimits": [list(limit) for limit in rlimits],
+    }).encode("utf-8")
+    with client:
+        try:
+            socket.send_fds(client, [len(request).to_bytes(8, "big") + request], [0, out_w, err_w])
+        except OSError:
+            for fd in (out_r, out_w, err_r, err_w):
+                os.close(fd)
+            return None
+        os.close(out_w)
+        os.close(err_w)
+        finish = (collect or _collect_all)(out_r, err_r)
+
+        replies = client.makefile("rb")
+        first = replies.readline()
+        reply = json.loads(first) if first else {"error": "no reply"}
+        if "pid" not in reply:
+            finish()
+            return None
+        timed_out = False
+        if timeout is not None:
+            client.settimeout(timeout)
+        try:
+            line = replies.readline()
+        except (socket.timeout, OSError):
+            timed_out = True
+            client.settimeout(None)
+            try:
+                client.sendall(b"k")  # The supervisor kills the runner and still reports the exit
+            except OSError:
+                pass
+            replies = client.makefile("rb")  # The timed-out file object cannot be read again
+            line = replies.readline()
+        output = finish()
+    reply = json.loads(line) if line else {"exit": -9}
+    return reply["exit"], output, dict(reply.get("usage") or {}, timed_out=timed_out)
+
+
+if __name__ == "__main__":
+    # Started by start_server(): forkserver.py SOCKET_PATH [MODULE ...]
+    serve(sys.argv[1], sys.argv[2:])
@@ -1,8 +1,11 @@
 #languages/c.py
 
-import subprocess
 import os
 import shutil
+import tempfile
+from ..utils.build_cache import compile_cached
+from ..utils.execution import run_command
+from . import native_project
 
 def compile(file_path):
     if not shutil.which("gcc"):
@@ -12,11 +15,20 @@ def compile(file_path):
     if os.name == 'nt':
         binary += '.exe'
 
+    # The headers it includes (-MMD) are part of the cache key
+    fd, depfile = tempfile.mkstemp(suffix=".d")
+    os.close(fd)
+
+    def build():
+        return run_command(["gcc", file_path, "-o", binary, "-MMD", "-MF", depfile])
+
     try:
-        result = subprocess.run(["gcc", file_path, "-o", binary], capture_output=True, text=True)
-        return result.returncode == 0, result.stdout + result.stderr
+        return compile_cached("c", "gcc", [], [file_path], os.path.dirname(binary), [binary], build,
+                              lambda: native_project.depfile_dependencies(depfile, [file_path]))
     except Exception as e:
         return False, str(e)
+    finally:
+        os.remove(depfile)
 
 def run(file_path):
     binary = os.path.splitext(file_path)[0]
@@ -27,7 +39,12 @@ def run(file_path):
         return False, "Compiled binary not found. Please compile first."
 
     try:
-        result = subprocess.run([binary], capture_output=True, text=True)
-        return result.returncode == 0, result.stdout + result.stderr
+        return run_command([binary])
     except Exception as e:
         return False, str(e)
+
+def compile_project(root, jobs=None):
+    return native_project.compile_project(root, "c", jobs)
+
+def run_project(root, main=None):
+    return native_project.run_project(root)
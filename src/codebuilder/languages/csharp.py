@@ -1,74 +1,194 @@
 import os
 import shutil
 import subprocess
-import tempfile
 import platform
-import glob
-import subprocess
+import threading
+import time
+from ..utils.build_cache import user_cache_dir
+from ..utils.execution import execute
+
+# Instead of a fresh `dotnet new console` per call, a small pool of persistent workspaces is
+# created once per user and reused: the user's file is swapped in as Program.cs (only when its
+# contents changed, so MSBuild's incremental build can skip unchanged work) and builds skip
+# the restore step. Publishing a self-contained executable only happens when asked for.
+
+PROJECT_NAME = "CodeBuilderApp"
+POOL_SIZE = 2
+LOCK_TIMEOUT = 3600  # Seconds after which a workspace lock left by a crashed process is ignored
+READY_MARKER = ".codebuilder_ready"
+
+_thread_lock = threading.Lock()
+
+
+def workspace_root():
+    return os.environ.get("CODEBUILDER_CSHARP_WORKSPACES") or user_cache_dir("csharp")
 
-def compile(file_path):
-    if not shutil.which("dotnet"):
-        return False, ".NET SDK not found. Please install it from https://dotnet.microsoft.com."
 
+def _lock_is_stale(lock_dir):
     try:
-        temp_dir = tempfile.mkdtemp()
-        subprocess.run(["dotnet", "new", "console", "--output", temp_dir], check=True)
-
-        # Replace generated Program.cs with user's file
-        shutil.copy(file_path, os.path.join(temp_dir, "Program.cs"))
-
-        # Build the project
-        result = subprocess.run(["dotnet", "build", temp_dir], capture_output=True, text=True)
-
-        # Publish as self-contained .exe
-        publish_dir = os.path.join(temp_dir, "publish")
-        publish_result = subprocess.run([
-            "dotnet", "publish", temp_dir,
-            "--configuration", "Release",
-            "--output", publish_dir,
-            "-r", "win-x64",
-            "--self-contained", "true"
-        ], capture_output=True, text=True)
-
-        # Detect the project name from the temp dir
-        project_name = os.path.basename(temp_dir)
-        exe_path = os.path.join(publish_dir, f"{project_name}.exe")
-
-        if os.path.exists(exe_path):
-            os.makedirs("build_binaries", exist_ok=True)
-            target_path = os.path.join("build_binaries", os.path.basename(exe_path))
-            shutil.copy(exe_path, target_path)
-
-            # Auto-open folder and select the .exe on Windows
-            if platform.system() == "Windows":
+        with open(os.path.join(lock_dir, "pid"), "r") as f:
+            pid = int(f.read().strip() or 0)
+        if time.time() - os.stat(lock_dir).st_mtime > LOCK_TIMEOUT:
+            return True
+        if os.name != "nt" and pid:
+            os.kill(pid, 0)
+        return False
+    except ProcessLookupError:
+        return True
+    except (OSError, ValueError):
+        return False  # Lock is being created or released right now
+
+
+def _acquire_workspace():
+    """Claims a free workspace of the pool (waiting if all are busy) and returns its path."""
+    root = workspace_root()
+    os.makedirs(root, exist_ok=True)
+    while True:
+        with _thread_lock:
+            for i in range(POOL_SIZE):
+                workspace = os.path.join(root, f"ws{i}")
+                lock_dir = workspace + ".lock"
                 try:
-                    subprocess.run(["explorer", "/select,", os.path.abspath(target_path)])
-                except Exception as e:
-                    publish_note += f"\n[⚠] Could not open folder: {e}"
+                    os.mkdir(lock_dir)
+                except FileExistsError:
+                    if _lock_is_stale(lock_dir):
+                        shutil.rmtree(lock_dir, ignore_errors=True)
+                    continue
+                with open(os.path.join(lock_dir, "pid"), "w") as f:
+                    f.write(str(os.getpid()))
+                return workspace
+        time.sleep(0.1)
 
-            publish_note = f"\n[✔] Your app was published to: {target_path} and Explorer opened."
-        else:
-            publish_note = "\n[⚠] No matching .exe found to copy."
 
-        success = result.returncode == 0
-        output = result.stdout + result.stderr + "\n" + publish_result.stdout + publish_result.stderr + publish_note
+def _release_workspace(workspace):
+    shutil.rmtree(workspace + ".lock", ignore_errors=True)
+
+
+def _prepare_workspace(workspace, file_path):
+    """Creates the project on first use, then swaps the user's file in. Returns (ok, output)."""
+    if not os.path.exists(os.path.join(workspace, READY_MARKER)):
+        shutil.rmtree(workspace, ignore_errors=True)
+        result = execute(["dotnet", "new", "console", "--output", workspace, "--name", PROJECT_NAME, "--force"])
+        if result.returncode != 0:
+            shutil.rmtree(workspace, ignore_errors=True)
+            return False, result.stdout + result.stderr
+        open(os.path.join(workspace, READY_MARKER), "w").close()
+
+    program = os.path.join(workspace, "Program.cs")
+    with open(file_path, "rb") as f:
+        source = f.read()
+    try:
+        with open(program, "rb") as f:
+            unchanged = f.read() == source
+    except FileNotFoundError:
+        unchanged = False
+    if not unchanged:
+        with open(program, "wb") as f:
+            f.write(source)
+    return True, ""
+
 
+def _build(workspace):
+    return execute(["dotnet", "build", workspace, "--no-restore", "--nologo", "-v", "q"])
+
+
+def _runtime_identifier():
+    machine = platform.machine().lower()
+    arch = "arm64" if machine in ("arm64", "aarch64") else "x64"
+    system = {"Windows": "win", "Darwin": "osx"}.get(platform.system(), "linux")
+    return f"{system}-{arch}"
+
+
+def _publish(workspace, file_path):
+    publish_dir = os.path.join(workspace, "publish")
+    rid = _runtime_identifier()
+    publish_result = execute([
+        "dotnet", "publish", workspace,
+        "--configuration", "Release",
+        "--output", publish_dir,
+        "-r", rid,
+        "--self-contained", "true"
+    ])
+
+    exe_name = PROJECT_NAME + (".exe" if rid.startswith("win") else "")
+    exe_path = os.path.join(publish_dir, exe_name)
+    if os.path.exists(exe_path):
+        os.makedirs("build_binaries", exist_ok=True)
+        target_name = os.path.splitext(os.path.basename(file_path))[0] + os.path.splitext(exe_name)[1]
+        target_path = os.path.join("build_binaries", target_name)
+        shutil.copy(exe_path, target_path)
+        publish_note = f"\n[✔] Your app was published to: {target_path}"
+
+        # Auto-open folder and select the .exe on Windows
+        if platform.system() == "Windows":
+            try:
+                subprocess.run(["explorer", "/select,", os.path.abspath(target_path)])
+                publish_note += " and Explorer opened."
+            except Exception as e:
+                publish_note += f"\n[⚠] Could not open folder: {e}"
+    else:
+        publish_note = "\n[⚠] No matching executable found to copy."
+    # Published output is only needed for the copy above; don't let it accumulate in the workspace
+    shutil.rmtree(publish_dir, ignore_errors=True)
+    return publish_result.returncode == 0, publish_result.stdout + publish_result.stderr + publish_note
+
+
+def compile(file_path, publish=False):
+    if not shutil.which("dotnet"):
+        return False, ".NET SDK not found. Please install it from https://dotnet.microsoft.com."
+
+    workspace = _acquire_workspace()
+    try:
+        ready, output = _prepare_workspace(workspace, file_path)
+        if not ready:
+            return False, output
+        result = _build(workspace)
+        success = result.returncode == 0
+        output = result.stdout + result.stderr
+        if success and publish:
+            success, publish_output = _publish(workspace, file_path)
+            output += "\n" + publish_output
         return success, output
     except Exception as e:
         return False, str(e)
+    finally:
+        _release_workspace(workspace)
+
 
 def run(file_path):
     if not shutil.which("dotnet"):
         return False, ".NET runtime not found. Please install it from https://dotnet.microsoft.com."
 
+    workspace = _acquire_workspace()
     try:
-        temp_dir = tempfile.mkdtemp()
-        subprocess.run(["dotnet", "new", "console", "--output", temp_dir], check=True)
-        shutil.copy(file_path, os.path.join(temp_dir, "Program.cs"))
+        ready, output = _prepare_workspace(workspace, file_path)
+        if not ready:
+            return False, output
+        build_result = _build(workspace)
+        if build_result.returncode != 0:
+            return False, build_result.stdout + build_result.stderr
 
-        result = subprocess.run(["dotnet", "run", "--project", temp_dir], capture_output=True, text=True)
+        result = execute(["dotnet", "run", "--project", workspace, "--no-build", "--no-restore"])
 
         success = result.returncode == 0
         return success, result.stdout + result.stderr
     except Exception as e:
         return False, str(e)
+    finally:
+        _release_workspace(workspace)
+
+
+def clean_workspaces():
+    """Deletes all cached workspaces that are not in use."""
+    root = workspace_root()
+    for i in range(POOL_SIZE):
+        workspace = os.path.join(root, f"ws{i}")
+        lock_dir = workspace + ".lock"
+        try:
+            os.mkdir(lock_dir)
+        except FileExistsError:
+            continue
+        try:
+            shutil.rmtree(workspace, ignore_errors=True)
+        finally:
+            os.rmdir(lock_dir)
@@ -1,8 +1,28 @@
 # languages/go.py
 
-import subprocess
 import os
 import shutil
+from ..utils.build_cache import compile_cached
+from ..utils.execution import run_command
+
+def module_sources(file_path):
+    """
+    Files of the Go module containing file_path that a build can read: every .go file (local
+    packages, vendor/), go.mod, go.sum and go.work. Outside a module only the file itself is built.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    while not os.path.exists(os.path.join(directory, "go.mod")):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return []
+        directory = parent
+    files = []
+    for dirpath, dirs, names in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith((".", "_")) and d != "testdata")  # Ignored by go build
+        files.extend(os.path.join(dirpath, name) for name in sorted(names)
+                     if (name.endswith(".go") and not name.endswith("_test.go")) or name in ("go.mod", "go.sum", "go.work"))
+    return files
+
 
 def compile(file_path):
     if not shutil.which("go"):
@@ -12,9 +32,13 @@ def compile(file_path):
     if os.name == 'nt':
         output_binary += '.exe'
 
+    def build():
+        return run_command(["go", "build", "-o", output_binary, file_path])
+
     try:
-        result = subprocess.run(["go", "build", "-o", output_binary, file_path], capture_output=True, text=True)
-        return result.returncode == 0, result.stdout + result.stderr
+        # Local packages and the module files (dependency versions) are part of the cache key
+        return compile_cached("go", "go", [], [file_path], os.path.dirname(output_binary), [output_binary], build,
+                              module_sources(file_path))
     except Exception as e:
         return False, str(e)
 
@@ -27,8 +51,7 @@ def run(file_path):
         return False, "Compiled binary not found. Please compile first."
 
     try:
-        result = subprocess.run([binary], capture_output=True, text=True)
-        return result.returncode == 0, result.stdout + result.stderr
+        return run_command([binary])
     except Exception as e:
         return False, str(e)
 
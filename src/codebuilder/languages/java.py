@@ -1,16 +1,47 @@
 # languages/java.py
 
-import subprocess
+import hashlib
+import json
 import os
+import re
+import shlex
 import shutil
+from ..scheduler import walk_sources
+from ..utils.build_cache import compile_cached
+from ..utils.execution import run_command
+
+# Project mode: all .java files under a project root compile into obj/classes with a single
+# javac run (one JVM start). obj/codebuilder-java.json records each source's hash, package and
+# top-level types; only sources whose hash changed are recompiled, together with the unchanged
+# sources that mention one of their type names (their use of a changed API is re-checked).
+# Runs use obj/classes as the classpath, also for single files that belong to a built project.
+
+PROJECT_CLASSES = os.path.join("obj", "classes")
+PROJECT_MANIFEST = os.path.join("obj", "codebuilder-java.json")
+COMMENTS_AND_STRINGS = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.S)
+PACKAGE = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.M)
+TYPE_DECLARATION = re.compile(r"\b(?:class|interface|enum|record)\s+([A-Za-z_$][\w$]*)")
+MAIN_METHOD = re.compile(r"\bstatic\s+(?:public\s+)?void\s+main\s*\(|\bpublic\s+static\s+void\s+main\s*\(")
 
 def compile(file_path):
     if not shutil.which("javac"):
         return False, "Java compiler not found. Please install JDK and add javac to PATH."
 
+    dir_path = os.path.dirname(file_path) or "."
+    class_name = os.path.splitext(os.path.basename(file_path))[0]
+
+    def build():
+        return run_command(["javac", file_path])
+
+    def outputs():
+        # The class plus its nested/anonymous classes (Main$1.class, Main$Inner.class)
+        return [os.path.join(dir_path, f) for f in os.listdir(dir_path)
+                if f == f"{class_name}.class" or (f.startswith(f"{class_name}$") and f.endswith(".class"))]
+
+    # javac also compiles sibling classes the file refers to, so they are part of the key
+    sources = sorted(os.path.join(dir_path, f) for f in os.listdir(dir_path) if f.endswith(".java"))
     try:
-        result = subprocess.run(["javac", file_path], capture_output=True, text=True)
-        return result.returncode == 0, result.stdout + result.stderr
+        return compile_cached("java", "javac", [], sources, dir_path, outputs, build)
     except Exception as e:
         return False, str(e)
 
@@ -22,7 +53,146 @@ def run(file_path):
     class_name = os.path.splitext(os.path.basename(file_path))[0]
 
     try:
-        result = subprocess.run(["java", "-cp", dir_path, class_name], capture_output=True, text=True)
-        return result.returncode == 0, result.stdout + result.stderr
+        project = _project_of(file_path)
+        if project:
+            root, info = project
+            return run_command(["java", "-cp", os.path.join(root, PROJECT_CLASSES), _qualified_name(file_path, info)])
+        return run_command(["java", "-cp", dir_path, class_name])
+    except Exception as e:
+        return False, str(e)
+
+# --- Project mode ---
+
+def _scan_source(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    code = COMMENTS_AND_STRINGS.sub(" ", data.decode("utf-8", errors="replace"))
+    package = PACKAGE.search(code)
+    return {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "package": package.group(1) if package else "",
+        "types": sorted(set(TYPE_DECLARATION.findall(code))),
+        "main": bool(MAIN_METHOD.search(code)),
+    }
+
+def _qualified_name(path, info):
+    class_name = os.path.splitext(os.path.basename(path))[0]
+    return f"{info['package']}.{class_name}" if info["package"] else class_name
+
+def _class_files(classes_dir, info):
+    """Class files produced for a source's top-level types, including nested ones (Type$Inner.class)."""
+    package_dir = os.path.join(classes_dir, *info["package"].split(".")) if info["package"] else classes_dir
+    try:
+        names = os.listdir(package_dir)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(package_dir, n) for n in names if n.endswith(".class")
+            and (n[:-6] in info["types"] or n.split("$", 1)[0] in info["types"])]
+
+def _read_manifest(root):
+    try:
+        with open(os.path.join(root, PROJECT_MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_manifest(root, manifest):
+    path = os.path.join(root, PROJECT_MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(path + ".tmp", path)
+
+def _javac_stamp():
+    path = os.path.realpath(shutil.which("javac"))
+    st = os.stat(path)
+    return [path, st.st_size, st.st_mtime_ns]
+
+def compile_project(root, jobs=None):
+    """Compiles the changed sources of the project under root in one javac run. Returns (success, output)."""
+    if not shutil.which("javac"):
+        return False, "Java compiler not found. Please install JDK and add javac to PATH."
+    root = os.path.abspath(root)
+    sources = []
+    for dirpath, dirs, files in walk_sources(root):
+        sources.extend(os.path.relpath(os.path.join(dirpath, f), root) for f in files if f.endswith(".java"))
+    if not sources:
+        return False, f"No Java sources found in {root}"
+
+    classes_dir = os.path.join(root, PROJECT_CLASSES)
+    flags = shlex.split(os.environ.get("JAVAC_FLAGS", ""))
+    manifest = _read_manifest(root)
+    old = manifest.get("sources", {})
+    if manifest.get("javac") != _javac_stamp() or manifest.get("flags") != flags:
+        old = {}  # New compiler or flags: everything is stale
+    current = {rel: _scan_source(os.path.join(root, rel)) for rel in sources}
+    changed = {rel for rel, info in current.items() if old.get(rel, {}).get("sha256") != info["sha256"]}
+    removed = set(old) - set(current)
+
+    # Unchanged sources that refer to a type that changed, appeared or disappeared
+    names = set()
+    for rel in changed | removed:
+        names.update(old.get(rel, {}).get("types", []))
+        names.update(current.get(rel, {}).get("types", []))
+    dependents = set()
+    if names:
+        pattern = re.compile(r"\b(?:" + "|".join(re.escape(n) for n in sorted(names)) + r")\b")
+        for rel in set(current) - changed:
+            with open(os.path.join(root, rel), "r", encoding="utf-8", errors="replace") as f:
+                if pattern.search(f.read()):
+                    dependents.add(rel)
+    to_compile = sorted(changed | dependents)
+
+    for rel in set(to_compile) | removed:  # Drop classes of renamed/removed types and nested classes
+        for path in _class_files(classes_dir, old.get(rel) or current[rel]):
+            os.remove(path)
+    if not to_compile:
+        _write_manifest(root, {"javac": _javac_stamp(), "flags": flags, "sources": current})
+        return True, f"[project] 0 of {len(sources)} source(s) changed, {PROJECT_CLASSES} is up to date"
+
+    os.makedirs(classes_dir, exist_ok=True)
+    argfile = os.path.join(root, "obj", "javac-sources.txt")
+    with open(argfile, "w", encoding="utf-8") as f:
+        # One quoted path per line: no command-line length limit for large exercise sets
+        f.write("\n".join('"' + os.path.join(root, rel).replace("\\", "\\\\") + '"' for rel in to_compile))
+    success, output = run_command(["javac", "-d", classes_dir, "-cp", classes_dir, "-sourcepath", root,
+                                   "-implicit:class"] + flags + ["@" + argfile])
+    if not success:
+        current = {rel: info for rel, info in current.items() if rel not in to_compile}  # Retried next time
+    _write_manifest(root, {"javac": _javac_stamp(), "flags": flags, "sources": current})
+    summary = (f"[project] {len(to_compile)} of {len(sources)} source(s) compiled in one javac run "
+               f"({len(changed)} changed, {len(dependents)} dependent)")
+    return success, f"{output.rstrip()}\n{summary}" if output.strip() else summary
+
+def _project_of(file_path):
+    """(root, source info) of the built project containing file_path with an up-to-date entry, or None."""
+    file_path = os.path.abspath(file_path)
+    directory = os.path.dirname(file_path)
+    while True:
+        if os.path.isfile(os.path.join(directory, PROJECT_MANIFEST)):
+            info = _read_manifest(directory).get("sources", {}).get(os.path.relpath(file_path, directory))
+            if info and info["sha256"] == _scan_source(file_path)["sha256"]:
+                return directory, info
+            return None
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+def run_project(root, main=None):
+    """Runs the project's main class: main (simple or qualified name), or the only class with a main method."""
+    if not shutil.which("java"):
+        return False, "Java runtime not found. Please install JDK and add java to PATH."
+    root = os.path.abspath(root)
+    sources = _read_manifest(root).get("sources", {})
+    if not sources:
+        return False, "Compiled classes not found. Please compile the project first."
+    mains = sorted(_qualified_name(rel, info) for rel, info in sources.items() if info["main"])
+    if main:
+        mains = [m for m in mains if m == main or m.rsplit(".", 1)[-1] == main] or [main]
+    if len(mains) != 1:
+        return False, ("Several classes have a main method, choose one: " + ", ".join(mains)) if mains \
+            else "No class with a main method found."
+    try:
+        return run_command(["java", "-cp", os.path.join(root, PROJECT_CLASSES), mains[0]])
     except Exception as e:
         return False, str(e)
@@ -0,0 +1,192 @@
+# languages/native_project.py
+
+import json
+import os
+import shlex
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from ..scheduler import walk_sources
+from ..utils.execution import execute, run_command, current_recorder, recording
+
+# Project mode for C and C++: every translation unit under the project root is compiled to
+# obj/<relative path>.o in parallel, with the compiler writing the headers it read to a .d file
+# (-MMD -MP). A unit is only recompiled when its object is older than its source or any header
+# listed in its .d file, or when the compiler or flags changed; the binary bin/<project> is only
+# relinked when an object changed or the set of units did.
+
+LANGUAGES = {
+    # language: (C compiler, C++ compiler or None, linker, source extensions)
+    "c": ("gcc", None, "gcc", (".c",)),
+    "cpp": ("gcc", "g++", "g++", (".c", ".cpp", ".cc", ".cxx")),
+}
+STAMP_FILE = "codebuilder-{language}.json"
+
+
+def find_sources(root, extensions):
+    sources = []
+    for dirpath, dirs, files in walk_sources(root):
+        sources.extend(os.path.join(dirpath, f) for f in files if f.lower().endswith(extensions))
+    return sources
+
+
+def binary_path(root):
+    name = os.path.basename(os.path.abspath(root)) or "app"
+    return os.path.join(root, "bin", name + (".exe" if os.name == "nt" else ""))
+
+
+def _compiler_stamp(compiler):
+    path = os.path.realpath(shutil.which(compiler))
+    st = os.stat(path)
+    return [path, st.st_size, st.st_mtime_ns]
+
+
+def parse_depfile(path):
+    """Prerequisites of a make-style dependency file as written by -MMD -MP (None if unreadable)."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read().replace("\\\n", " ")
+    except OSError:
+        return None
+    deps = []
+    for line in text.splitlines():
+        target, sep, prerequisites = line.partition(": ")
+        if not sep:
+            continue
+        # Escaped spaces in paths are written as "\ "
+        deps.extend(p.replace("\0", " ") for p in prerequisites.replace("\\ ", "\0").split())
+    return deps
+
+
+def depfile_dependencies(depfile, sources):
+    """Files a compile read besides its sources, from its depfile (None if it could not be read)."""
+    deps = parse_depfile(depfile)
+    if deps is None:
+        return None
+    return sorted({os.path.abspath(dep) for dep in deps} - {os.path.abspath(source) for source in sources})
+
+
+def is_stale(obj, depfile):
+    try:
+        built = os.stat(obj).st_mtime_ns
+    except OSError:
+        return True
+    deps = parse_depfile(depfile)
+    if not deps:
+        return True
+    for dep in deps:
+        try:
+            if os.stat(dep).st_mtime_ns > built:
+                return True
+        except OSError:
+            return True  # A header was removed or renamed
+    return False
+
+
+def _flags(root, language):
+    include = ["-I", root] + (["-I", os.path.join(root, "include")] if os.path.isdir(os.path.join(root, "include")) else [])
+    cflags = shlex.split(os.environ.get("CFLAGS", ""))
+    cxxflags = shlex.split(os.environ.get("CXXFLAGS", ""))
+    return {"c": include + cflags, "cpp": include + cxxflags, "ldflags": shlex.split(os.environ.get("LDFLAGS", ""))}
+
+
+def _read_stamp(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def compile_project(root, language, jobs=None):
+    """Incrementally builds the project under root. Returns (success, output) like the language handlers."""
+    c_compiler, cxx_compiler, linker, extensions = LANGUAGES[language]
+    for tool in {c_compiler, cxx_compiler, linker} - {None}:
+        if not shutil.which(tool):
+            return False, f"{tool} not found. Please install it and add it to PATH."
+    root = os.path.abspath(root)
+    sources = find_sources(root, extensions)
+    if not sources:
+        return False, f"No {language.upper()} sources found in {root}"
+
+    obj_dir = os.path.join(root, "obj")
+    os.makedirs(obj_dir, exist_ok=True)
+    flags = _flags(root, language)
+    stamp_path = os.path.join(obj_dir, STAMP_FILE.format(language=language))
+    stamp = {
+        "compilers": {tool: _compiler_stamp(tool) for tool in {c_compiler, cxx_compiler, linker} - {None}},
+        "flags": flags,
+    }
+    previous = _read_stamp(stamp_path) or {}
+    rebuild_all = {k: previous.get(k) for k in stamp} != stamp  # Compiler upgrade or flags changed
+
+    units = []
+    for source in sources:
+        obj = os.path.join(obj_dir, os.path.relpath(source, root) + ".o")
+        units.append((source, obj, obj[:-2] + ".d"))
+    stale = [u for u in units if rebuild_all or is_stale(u[1], u[2])]
+    recorder = current_recorder()  # Thread-local: handed to the pool's threads explicitly
+
+    def compile_unit(unit):
+        source, obj, depfile = unit
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        is_c = source.lower().endswith(".c")
+        command = [c_compiler if is_c else cxx_compiler] + (flags["c"] if is_c else flags["cpp"])
+        command += ["-MMD", "-MP", "-MF", depfile, "-c", source, "-o", obj]
+        with recording(recorder) if recorder else nullcontext():
+            result = execute(command)
+        if result.returncode != 0:
+            for path in (obj, depfile):  # Stale again until it compiles
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return source, result
+
+    outputs = []
+    failed = []
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        for source, result in pool.map(compile_unit, stale):
+            text = result.stdout + result.stderr
+            if text.strip():
+                outputs.append(f"--- {os.path.relpath(source, root)} ---\n{text.rstrip()}")
+            if result.returncode != 0:
+                failed.append(source)
+    summary = f"[project] {len(stale)} of {len(units)} translation unit(s) recompiled"
+    if failed:
+        outputs.append(f"{summary}, {len(failed)} failed; not linked.")
+        return False, "\n".join(outputs)
+
+    binary = binary_path(root)
+    objects = [obj for _, obj, _ in units]
+    try:
+        linked_at = os.stat(binary).st_mtime_ns
+        relink = stale or previous.get("objects") != objects or any(os.stat(o).st_mtime_ns > linked_at for o in objects)
+    except OSError:
+        relink = True
+    if relink:
+        os.makedirs(os.path.dirname(binary), exist_ok=True)
+        success, link_output = run_command([linker] + objects + ["-o", binary] + flags["ldflags"])
+        if link_output.strip():
+            outputs.append(link_output.rstrip())
+        if not success:
+            outputs.append(f"{summary}; link failed.")
+            return False, "\n".join(outputs)
+        summary += f", linked {os.path.relpath(binary, root)}"
+    else:
+        summary += f", {os.path.relpath(binary, root)} is up to date"
+    stamp["objects"] = objects
+    with open(stamp_path, "w", encoding="utf-8") as f:
+        json.dump(stamp, f)
+    outputs.append(summary)
+    return True, "\n".join(outputs)
+
+
+def run_project(root):
+    binary = binary_path(os.path.abspath(root))
+    if not os.path.exists(binary):
+        return False, "Compiled binary not found. Please compile the project first."
+    try:
+        return run_command([binary])
+    except Exception as e:
+        return False, str(e)
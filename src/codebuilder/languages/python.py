@@ -1,13 +1,41 @@
 # languages/python.py
 
-import subprocess
+import os
+import time
+from .. import forkserver
+from ..utils import execution
+
+# CODEBUILDER_PY_FORKSERVER=1 runs scripts through a preloaded fork server instead of a cold
+# interpreter; CODEBUILDER_PY_PRELOAD=mod1,mod2 lists the modules it imports up front.
+
+def _forkserver_enabled():
+    return os.environ.get("CODEBUILDER_PY_FORKSERVER") == "1" and forkserver.is_supported()
+
+def _preload_modules():
+    return [m.strip() for m in os.environ.get("CODEBUILDER_PY_PRELOAD", "").split(",") if m.strip()]
+
+def _run_forked(file_path):
+    """Fork-server run with the same limits, output tail and accounting as execute(); None if unavailable."""
+    limits = execution.default_limits()
+    command = ["python", file_path]
+    started = time.perf_counter()
+    execution.announce(command)
+    result = forkserver.run(file_path, preload=_preload_modules(), timeout=limits.timeout,
+                            rlimits=execution.rlimits_for(limits), collect=execution.collect_output)
+    if result is None:
+        return None
+    returncode, (stdout, stderr, truncated), usage = result
+    return execution.finish_result(command, returncode, stdout, stderr, truncated, usage, started, limits,
+                                   usage.pop("timed_out"))
 
 def compile(file_path):
     return True, "Python does not require compilation."
 
 def run(file_path):
     try:
-        result = subprocess.run(["python", file_path], capture_output=True, text=True)
+        result = _run_forked(file_path) if _forkserver_enabled() else None
+        if result is None:
+            result = execution.execute(["python", file_path])
         return result.returncode == 0, result.stdout + result.stderr
     except Exception as e:
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
@@ -1,8 +1,11 @@
 # languages/rust.py
 
-import subprocess
 import os
 import shutil
+import tempfile
+from ..utils.build_cache import compile_cached
+from ..utils.execution import run_command
+from .native_project import depfile_dependencies
 
 def compile(file_path):
     if not shutil.which("rustc"):
@@ -12,11 +15,20 @@ def compile(file_path):
     if os.name == 'nt':
         binary += '.exe'
 
+    # The `mod` files it pulls in (and include_str!/include_bytes! files) are part of the cache key
+    fd, depfile = tempfile.mkstemp(suffix=".d")
+    os.close(fd)
+
+    def build():
+        return run_command(["rustc", file_path, "-o", binary, f"--emit=link,dep-info={depfile}"])
+
     try:
-        result = subprocess.run(["rustc", file_path, "-o", binary], capture_output=True, text=True)
-        return result.returncode == 0, result.stdout + result.stderr
+        return compile_cached("rust", "rustc", [], [file_path], os.path.dirname(binary), [binary], build,
+                              lambda: depfile_dependencies(depfile, [file_path]))
     except Exception as e:
         return False, str(e)
+    finally:
+        os.remove(depfile)
 
 def run(file_path):
     binary = os.path.splitext(file_path)[0]
@@ -27,8 +39,7 @@ def run(file_path):
         return False, "Compiled binary not found. Please compile first."
 
     try:
-        result = subprocess.run([binary], capture_output=True, text=True)
-        return result.returncode == 0, result.stdout + result.stderr
+        return run_command([binary])
     except Exception as e:
         return False, str(e)
 
@@ -0,0 +1,152 @@
+# codebuilder/scheduler.py
+
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .utils import detector
+from .utils.pathfilter import exclude_patterns, is_excluded
+from .utils.execution import recording, Recorder
+
+# Jobs are subprocess-bound (compilers, interpreters), so a thread pool is enough to keep
+# many of them running at once. Per-language caps bound the heavy toolchains, and expensive
+# languages are started first so the total wall time approaches that of the longest job.
+
+SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", ".venv", "venv", "node_modules", "build_logs",
+             "build_binaries", "target", "bin", "obj"}
+
+# Relative cost, used only to order the queue: longest jobs first
+LANGUAGE_COST = {"csharp": 5, "rust": 4, "cpp": 3, "java": 2, "go": 2, "c": 1, "python": 1}
+
+# javac writes the classes of sibling sources into the shared directory, so Java jobs run one
+# at a time; C# jobs share the handler's pool of dotnet workspaces (csharp.POOL_SIZE).
+DEFAULT_LANGUAGE_LIMITS = {"java": 1, "csharp": 2}
+
+BuildJob = namedtuple("BuildJob", ["path", "language", "action"])
+# recorder holds the accounting (and full output) of the processes the job started
+JobResult = namedtuple("JobResult", ["path", "language", "action", "success", "output", "duration", "recorder"])
+
+
+def walk_sources(root, exclude=None):
+    """
+    os.walk() over root in sorted order, skipping SKIP_DIRS, hidden directories and whatever matches
+    exclude (default: CODEBUILDER_EXCLUDE, see utils.pathfilter).
+    """
+    exclude = exclude_patterns() if exclude is None else exclude
+    for dirpath, dirs, files in os.walk(root):
+        rel_root = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        prefix = "" if rel_root == "." else rel_root + "/"
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")
+                         and not (exclude and is_excluded(prefix + d, exclude, is_dir=True)))
+        yield dirpath, dirs, sorted(f for f in files if not (exclude and is_excluded(prefix + f, exclude)))
+
+
+def discover_jobs(root, action, languages=None, exclude=None):
+    """One job per source file under root whose language is detected (and in `languages`, if given)."""
+    jobs = []
+    for dirpath, dirs, files in walk_sources(root, exclude):
+        for file in files:
+            path = os.path.join(dirpath, file)
+            language = detector.detect_language(path)
+            if language and (languages is None or language in languages):
+                jobs.append(BuildJob(path, language, action))
+    return jobs
+
+
+def _job_cost(job):
+    try:
+        size = os.path.getsize(job.path)
+    except OSError:
+        size = 0
+    return LANGUAGE_COST.get(job.language, 1), size
+
+
+def execute_job(job, handlers):
+    """Runs one job: "compile", or "run" (compiling first for compiled languages). Never raises."""
+    handler = handlers[job.language]
+    started = time.perf_counter()
+    with recording(Recorder()) as recorder:
+        try:
+            if job.action == "compile":
+                success, output = handler.compile(job.path)
+            else:
+                success, output = handler.compile(job.path)
+                if success:
+                    success, run_output = handler.run(job.path)
+                    output = f"{output}\n{run_output}" if output else run_output
+        except Exception as e:
+            success, output = False, str(e)
+    return JobResult(job.path, job.language, job.action, success, output, time.perf_counter() - started, recorder)
+
+
+def run_jobs(jobs, handlers, max_workers=None, language_limits=None):
+    """
+    Executes jobs on a pool of max_workers threads (default: CPU count), with at most
+    language_limits[lang] jobs of a language running at once. Yields JobResults as jobs finish.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    limits = dict(DEFAULT_LANGUAGE_LIMITS, **(language_limits or {}))
+    queues = {}
+    for job in sorted(jobs, key=_job_cost, reverse=True):
+        queues.setdefault(job.language, deque()).append(job)
+    running = {}  # future -> language
+    active = dict.fromkeys(queues, 0)
+
+    def next_job():
+        # The most expensive queued job among the languages that are below their cap
+        best = None
+        for lang in queues:
+            if queues[lang] and active[lang] < limits.get(lang, max_workers):
+                if best is None or _job_cost(queues[lang][0]) > _job_cost(best):
+                    best = queues[lang][0]
+        if best is not None:
+            queues[best.language].popleft()
+        return best
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            while len(running) < max_workers:
+                job = next_job()
+                if job is None:
+                    break
+                active[job.language] += 1
+                running[pool.submit(execute_job, job, handlers)] = job.language
+            if not running:
+                return
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                active[running.pop(future)] -= 1
+                yield future.result()
+
+
+def _cpu_time(summary):
+    return summary["user_time"] + summary["sys_time"]
+
+
+def format_report(results, wall_time, root=None, title="build-all"):
+    """One aggregated, human-readable report for a build-all/run-all invocation."""
+    results = sorted(results, key=lambda r: r.path)
+    failed = [r for r in results if not r.success]
+    busy = sum(r.duration for r in results)
+    lines = [f"=== {title}: {len(results)} job(s) in {wall_time:.2f}s "
+             f"(sum of job times {busy:.2f}s) ==="]
+    usage = {r.path: r.recorder.summary() for r in results}
+    for r in results:
+        path = os.path.relpath(r.path, root) if root else r.path
+        line = f"  {'✔' if r.success else '✘'} {r.language:<7} {path:<40} {r.duration:6.2f}s"
+        if usage[r.path]["user_time"] is not None:
+            line += f"  cpu {_cpu_time(usage[r.path]):6.2f}s  rss {usage[r.path]['max_rss_kb'] / 1024:7.1f} MB"
+        lines.append(line)
+    lines.append(f"{len(results) - len(failed)} succeeded, {len(failed)} failed.")
+    measured = [r for r in results if usage[r.path]["user_time"] is not None]
+    if measured:
+        slowest = max(measured, key=lambda r: _cpu_time(usage[r.path]))
+        largest = max(measured, key=lambda r: usage[r.path]["max_rss_kb"])
+        lines.append(f"Most CPU: {os.path.relpath(slowest.path, root) if root else slowest.path} "
+                     f"({_cpu_time(usage[slowest.path]):.2f}s); largest RSS: "
+                     f"{os.path.relpath(largest.path, root) if root else largest.path} "
+                     f"({usage[largest.path]['max_rss_kb'] / 1024:.1f} MB)")
+    for r in failed:
+        path = os.path.relpath(r.path, root) if root else r.path
+        lines.append(f"\n--- {path} ---\n{r.output.strip()}")
+    return "\n".join(lines)
@@ -1,4 +1,6 @@
 # codebuilder/utils/__init__.py
 from .detector import detect_language
-from .logger import log_result
-from .github_fetcher import fetch_github_repo
\ No newline at end of file
+from .logger import log
+from .github_fetcher import fetch_repo
+from .build_cache import BuildCache, get_build_cache, compile_cached
+from .execution import execute, run_command, recording
\ No newline at end of file
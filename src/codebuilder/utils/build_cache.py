@@ -0,0 +1,319 @@
+# codebuilder/utils/build_cache.py
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+# Compiled artifacts are stored under <cache_dir>/objects/<key>/, where key hashes the
+# language, the source contents, the compiler binary and its version, the flags, and every
+# other file the build reads (headers, Rust modules, the Go module's sources). A hit links (or
+# copies) the artifact into place instead of running the compiler. Entries are evicted
+# least-recently-used first once the cache grows beyond max_bytes.
+#
+# Files that are only known once the compiler has run (the headers in a -MMD depfile, rustc's
+# dep-info) are recorded per base key (compiler, flags, main source) in <cache_dir>/deps/: a
+# lookup hashes the files the last build read, so editing any of them is a miss.
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+VERSION_ARGS = {"go": ["version"], "javac": ["-version"]}
+
+
+def user_cache_dir(name):
+    """Per-user cache directory for CodeBuilder data, e.g. ~/.cache/codeaccountant/<name>."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "codeaccountant", name)
+
+
+def default_cache_dir():
+    return os.environ.get("CODEBUILDER_CACHE_DIR") or user_cache_dir("build")
+
+
+def remove_outputs(paths):
+    """
+    Deletes stale outputs before compiling. Restored artifacts may be hardlinks into the cache, and
+    a compiler that truncates its output in place would otherwise overwrite the cached copy.
+    """
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class BuildCache:
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, link=True):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.link = link
+        self._objects = os.path.join(self.cache_dir, "objects")
+        self._lock = threading.Lock()
+        self._versions = None
+        self._unsaved = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    # --- Keys ---
+
+    def _compiler_versions(self):
+        if self._versions is None:
+            try:
+                with open(os.path.join(self.cache_dir, "compilers.json"), "r", encoding="utf-8") as f:
+                    self._versions = json.load(f)
+            except (OSError, ValueError):
+                self._versions = {}
+        return self._versions
+
+    def compiler_identity(self, compiler):
+        """
+        Resolved compiler path plus its version output. The version is only queried again when the
+        binary's size or mtime changes, so a cache hit starts no process at all.
+        """
+        path = shutil.which(compiler)
+        if not path:
+            return None
+        path = os.path.realpath(path)
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        with self._lock:
+            entry = self._compiler_versions().get(path)
+        if entry and entry[0] == stamp:
+            return [path, entry[1]]
+        name = os.path.splitext(os.path.basename(compiler))[0]
+        result = subprocess.run([path] + VERSION_ARGS.get(name, ["--version"]), capture_output=True, text=True)
+        version = (result.stdout + result.stderr).strip()
+        with self._lock:
+            versions = self._compiler_versions()
+            versions[path] = [stamp, version]
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = os.path.join(self.cache_dir, f"compilers.json.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(versions, f)
+            os.replace(tmp_path, os.path.join(self.cache_dir, "compilers.json"))
+        return [path, version]
+
+    def key(self, language, compiler, flags, sources, dependencies=()):
+        """
+        Cache key for compiling sources, which also read the dependencies (keyed by absolute path);
+        None if the compiler cannot be found or a dependency no longer exists.
+        """
+        identity = self.compiler_identity(compiler)
+        if identity is None:
+            return None
+        digest = hashlib.sha256()
+        digest.update(json.dumps([language, identity, list(flags)]).encode("utf-8"))
+        files = [(os.path.basename(source), source) for source in sources]  # Java cares about names
+        files += [(os.path.abspath(dep), dep) for dep in sorted(set(dependencies))]
+        for i, (name, path) in enumerate(files):
+            digest.update(name.encode("utf-8") + b"\0")
+            try:
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        digest.update(hashlib.sha256(chunk).digest())
+            except FileNotFoundError:
+                if i < len(sources):
+                    raise
+                return None  # A header was removed or renamed since it was recorded
+        return digest.hexdigest()
+
+    def _deps_path(self, base_key):
+        return os.path.join(self.cache_dir, "deps", f"{base_key}.json")
+
+    def recorded_dependencies(self, base_key):
+        """Files the last build with this base key read besides its sources, or None if never recorded."""
+        try:
+            with open(self._deps_path(base_key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def record_dependencies(self, base_key, dependencies):
+        path = self._deps_path(base_key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sorted(set(os.path.abspath(dep) for dep in dependencies)), f)
+        os.replace(tmp_path, path)
+
+    # --- Artifacts ---
+
+    def fetch(self, key, dest_dir):
+        """Restores the artifact files for key into dest_dir. Returns the restored paths, or None on a miss."""
+        entry = os.path.join(self._objects, key) if key else None
+        try:
+            names = sorted(os.listdir(entry)) if entry else None
+        except FileNotFoundError:
+            names = None
+        if not names:
+            self._count("misses")
+            return None
+        restored = []
+        for name in names:
+            target = os.path.join(dest_dir, name)
+            remove_outputs([target])
+            self._place(os.path.join(entry, name), target)
+            restored.append(target)
+        os.utime(entry)  # Most recently used
+        self._count("hits")
+        return restored
+
+    def store(self, key, paths):
+        """Adds the files produced by a successful compile under key, then enforces the size limit."""
+        if not key or not paths:
+            return
+        os.makedirs(self._objects, exist_ok=True)
+        staging = os.path.join(self._objects, f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        os.makedirs(staging, exist_ok=True)
+        try:
+            for path in paths:
+                shutil.copy2(path, os.path.join(staging, os.path.basename(path)))
+            try:
+                os.rename(staging, os.path.join(self._objects, key))
+            except OSError:
+                pass  # Stored concurrently by another build
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self._count("stores")
+        self.evict()
+
+    def _place(self, src, dest):
+        if self.link:
+            try:
+                os.link(src, dest)
+                return
+            except OSError:
+                pass  # Different file system or no hardlink support
+        shutil.copy2(src, dest)
+
+    def _entries(self):
+        entries = []
+        try:
+            names = os.listdir(self._objects)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            entry = os.path.join(self._objects, name)
+            if name.endswith(".tmp"):
+                continue
+            try:
+                size = sum(os.stat(os.path.join(entry, f)).st_size for f in os.listdir(entry))
+                entries.append((os.stat(entry).st_mtime, size, entry))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            self._count("evictions")
+
+    def clear(self):
+        shutil.rmtree(self._objects, ignore_errors=True)
+        shutil.rmtree(os.path.join(self.cache_dir, "deps"), ignore_errors=True)
+
+    # --- Statistics ---
+
+    def _count(self, name):
+        with self._lock:
+            self._unsaved[name] += 1
+
+    def _saved_stats(self):
+        try:
+            with open(os.path.join(self.cache_dir, "stats.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_stats(self):
+        """Adds this process's counters to the totals in stats.json (best effort across processes)."""
+        with self._lock:
+            if not any(self._unsaved.values()):
+                return
+            totals = self._saved_stats()
+            for name, count in self._unsaved.items():
+                totals[name] = totals.get(name, 0) + count
+                self._unsaved[name] = 0
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = os.path.join(self.cache_dir, f"stats.json.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(totals, f)
+            os.replace(tmp_path, os.path.join(self.cache_dir, "stats.json"))
+
+    def stats(self):
+        """Hit/miss/store/eviction totals, the hit rate, and the number and total size of cached entries."""
+        entries = self._entries()
+        with self._lock:
+            saved = self._saved_stats()
+            stats = {name: saved.get(name, 0) + count for name, count in self._unsaved.items()}
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = len(entries)
+        stats["bytes"] = sum(size for _, size, _ in entries)
+        return stats
+
+
+_default_cache = None
+
+
+def get_build_cache():
+    """Process-wide cache, configured by CODEBUILDER_CACHE_DIR / CODEBUILDER_CACHE_MB; CODEBUILDER_CACHE=0 disables it."""
+    global _default_cache
+    if os.environ.get("CODEBUILDER_CACHE") == "0":
+        return None
+    if _default_cache is None:
+        max_mb = os.environ.get("CODEBUILDER_CACHE_MB")
+        _default_cache = BuildCache(max_bytes=int(max_mb) * 1024 * 1024 if max_mb else DEFAULT_MAX_BYTES)
+    return _default_cache
+
+
+def compile_cached(language, compiler, flags, sources, dest_dir, outputs, build, dependencies=()):
+    """
+    Compiles through the cache: on a hit the cached artifact is restored into dest_dir and build()
+    is not called. On a miss, the expected `outputs` are removed, build() runs and must return
+    (success, output), and the files it produced are stored. outputs may be a callable returning
+    the produced paths (e.g. for javac, where the class files are only known afterwards).
+    dependencies are the other files the build reads: a list, or a callable returning them after
+    a successful build (None if they could not be determined, and nothing is stored).
+    Returns (success, output) like the language handlers.
+    """
+    cache = get_build_cache()
+    base_key = cache.key(language, compiler, flags, sources) if cache else None
+    key = base_key
+    if base_key and callable(dependencies):
+        recorded = cache.recorded_dependencies(base_key)
+        key = cache.key(language, compiler, flags, sources, recorded) if recorded is not None else None
+    elif base_key and dependencies:
+        key = cache.key(language, compiler, flags, sources, dependencies)
+    started = time.perf_counter()
+    if key and cache.fetch(key, dest_dir):
+        cache.save_stats()
+        return True, f"[cache] Reused cached build ({(time.perf_counter() - started) * 1000:.1f} ms, compiler skipped)"
+    if base_key and not key:
+        cache._count("misses")
+    produced = outputs() if callable(outputs) else outputs
+    remove_outputs(produced)
+    success, output = build()
+    if success and base_key and callable(dependencies):
+        read = dependencies()
+        key = None
+        if read is not None:
+            cache.record_dependencies(base_key, read)
+            key = cache.key(language, compiler, flags, sources, read)
+    if success and key:
+        produced = outputs() if callable(outputs) else outputs
+        try:
+            cache.store(key, [p for p in produced if os.path.isfile(p)])
+        except OSError as e:
+            output += f"\n[cache] Could not store build artifact: {e}"
+    if cache:
+        cache.save_stats()
+    return success, output
@@ -0,0 +1,344 @@
+# codebuilder/utils/execution.py
+import locale
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Every compile and run goes through execute(): output is read as it is produced, only a bounded
+# tail of each stream is kept in memory (the full output is streamed to the active Recorder's
+# spool file, which the run history can store when the tail was truncated), wall-clock/CPU/memory limits
+# are enforced, and the process's resource usage is taken from wait4(). On POSIX each command
+# runs in its own process group so a limit kills compiler subprocesses too.
+
+DEFAULT_TAIL_BYTES = 256 * 1024
+READ_SIZE = 64 * 1024
+
+Limits = namedtuple("Limits", ["timeout", "cpu_seconds", "memory_mb"])
+ExecStats = namedtuple("ExecStats", ["command", "returncode", "wall_time", "user_time", "sys_time", "max_rss_kb",
+                                     "read_blocks", "write_blocks", "limit"])
+ExecResult = namedtuple("ExecResult", ["returncode", "stdout", "stderr", "stats"])
+
+
+def _env_number(name):
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+
+def default_limits():
+    """Limits from CODEBUILDER_TIMEOUT / CODEBUILDER_CPU_SECONDS (seconds) and CODEBUILDER_MEMORY_MB."""
+    return Limits(_env_number("CODEBUILDER_TIMEOUT"), _env_number("CODEBUILDER_CPU_SECONDS"),
+                  _env_number("CODEBUILDER_MEMORY_MB"))
+
+
+def tail_bytes():
+    kb = os.environ.get("CODEBUILDER_OUTPUT_TAIL_KB")
+    return int(kb) * 1024 if kb else DEFAULT_TAIL_BYTES
+
+
+def rlimits_for(limits):
+    """[(resource name, soft, hard)] for the CPU and memory limits; the memory limit caps the address space."""
+    rlimits = []
+    if limits.cpu_seconds:
+        seconds = max(1, int(limits.cpu_seconds + 0.999))
+        rlimits.append(("RLIMIT_CPU", seconds, seconds + 1))  # SIGXCPU first, SIGKILL a second later
+    if limits.memory_mb:
+        size = int(limits.memory_mb * 1024 * 1024)
+        rlimits.append(("RLIMIT_AS", size, size))
+    return rlimits
+
+
+def apply_rlimits(rlimits):
+    """Sets the limits on the calling process; execute() calls it in the child before exec."""
+    for name, soft, hard in rlimits:
+        resource.setrlimit(getattr(resource, name), (soft, hard))
+
+
+def usage_from_rusage(rusage):
+    max_rss_kb = rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss  # bytes on macOS
+    return {"user_time": rusage.ru_utime, "sys_time": rusage.ru_stime, "max_rss_kb": max_rss_kb,
+            "read_blocks": rusage.ru_inblock, "write_blocks": rusage.ru_oublock}
+
+
+def limit_hit(returncode, usage, limits, timed_out):
+    """Name of the limit that ended the process ("timeout", "cpu"), or None."""
+    if timed_out:
+        return "timeout"
+    if limits.cpu_seconds and hasattr(signal, "SIGXCPU"):
+        # SIGXCPU only comes from RLIMIT_CPU; SIGKILL at the hard limit, a second later
+        if returncode == -signal.SIGXCPU:
+            return "cpu"
+        if returncode == -signal.SIGKILL and usage and usage["user_time"] + usage["sys_time"] >= limits.cpu_seconds:
+            return "cpu"
+    return None
+
+
+LIMIT_NOTES = {
+    "timeout": "[limit] Killed after exceeding the wall-clock limit of {timeout:g}s",
+    "cpu": "[limit] Killed after exceeding the CPU time limit of {cpu_seconds:g}s",
+}
+
+
+class OutputTail:
+    """Keeps the last max_bytes of a stream."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total = 0
+        self._chunks = deque()
+        self._size = 0
+
+    def add(self, data):
+        self.total += len(data)
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._chunks and self._size - len(self._chunks[0]) >= self.max_bytes:  # max_bytes 0 keeps nothing
+            self._size -= len(self._chunks.popleft())
+
+    @property
+    def truncated(self):
+        return self.total > self.max_bytes
+
+    def text(self):
+        data = b"".join(self._chunks)[-self.max_bytes:] if self.max_bytes else b""
+        # Same decoding as subprocess.run(..., text=True); a cut tail may start inside a character
+        text = data.decode(locale.getpreferredencoding(False), errors="replace")
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        if self.truncated:
+            text = f"[... {self.total - len(data)} bytes of output omitted ...]\n" + text
+        return text
+
+
+class Recorder:
+    """Collects the ExecStats of the commands of one compile/run, and their full output in a spool file."""
+
+    def __init__(self, spool_bytes=None):
+        self.stats = []
+        self.truncated = False
+        self._spool = tempfile.SpooledTemporaryFile(max_size=spool_bytes or tail_bytes())
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        with self._lock:
+            self._spool.write(data)
+
+    def add(self, stats, truncated=False):
+        with self._lock:
+            self.stats.append(stats)
+            self.truncated = self.truncated or truncated
+
+    def iter_output(self):
+        """Yields the full output of all recorded commands (bytes, locale-encoded) in chunks."""
+        with self._lock:
+            self._spool.seek(0)
+            try:
+                for chunk in iter(lambda: self._spool.read(READ_SIZE), b""):
+                    yield chunk
+            finally:
+                self._spool.seek(0, os.SEEK_END)
+
+    def summary(self):
+        """Totals over all recorded commands (max for RSS); values are None where the platform has no rusage."""
+        def total(field, combine=sum):
+            values = [getattr(s, field) for s in self.stats if getattr(s, field) is not None]
+            return combine(values) if values else None
+        return {
+            "processes": len(self.stats),
+            "wall_time": total("wall_time"),
+            "user_time": total("user_time"),
+            "sys_time": total("sys_time"),
+            "max_rss_kb": total("max_rss_kb", max),
+            "read_blocks": total("read_blocks"),
+            "write_blocks": total("write_blocks"),
+            "limits": [s.limit for s in self.stats if s.limit],
+        }
+
+    def close(self):
+        self._spool.close()
+
+
+_local = threading.local()
+
+
+@contextmanager
+def recording(recorder=None):
+    """Records every execute() in this thread (including nested handler calls) into a Recorder."""
+    recorder = recorder or Recorder()
+    previous = getattr(_local, "recorder", None)
+    _local.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _local.recorder = previous
+
+
+def current_recorder():
+    return getattr(_local, "recorder", None)
+
+
+def record(stats, truncated=False):
+    recorder = current_recorder()
+    if recorder:
+        recorder.add(stats, truncated)
+
+
+def _pump(fd, tail, recorder):
+    try:
+        while True:
+            data = os.read(fd, READ_SIZE)
+            if not data:
+                break
+            tail.add(data)
+            if recorder:
+                recorder.write(data)
+    finally:
+        os.close(fd)
+
+
+def collect_output(out_fd, err_fd, max_bytes=None):
+    """
+    Reads two pipes in background threads, streaming to the current Recorder. Returns a function
+    that waits for both to reach EOF and returns (stdout, stderr, truncated).
+    """
+    max_bytes = tail_bytes() if max_bytes is None else max_bytes
+    recorder = current_recorder()
+    tails = (OutputTail(max_bytes), OutputTail(max_bytes))
+    readers = [threading.Thread(target=_pump, args=(fd, tail, recorder), daemon=True)
+               for fd, tail in zip((out_fd, err_fd), tails)]
+    for reader in readers:
+        reader.start()
+
+    def finish():
+        for reader in readers:
+            reader.join()
+        return tails[0].text(), tails[1].text(), tails[0].truncated or tails[1].truncated
+    return finish
+
+
+def _kill_group(proc):
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
+
+
+def exit_code(status):
+    """Popen-style returncode for a wait() status (os.waitstatus_to_exitcode needs Python 3.9)."""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _wait(proc):
+    """Waits for proc; returns (returncode, usage dict or None)."""
+    if hasattr(os, "wait4"):
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = exit_code(status)  # Reaped here; Popen must not wait again
+        return proc.returncode, usage_from_rusage(rusage)
+    return proc.wait(), None
+
+
+def execute(command, cwd=None, env=None, limits=None, max_bytes=None):
+    """
+    Runs command with its stdout/stderr captured like subprocess.run(..., capture_output=True,
+    text=True), but keeping only the last max_bytes of each stream. Returns an ExecResult; a
+    command killed by a limit gets a note appended to its stderr.
+    """
+    limits = limits or default_limits()
+    rlimits = rlimits_for(limits) if resource else []
+    announce(command)
+
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    kwargs = {}
+    if os.name == "posix":
+        kwargs["start_new_session"] = True
+        if rlimits:
+            kwargs["preexec_fn"] = lambda: apply_rlimits(rlimits)  # Limited from its first instruction
+    started = time.perf_counter()
+    try:
+        proc = subprocess.Popen(command, cwd=cwd, env=env, stdin=None, stdout=out_w, stderr=err_w, **kwargs)
+    except BaseException:
+        os.close(out_r)
+        os.close(err_r)
+        raise
+    finally:
+        os.close(out_w)  # The child has its copies
+        os.close(err_w)
+    finish = collect_output(out_r, err_r, max_bytes)
+
+    timed_out = threading.Event()
+
+    def on_timeout():
+        timed_out.set()
+        _kill_group(proc)
+    timer = threading.Timer(limits.timeout, on_timeout) if limits.timeout else None
+    if timer:
+        timer.daemon = True
+        timer.start()
+    try:
+        returncode, usage = _wait(proc)
+    except BaseException:
+        _kill_group(proc)  # e.g. Ctrl-C: the child is in its own session and did not get the signal
+        raise
+    finally:
+        if timer:
+            timer.cancel()
+    if timed_out.is_set():
+        _kill_group(proc)  # Descendants that still hold the pipes open
+    stdout, stderr, truncated = finish()
+    return finish_result(command, returncode, stdout, stderr, truncated, usage, started, limits, timed_out.is_set())
+
+
+def announce(command):
+    """Writes the command line to the current Recorder's output, ahead of the command's output."""
+    recorder = current_recorder()
+    if recorder:
+        recorder.write(f"$ {subprocess.list2cmdline(command)}\n".encode("utf-8"))
+
+
+def finish_result(command, returncode, stdout, stderr, truncated, usage, started, limits, timed_out):
+    """Builds and records the ExecResult of a finished command (also used for fork-server runs)."""
+    limit = limit_hit(returncode, usage, limits, timed_out)
+    if limit:
+        stderr += ("\n" if stderr and not stderr.endswith("\n") else "") + LIMIT_NOTES[limit].format(**limits._asdict())
+    usage = usage or {}
+    stats = ExecStats(list(command), returncode, time.perf_counter() - started, usage.get("user_time"),
+                      usage.get("sys_time"), usage.get("max_rss_kb"), usage.get("read_blocks"),
+                      usage.get("write_blocks"), limit)
+    record(stats, truncated)
+    return ExecResult(returncode, stdout, stderr, stats)
+
+
+def run_command(command, cwd=None, env=None):
+    """execute() in the (success, output) form the language handlers return."""
+    result = execute(command, cwd=cwd, env=env)
+    return result.returncode == 0, result.stdout + result.stderr
+
+
+def format_stats(stats):
+    """One line of accounting for an ExecStats or a Recorder.summary()."""
+    if isinstance(stats, ExecStats):
+        stats = stats._asdict()
+    parts = [f"wall {stats['wall_time']:.3f}s"]
+    if stats.get("user_time") is not None:
+        parts.append(f"user {stats['user_time']:.3f}s, sys {stats['sys_time']:.3f}s")
+        parts.append(f"max RSS {stats['max_rss_kb'] / 1024:.1f} MB")
+        parts.append(f"blocks in/out {stats['read_blocks']}/{stats['write_blocks']}")
+    limits = stats.get("limits") or ([stats["limit"]] if stats.get("limit") else [])
+    if limits:
+        parts.append("limit hit: " + ", ".join(limits))
+    return ", ".join(parts)
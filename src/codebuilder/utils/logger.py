@@ -1,18 +1,22 @@
 import os
-from datetime import datetime
+from .run_history import get_history
 
-def log(file_path, language, action, success, output):
-    log_dir = "build_logs"
-    os.makedirs(log_dir, exist_ok=True)
+def _full_output(output, recorder):
+    # The handler's output already is the complete output unless a stream tail was cut
+    yield output.encode("utf-8", errors="replace")
+    if recorder and recorder.truncated:
+        yield b"\n=== Full output ===\n"
+        yield from recorder.iter_output()
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    name = os.path.splitext(os.path.basename(file_path))[0]
-    log_file = f"{name}_{action}_{timestamp}.log"
-    log_path = os.path.join(log_dir, log_file)
-
-    status = "✔" if success else "✘"
-
-    with open(log_path, "w", encoding="utf-8") as f:
-        f.write(f"[{status}] {language.upper()} {action}\n\n{output}\n")
-
-    return log_path
+def log(file_path, language, action, success, output, recorder=None, duration=None, keep_output=None):
+    """
+    Records a compile/run in the run history database and returns its id. The full output is only
+    stored (compressed) with keep_output, which defaults to CODEBUILDER_KEEP_OUTPUT=1.
+    """
+    if keep_output is None:
+        keep_output = os.environ.get("CODEBUILDER_KEEP_OUTPUT") == "1"
+    usage = recorder.summary() if recorder else None
+    if duration is None and usage:
+        duration = usage["wall_time"]
+    return get_history().record(file_path, language, action, success, output, duration, usage,
+                                _full_output(output, recorder), keep_output)
@@ -0,0 +1,28 @@
+# codebuilder/utils/pathfilter.py
+import fnmatch
+import os
+
+# Extra exclusions for project walks (build-all/run-all discovery and project-mode sources), on top
+# of the directories CodeBuilder always skips. Patterns are gitignore-like globs: "name" or "*.ext"
+# match at any depth, "a/b" is anchored to the walked root, and a trailing "/" matches directories
+# only. They come from CODEBUILDER_EXCLUDE (comma-separated), which `--exclude` sets.
+
+
+def exclude_patterns():
+    return [p.strip() for p in os.environ.get("CODEBUILDER_EXCLUDE", "").split(",") if p.strip()]
+
+
+def is_excluded(rel_path, patterns, is_dir=False):
+    """Whether a root-relative path ("/"-separated) matches one of patterns."""
+    name = rel_path.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        pattern = pattern.replace("\\", "/")
+        if pattern.startswith("#") or (pattern.endswith("/") and not is_dir):
+            continue
+        pattern = pattern.rstrip("/")
+        if "/" in pattern:
+            if fnmatch.fnmatchcase(rel_path, pattern.lstrip("/")):
+                return True
+        elif fnmatch.fnmatchcase(name, pattern):
+            return True
+    return False
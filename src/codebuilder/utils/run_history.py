@@ -0,0 +1,198 @@
+# codebuilder/utils/run_history.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+# One row per compile/run in an SQLite database (build_logs/history.db by default), indexed
+# by time, by file and by outcome so that history queries don't scan. Each row keeps the
+# status, durations, resource usage, a digest of the full output and a bounded tail of it; the
+# full output is stored as a zlib-compressed blob only when asked for (keep_output).
+
+SCHEMA_VERSION = 1
+DEFAULT_DB_PATH = os.path.join("build_logs", "history.db")
+TAIL_CHARS = 4000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    file TEXT NOT NULL,
+    language TEXT NOT NULL,
+    action TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    duration REAL,
+    processes INTEGER,
+    user_time REAL,
+    sys_time REAL,
+    max_rss_kb INTEGER,
+    read_blocks INTEGER,
+    write_blocks INTEGER,
+    limits TEXT,
+    output_sha256 TEXT NOT NULL,
+    output_bytes INTEGER NOT NULL,
+    output_tail TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (started_at);
+CREATE INDEX IF NOT EXISTS runs_by_file ON runs (file, started_at);
+CREATE INDEX IF NOT EXISTS runs_by_outcome ON runs (success, started_at);
+CREATE TABLE IF NOT EXISTS outputs (
+    run_id INTEGER PRIMARY KEY REFERENCES runs (id) ON DELETE CASCADE,
+    data BLOB NOT NULL
+);
+"""
+
+COLUMNS = ["id", "started_at", "file", "language", "action", "success", "duration", "processes", "user_time",
+           "sys_time", "max_rss_kb", "read_blocks", "write_blocks", "limits", "output_sha256", "output_bytes",
+           "output_tail"]
+
+
+def default_db_path():
+    return os.environ.get("CODEBUILDER_HISTORY_DB") or DEFAULT_DB_PATH
+
+
+def _row_dict(row):
+    run = dict(zip(COLUMNS, row))
+    run["success"] = bool(run["success"])
+    run["limits"] = json.loads(run["limits"]) if run["limits"] else []
+    return run
+
+
+class RunHistory:
+    def __init__(self, path=None):
+        self.path = path or default_db_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Shared by watcher/worker threads; the lock serialises access to the connection
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                with self._conn:
+                    self._conn.executescript(SCHEMA)
+                    self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [_row_dict(row) for row in self._conn.execute(sql, params)]
+
+    # --- Writing ---
+
+    def record(self, file_path, language, action, success, output, duration=None, usage=None, full_output=None,
+               keep_output=False, started_at=None):
+        """
+        Appends a run. usage is an execution.Recorder summary. full_output (default: output; str or an
+        iterable of bytes chunks, read once) is what the digest covers and what is stored, compressed,
+        when keep_output is set. Returns the run id.
+        """
+        usage = usage or {}
+        full_output = output if full_output is None else full_output
+        chunks = [full_output.encode("utf-8", errors="replace")] if isinstance(full_output, str) else full_output
+        digest, size = hashlib.sha256(), 0
+        compressor = zlib.compressobj(6) if keep_output else None
+        blob = []
+        for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+            if compressor:
+                blob.append(compressor.compress(chunk))
+        if compressor:
+            blob.append(compressor.flush())
+        values = (
+            started_at or time.time(), os.path.abspath(file_path), language, action, int(bool(success)), duration,
+            usage.get("processes"), usage.get("user_time"), usage.get("sys_time"), usage.get("max_rss_kb"),
+            usage.get("read_blocks"), usage.get("write_blocks"), json.dumps(usage.get("limits") or []),
+            digest.hexdigest(), size, output[-TAIL_CHARS:],
+        )
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"INSERT INTO runs ({', '.join(COLUMNS[1:])}) VALUES ({', '.join('?' * len(values))})", values)
+            run_id = cursor.lastrowid
+            if keep_output:
+                self._conn.execute("INSERT INTO outputs (run_id, data) VALUES (?, ?)", (run_id, b"".join(blob)))
+        return run_id
+
+    def prune(self, older_than):
+        """Deletes runs (and their stored output) started before the unix time older_than. Returns the count."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM runs WHERE started_at < ?", (older_than,)).rowcount
+
+    # --- Queries ---
+
+    def get(self, run_id):
+        runs = self._query(f"SELECT {', '.join(COLUMNS)} FROM runs WHERE id = ?", (run_id,))
+        return runs[0] if runs else None
+
+    def output(self, run_id):
+        """The full stored output of a run, or None if it was not kept."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM outputs WHERE run_id = ?", (run_id,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8", errors="replace") if row else None
+
+    def latest(self, file_path, action=None):
+        sql = f"SELECT {', '.join(COLUMNS)} FROM runs WHERE file = ?"
+        params = [os.path.abspath(file_path)]
+        if action:
+            sql += " AND action = ?"
+            params.append(action)
+        runs = self._query(sql + " ORDER BY started_at DESC LIMIT 1", params)
+        return runs[0] if runs else None
+
+    def failures(self, limit=20, since=None):
+        """Most recent failed runs first."""
+        return self._query(f"SELECT {', '.join(COLUMNS)} FROM runs WHERE success = 0 AND started_at >= ? "
+                           "ORDER BY started_at DESC LIMIT ?", (since or 0, limit))
+
+    def slowest(self, limit=20, since=None, action=None):
+        """Longest runs started at or after since."""
+        sql = f"SELECT {', '.join(COLUMNS)} FROM runs WHERE started_at >= ?"
+        params = [since or 0]
+        if action:
+            sql += " AND action = ?"
+            params.append(action)
+        return self._query(sql + " ORDER BY duration DESC LIMIT ?", params + [limit])
+
+    def trend(self, file_path, action=None, limit=50):
+        """The file's last runs, oldest first, for following its durations and resource usage over time."""
+        sql = f"SELECT {', '.join(COLUMNS)} FROM runs WHERE file = ?"
+        params = [os.path.abspath(file_path)]
+        if action:
+            sql += " AND action = ?"
+            params.append(action)
+        runs = self._query(sql + " ORDER BY started_at DESC LIMIT ?", params + [limit])
+        return runs[::-1]
+
+
+_histories = {}
+_histories_lock = threading.Lock()
+
+
+def get_history(path=None):
+    """Process-wide RunHistory per database path."""
+    path = os.path.abspath(path or default_db_path())
+    with _histories_lock:
+        if path not in _histories:
+            _histories[path] = RunHistory(path)
+        return _histories[path]
+
+
+def find_history(file_path):
+    """The history database of the project containing file_path (nearest build_logs/history.db above it), or None."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    while True:
+        candidate = os.path.join(directory, DEFAULT_DB_PATH)
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
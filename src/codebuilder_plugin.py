@@ -2,9 +2,28 @@
 
 from filetracker.base_plugin import BasePlugin
 import os
+from codebuilder.utils.detector import detect_language
+from codebuilder.utils.run_history import find_history, get_history
 
 class CodeBuilderPlugin(BasePlugin):
     def process_file(self, file_path):
+        # Source files: the latest recorded compile/run, an indexed lookup in the project's run history
+        language = detect_language(file_path)
+        db_path = find_history(file_path) if language else None
+        if db_path:
+            run = get_history(db_path).latest(file_path)
+            if run:
+                return {
+                    "codebuilder": {
+                        "file_type": language.upper(),
+                        "success": run["success"],
+                        "action": run["action"],
+                        "duration": run["duration"],
+                        "max_rss_kb": run["max_rss_kb"],
+                        "output": run["output_tail"]
+                    }
+                }
+        # Logs written before the run history existed
         if file_path.endswith(".log") and "build_logs" in file_path:
             with open(file_path, "r", encoding="utf-8") as f:
                 content = f.read()
@@ -16,4 +35,4 @@ class CodeBuilderPlugin(BasePlugin):
                     "output": content
                 }
             }
-        return None
\ No newline at end of file
+        return None
@@ -8,7 +8,13 @@ def load_config(config_path="config.json"):
         "venv_path": None,
         "blacklist": [".venv", "__pycache__", "*.pyc", "build_logs", "snapshots"],
         "languages": ["python", "c", "cpp"],
-        "snapshot_interval": 300  # 5 minutes
+        "snapshot_interval": 300,  # 5 minutes, minimum spacing between watcher snapshots
+        "debounce_seconds": 2.0,  # Quiet period that ends a burst of file events
+        # Snapshots kept by `snapshot gc`: the newest N, plus the newest one per hour/day inside those windows
+        "retention": {"keep_last": 20, "keep_hourly": 24, "keep_daily": 14},
+        "venv_template_dir": None,  # Cached VENV templates for init-venv (default: user cache directory)
+        "venv_template_links": True,  # Hardlink template files into new VENVs instead of copying them
+        "venv_templates_max": 8
     }
     if os.path.exists(config_path):
         with open(config_path, "r", encoding="utf-8") as f:
@@ -16,6 +22,20 @@ def load_config(config_path="config.json"):
             default_config.update(config)
     return default_config
 
+_config_cache = {}
+
+def load_config_cached(config_path="config.json"):
+    # Reloads only when the file's mtime changes; callers must treat the result as read-only.
+    try:
+        mtime = os.stat(config_path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    cached = _config_cache.get(config_path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, load_config(config_path))
+        _config_cache[config_path] = cached
+    return cached[1]
+
 def save_config(config, config_path="config.json"):
     with open(config_path, "w", encoding="utf-8") as f:
         json.dump(config, f, indent=4)
\ No newline at end of file
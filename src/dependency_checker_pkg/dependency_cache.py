@@ -0,0 +1,116 @@
+import glob
+import hashlib
+import json
+import os
+import site
+import sys
+
+try:
+    from .dependency_imports import ImportCache
+except ImportError:
+    from dependency_imports import ImportCache
+
+# --- Persistent Scan Cache ---
+# Stores per-file import sets, parsed requirements.txt files and module resolution results
+# between runs. A re-run after editing one file parses only that file, and only modules not
+# resolved before are looked up. Resolutions are tied to the interpreter path plus the
+# mtimes of its site-packages directories, which change whenever packages are (un)installed.
+
+CACHE_VERSION = 1
+
+
+def default_cache_path(folder_path, suffix=".json"):
+    """Per-project cache file in the user cache directory, so scanned projects stay untouched."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    key = hashlib.sha1(os.path.abspath(folder_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(base, "depcheck", f"{key}{suffix}")
+
+
+def _site_packages_dirs(python_executable=None):
+    if not python_executable or os.path.realpath(python_executable) == os.path.realpath(sys.executable):
+        dirs = list(site.getsitepackages()) if hasattr(site, "getsitepackages") else []
+        if site.ENABLE_USER_SITE and site.getusersitepackages():
+            dirs.append(site.getusersitepackages())
+        return dirs
+    # Foreign interpreter, assumed to be a venv: <venv>/bin/python or <venv>\Scripts\python.exe
+    venv_root = os.path.dirname(os.path.dirname(os.path.abspath(python_executable)))
+    return glob.glob(os.path.join(venv_root, "lib", "python*", "site-packages")) + \
+        glob.glob(os.path.join(venv_root, "Lib", "site-packages"))
+
+
+def environment_fingerprint(python_executable=None):
+    """(interpreter, [(site-packages dir, mtime_ns), ...]); None if no site-packages could be found."""
+    dirs = []
+    for path in _site_packages_dirs(python_executable):
+        try:
+            dirs.append([path, os.stat(path).st_mtime_ns])
+        except OSError:
+            continue
+    if not dirs:
+        return None
+    return [os.path.abspath(python_executable or sys.executable), sorted(dirs)]
+
+
+class ScanCache:
+    def __init__(self, path=None, data=None):
+        self.path = path
+        data = data or {}
+        self.imports = ImportCache(data.get("imports"))
+        self.requirements = data.get("requirements", {})  # path -> [mtime_ns, size, [packages]]
+        self.environments = data.get("environments", {})  # interpreter -> {"fingerprint", "resolved"}
+
+    @classmethod
+    def load(cls, path):
+        """Loads a cache file; a missing, unreadable or outdated file yields an empty cache."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                data = None
+        except (OSError, ValueError):
+            data = None
+        return cls(path, data)
+
+    def requirements_for(self, req_file_path, parse):
+        """Returns parse(req_file_path), reusing the cached result while the file is unchanged."""
+        st = os.stat(req_file_path)
+        entry = self.requirements.get(req_file_path)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        packages = parse(req_file_path)
+        self.requirements[req_file_path] = [st.st_mtime_ns, st.st_size, packages]
+        return packages
+
+    def resolution(self, python_executable=None):
+        """
+        Returns the mutable {name: installed} map for an environment. It starts empty whenever the
+        environment's fingerprint has changed, and is not persisted if there is no fingerprint.
+        """
+        fingerprint = environment_fingerprint(python_executable)
+        key = os.path.abspath(python_executable or sys.executable)
+        env = self.environments.get(key)
+        if fingerprint is None:
+            self.environments.pop(key, None)
+            return {}
+        if env is None or env["fingerprint"] != fingerprint:
+            env = self.environments[key] = {"fingerprint": fingerprint, "resolved": {}}
+        return env["resolved"]
+
+    def save(self):
+        """Writes the cache atomically, dropping entries for files that no longer exist."""
+        if not self.path:
+            return
+        data = {
+            "version": CACHE_VERSION,
+            "imports": {p: e for p, e in self.imports.entries.items() if os.path.exists(p)},
+            "requirements": {p: e for p, e in self.requirements.items() if os.path.exists(p)},
+            "environments": self.environments,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
@@ -1,13 +1,26 @@
 import argparse
+import json
 import os
 import sys
 import time # For simulating progress in CLI if needed, or just for timing
 from typing import List, Dict, Tuple
 
 # Import the core logic functions from our dependency_core module
-from dependency_core import scan_dependencies_logic, install_dependencies_logic, PACKAGE_NAME_MAP
+try:
+    from .dependency_core import (scan_dependencies, install_dependencies_logic, format_scan_event,
+                                  scan_event_to_dict, PACKAGE_NAME_MAP)
+except ImportError:
+    from dependency_core import (scan_dependencies, install_dependencies_logic, format_scan_event,
+                                 scan_event_to_dict, PACKAGE_NAME_MAP)
 
-def main():
+try:
+    from .dependency_cache import ScanCache, default_cache_path
+    from .dependency_graph import ImportGraph
+except ImportError:
+    from dependency_cache import ScanCache, default_cache_path
+    from dependency_graph import ImportGraph
+
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Python Dependency Checker: Scans a project folder for missing dependencies "
                     "and offers to install them.",
@@ -31,6 +44,37 @@ def main():
         action="store_true",
         help="Enable verbose output for installation process."
     )
+    parser.add_argument(
+        "--python",
+        type=str,
+        help="Python interpreter of the environment to check and install into (e.g. a project venv).\n"
+             "  Defaults to the interpreter running this tool."
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print scan results as JSON lines (one event per line) on stdout.\n"
+             "  Human-readable messages go to stderr."
+    )
+    parser.add_argument(
+        "--cache-file",
+        type=str,
+        help="Where to keep the scan cache (parsed imports, requirements and resolved modules) between runs.\n"
+             "  Defaults to a per-project file in the user cache directory."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Scan everything from scratch, without reading or writing the scan cache."
+    )
+    parser.add_argument(
+        "--exclude",
+        metavar="PATTERN",
+        action="append",
+        default=[],
+        help="Leave files and directories matching PATTERN out of the import graph (e.g. build/, *_pb2.py,\n"
+             "  docs/conf.py). May be given more than once."
+    )
 
     # --- Subcommands ---
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
@@ -51,39 +95,117 @@ def main():
         description="Installs missing dependencies detected during a scan. "
                     "Requires a prior scan to identify missing packages."
     )
-    # No specific arguments for install command beyond global ones
+    install_parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Install all missing packages with a single pip run, so they are resolved together."
+    )
+    install_parser.add_argument(
+        "--wheelhouse",
+        type=str,
+        help="Local directory of wheels to install from (passed to pip as --find-links).\n"
+             "  With --jobs, downloaded/built wheels are kept here for later offline installs."
+    )
+    install_parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Do not contact PyPI: install only from --wheelhouse (air-gapped hosts)."
+    )
+    install_parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=0,
+        help="Download/build wheels with this many parallel pip processes before installing."
+    )
+
+    # Graph command
+    graph_parser = subparsers.add_parser(
+        "graph",
+        help="Query the project's import graph (updated incrementally on each run).",
+        description="Maintains a persisted import graph of the project and answers queries from it. "
+                    "Only files changed since the last run are re-parsed."
+    )
+    graph_parser.add_argument(
+        "--dependents",
+        metavar="TARGET",
+        action="append",
+        help="List files that depend on TARGET: a project file, a module name, or a third-party\n"
+             "  import/distribution name. May be given more than once."
+    )
+    graph_parser.add_argument(
+        "--direct",
+        action="store_true",
+        help="With --dependents, only list files importing TARGET directly."
+    )
+    graph_parser.add_argument(
+        "--graph-file",
+        type=str,
+        help="Where to keep the import graph between runs.\n"
+             "  Defaults to a per-project file in the user cache directory."
+    )
+    graph_parser.add_argument(
+        "--unused",
+        action="store_true",
+        help="List packages from requirements.txt files that no project file imports."
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Validate path
     if not os.path.isdir(args.path):
         print(f"Error: Provided path '{args.path}' is not a valid directory.", file=sys.stderr)
         sys.exit(1)
+    if args.command == "install" and args.no_index and not args.wheelhouse:
+        print("Error: --no-index requires --wheelhouse.", file=sys.stderr)
+        sys.exit(1)
+
+    # Human-readable output moves to stderr in --json mode so stdout stays machine-readable
+    out = sys.stderr if args.json else sys.stdout
+
+    if args.command == "graph":
+        sys.exit(run_graph(args))
+
+    def render(event):
+        if args.json:
+            print(json.dumps(scan_event_to_dict(event)), flush=True)
+        else:
+            for msg in format_scan_event(event):
+                print(msg, flush=True)
+
+    cache = None
+    if not args.no_cache:
+        cache = ScanCache.load(args.cache_file or default_cache_path(args.path))
 
     # --- Execute Scan Logic ---
-    print(f"Starting scan for dependencies in '{args.path}'...")
-    missing_deps, scan_output_messages = scan_dependencies_logic(
+    print(f"Starting scan for dependencies in '{args.path}'...", file=out)
+    summary = scan_dependencies(
         args.path,
         recursive=args.recursive,
+        python_executable=args.python,
+        on_event=render, # Events are printed as they happen instead of after the whole scan
+        cache=cache
         # We'll use the default STANDARD_LIBRARY_MODULES and PACKAGE_NAME_MAP from dependency_core
     )
-
-    for msg in scan_output_messages:
-        print(msg)
+    if cache is not None:
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"Warning: Could not write scan cache {cache.path}: {e}", file=sys.stderr)
+    missing_deps = {name: ", ".join(sources) for name, sources in summary.missing.items()}
 
     if not missing_deps:
-        print("\nNo missing dependencies found. Nothing to install.")
+        print("\nNo missing dependencies found. Nothing to install.", file=out)
         sys.exit(0) # Exit successfully if nothing is missing
 
     # --- Handle Commands ---
     if args.command == "scan":
         # If only scan was requested, we're done after printing summary
-        print("\nScan complete. Use 'install' command to install missing dependencies.")
+        print("\nScan complete. Use 'install' command to install missing dependencies.", file=out)
         # Exit with a non-zero code if missing dependencies were found, for scripting purposes
         sys.exit(1)
     elif args.command == "install":
-        print("\nMissing dependencies detected. Proceeding with installation...")
-        print("Note: This may take some time. Output will be displayed below.")
+        print("\nMissing dependencies detected. Proceeding with installation...", file=out)
+        print("Note: This may take some time. Output will be displayed below.", file=out)
 
         # In a CLI, we can't show a graphical progress bar directly.
         # We'll rely on the verbose output from install_dependencies_logic
@@ -91,23 +213,62 @@ def main():
 
         successful, failed, install_output_messages = install_dependencies_logic(
             missing_deps,
-            verbose=args.verbose # Pass verbose flag to core logic
+            verbose=args.verbose, # Pass verbose flag to core logic
+            python_executable=args.python,
+            batch=args.batch,
+            wheelhouse=args.wheelhouse,
+            no_index=args.no_index,
+            jobs=args.jobs
         )
 
         for msg in install_output_messages:
-            print(msg)
+            print(msg, file=out)
 
         if failed:
-            print(f"\nInstallation finished with {len(failed)} failures.")
+            print(f"\nInstallation finished with {len(failed)} failures.", file=out)
             sys.exit(1) # Indicate failure
         else:
-            print("\nAll missing dependencies installed successfully! ✨")
+            print("\nAll missing dependencies installed successfully! ✨", file=out)
             sys.exit(0) # Indicate success
     else:
         # If no command was specified, or an invalid one
-        print("\nNo command specified. Please use 'scan' or 'install'.")
+        print("\nNo command specified. Please use 'scan' or 'install'.", file=out)
         parser.print_help()
         sys.exit(1)
 
+def run_graph(args):
+    """Updates the persisted import graph, then prints the requested queries. Returns the exit code."""
+    graph = ImportGraph.load(args.path, args.graph_file, args.python, exclude=args.exclude)
+    changed, removed = graph.update()
+    if not args.no_cache:
+        try:
+            graph.save()
+        except OSError as e:
+            print(f"Warning: Could not write import graph {graph.path}: {e}", file=sys.stderr)
+
+    result = {"files": len(graph.files), "changed": changed, "removed": removed}
+    for target in args.dependents or ():
+        result.setdefault("dependents", {})[target] = graph.dependents(target, transitive=not args.direct)
+    if args.unused:
+        result["unused"] = graph.unused_packages()
+    if not args.dependents and not args.unused:
+        result["third_party"] = graph.third_party()
+
+    if args.json:
+        print(json.dumps(result))
+        return 0
+    print(f"Import graph: {len(graph.files)} file(s), {len(changed)} changed, {len(removed)} removed since last run.")
+    for target, files in result.get("dependents", {}).items():
+        print(f"\nFiles depending on '{target}' ({len(files)}):")
+        for file in files:
+            print(f"  {file}")
+    if "unused" in result:
+        print(f"\nUnused packages from requirements.txt ({len(result['unused'])}):")
+        for package in result["unused"]:
+            print(f"  {package}")
+    for name, files in result.get("third_party", {}).items():
+        print(f"  {name}: imported by {len(files)} file(s)")
+    return 0
+
 if __name__ == "__main__":
     main()
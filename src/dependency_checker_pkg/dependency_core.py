@@ -3,6 +3,18 @@ import subprocess
 import re
 import sys
 import builtins
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+
+try:
+    from .dependency_env import get_installed_index, invalidate_installed_index
+    from .dependency_imports import extract_import_details, iter_imports_parallel
+except ImportError:
+    from dependency_env import get_installed_index, invalidate_installed_index
+    from dependency_imports import extract_import_details, iter_imports_parallel
 
 # --- Configuration Data ---
 # A comprehensive list of standard library modules to skip.
@@ -42,14 +54,14 @@ PACKAGE_NAME_MAP = {
 
 # --- Core Functions ---
 
-def _run_pip_command(command_args):
+def _run_pip_command(command_args, python_executable=None):
     """
     Helper to run a pip command and capture its output.
     Returns (returncode, stdout, stderr).
     """
     try:
         process = subprocess.run(
-            [sys.executable, '-m', 'pip'] + command_args,
+            [python_executable or sys.executable, '-m', 'pip'] + command_args,
             capture_output=True,
             text=True,
             check=False, # Do not raise an exception for non-zero exit codes
@@ -62,172 +74,444 @@ def _run_pip_command(command_args):
         return 1, "", f"An unexpected error occurred while running pip: {e}"
 
 
-def check_package_installed(package_name, package_name_map=None):
+def check_package_installed(package_name, package_name_map=None, python_executable=None):
     """
     Checks if a package is installed. Uses common mappings for import names
     that differ from PyPI names.
+    Lookups are answered from an in-memory index of the target environment's
+    installed distributions (see dependency_env), built once per interpreter.
     """
     if package_name_map is None:
         package_name_map = PACKAGE_NAME_MAP
 
-    # First, try the exact package name
-    returncode, stdout, stderr = _run_pip_command(['show', package_name])
-    if returncode == 0 and "Name:" in stdout:
+    index = get_installed_index(python_executable)
+
+    # First, try the exact name (distribution name or top-level import name)
+    if index.is_installed(package_name):
         return True
 
     # If not found, try common mapped names
     mapped_name = package_name_map.get(package_name)
-    if mapped_name:
-        returncode, stdout, stderr = _run_pip_command(['show', mapped_name])
-        if returncode == 0 and "Name:" in stdout:
-            return True
+    if mapped_name and index.is_installed(mapped_name):
+        return True
 
     return False
 
 def extract_imports_from_file(file_path):
     """
     Extracts top-level module names from import statements in a Python file.
-    This handles 'import foo' and 'from foo import bar'.
-    It does NOT handle dynamic imports, conditional imports, or relative imports.
+    Uses the AST (see dependency_imports), so all import forms are found and
+    strings/docstrings are ignored. Relative imports are skipped; dynamic
+    imports (importlib, __import__) are not detected.
     """
-    imported_modules = set()
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                # Match 'import module_name'
-                match_import = re.match(r'^\s*import\s+([a-zA-Z0-9_.]+)', line)
-                if match_import:
-                    module_name = match_import.group(1).split('.')[0]
-                    imported_modules.add(module_name)
-                    continue
-
-                # Match 'from module_name import something'
-                match_from_import = re.match(r'^\s*from\s+([a-zA-Z0-9_.]+)\s+import', line)
-                if match_from_import:
-                    module_name = match_from_import.group(1).split('.')[0]
-                    # Exclude relative imports (e.g., from . import utils)
-                    if not module_name.startswith('.'):
-                        imported_modules.add(module_name)
-
+        return set(extract_import_details(file_path))
     except Exception as e:
         # In a module, we might log this or pass it up, but for CLI, print is okay
         print(f"  Warning: Could not parse {file_path} for imports: {e}")
-    return imported_modules
+        return set()
 
-def scan_dependencies_logic(folder_path, recursive=True, standard_lib_modules=None, package_name_map=None):
+def _collect_project_files(folder_path, recursive=True):
     """
-    Scans a folder for Python files and requirements.txt to identify dependencies.
-    Returns a tuple: (missing_dependencies_dict, scan_summary_messages)
-    missing_dependencies_dict: {module_name: source_info}
-    scan_summary_messages: list of strings for detailed output.
+    Phase 1: a single walk that finds requirements.txt and .py files and, from the same
+    directory listings, indexes the names that count as local modules in each directory.
+    Returns (requirement_files, python_files, local_names).
+    """
+    requirement_files = []
+    python_files = []
+    local_names = {}  # directory -> names importable as local modules from there
+    for root, dirs, files in os.walk(folder_path):
+        local_names[root] = set(dirs) | set(files) | {f[:-3] for f in files if f.endswith('.py')}
+        for file in files:
+            file_path = os.path.join(root, file)
+            if file == 'requirements.txt':
+                requirement_files.append(file_path)
+            elif file.endswith('.py'):
+                if file == '__init__.py' and os.path.getsize(file_path) < 50:
+                    continue
+                python_files.append(file_path)
+        if not recursive:
+            break
+    return requirement_files, python_files, local_names
+
+
+def parse_requirements_file(req_file_path):
+    """Returns the package names listed in a requirements.txt file (version specifiers stripped)."""
+    packages = []
+    with open(req_file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                package_name = re.split(r'[<>=~]', line)[0].strip()
+                if package_name:
+                    packages.append(package_name)
+    return packages
+
+
+def _format_sources(sources, limit=3):
+    shown = ", ".join(sources[:limit])
+    return shown if len(sources) <= limit else f"{shown} and {len(sources) - limit} more"
+
+
+# --- Scan Events ---
+# iter_scan_events() yields these records as the scan progresses, ending with a ScanSummary.
+# Callers render them progressively (format_scan_event) or consume them as data.
+ScanPhase = namedtuple("ScanPhase", ["phase", "total"])
+FileScanned = namedtuple("FileScanned", ["path", "file_type", "names"])  # file_type: "REQ" or "PY"
+ModuleResolved = namedtuple("ModuleResolved", ["name", "display_name", "status", "sources"])
+ScanError = namedtuple("ScanError", ["path", "message"])
+ScanSummary = namedtuple("ScanSummary", ["folder", "files_scanned", "missing", "optional_missing", "installed"])
+
+# ModuleResolved.status values
+INSTALLED, MISSING, OPTIONAL, STANDARD, LOCAL = "installed", "missing", "optional", "standard", "local"
+
+
+def iter_scan_events(folder_path, recursive=True, standard_lib_modules=None, package_name_map=None,
+                     python_executable=None, cache=None):
+    """
+    Scans a folder for Python files and requirements.txt, yielding structured events.
+
+    The scan runs in phases: collect files (one walk, which also indexes local modules),
+    gather every (module, sources) pair, then resolve each distinct module exactly once.
+    Cost therefore scales with the number of distinct modules, not import statements.
+    The last event is a ScanSummary whose `missing`/`optional_missing` map names to source lists.
+    With a ScanCache (see dependency_cache), unchanged files are not re-parsed and modules already
+    resolved against an unchanged environment are not looked up again; call cache.save() afterwards.
     """
     if standard_lib_modules is None:
         standard_lib_modules = STANDARD_LIBRARY_MODULES
     if package_name_map is None:
         package_name_map = PACKAGE_NAME_MAP
 
-    missing_dependencies = {}
-    scan_summary_messages = []
-    found_dependencies_to_check = False
+    # Phase 1: walk once
+    requirement_files, python_files, local_names = _collect_project_files(folder_path, recursive)
+    yield ScanPhase("collect", len(requirement_files) + len(python_files))
+    yield from _iter_collected_events(
+        folder_path, _iter_requirements(requirement_files, cache),
+        iter_imports_parallel(python_files, cache.imports if cache is not None else None), local_names,
+        standard_lib_modules, package_name_map, python_executable,
+        cache.resolution(python_executable) if cache is not None else {}
+    )
 
-    scan_summary_messages.append(f"Scanning folder: {folder_path}")
 
-    walk_generator = os.walk(folder_path)
-    if not recursive:
+def _iter_requirements(requirement_files, cache=None):
+    """Yields (path, package names, error) for each requirements.txt, like iter_imports_parallel()."""
+    for req_file_path in requirement_files:
         try:
-            root, dirs, files = next(walk_generator)
-            walk_generator = [(root, dirs, files)]
-        except StopIteration:
-            scan_summary_messages.append("\nSelected folder is empty or contains no relevant files.")
-            return missing_dependencies, scan_summary_messages
+            if cache is not None:
+                packages = cache.requirements_for(req_file_path, parse_requirements_file)
+            else:
+                packages = parse_requirements_file(req_file_path)
+        except Exception as e:
+            yield req_file_path, (), e
+            continue
+        yield req_file_path, packages, None
+
+
+def _iter_collected_events(folder_path, requirements, imports, local_names, standard_lib_modules, package_name_map,
+                           python_executable, resolved):
+    """Phases 2 and 3 of iter_scan_events() over already collected files. resolved caches lookups by module."""
+    # Phase 2: gather every dependency together with all the places it comes from
+    dependencies = {}  # name -> {"sources": [...], "optional": bool}
+    files_scanned = 0
+
+    def add_dependency(name, source, is_optional):
+        entry = dependencies.setdefault(name, {"sources": [], "optional": True})
+        entry["sources"].append(source)
+        entry["optional"] = entry["optional"] and is_optional
+
+    for req_file_path, packages, error in requirements:
+        files_scanned += 1
+        rel_path = os.path.relpath(req_file_path, folder_path)
+        if error:
+            yield ScanError(rel_path, f"Error reading {req_file_path}: {error}")
+            continue
+        for package_name in packages:
+            add_dependency(package_name, f'requirements.txt ({rel_path})', False)
+        yield FileScanned(rel_path, "REQ", tuple(packages))
+
+    skipped = {}  # module -> STANDARD or LOCAL
+    project_names = local_names.get(folder_path, set())
+    for py_file_path, file_imports, error in imports:
+        files_scanned += 1
+        rel_path = os.path.relpath(py_file_path, folder_path)
+        if error:
+            yield ScanError(rel_path, f"Could not parse {py_file_path} for imports: {error}")
+            continue
+        file_dir_names = local_names.get(os.path.dirname(py_file_path), set())
+        for module, is_optional in file_imports.items():
+            # Skip built-in/standard library modules (case-insensitive check)
+            if module.lower() in standard_lib_modules:
+                skipped.setdefault(module, STANDARD)
+            # Local project modules: in the project root or next to the importing file
+            elif module in project_names or module in file_dir_names:
+                skipped.setdefault(module, LOCAL)
+            else:
+                add_dependency(module, f'import in {rel_path}', is_optional)
+        yield FileScanned(rel_path, "PY", tuple(sorted(file_imports)))
+
+    for module, status in sorted(skipped.items()):
+        yield ModuleResolved(module, module, status, ())
+
+    # Phase 3: resolve each distinct dependency once
+    yield ScanPhase("resolve", len(dependencies))
+    missing = {}
+    optional_missing = {}
+    installed = 0
+    for name, entry in dependencies.items():
+        if name not in resolved:
+            resolved[name] = check_package_installed(name, package_name_map, python_executable)
+        if resolved[name]:
+            status = INSTALLED
+            installed += 1
+        elif entry["optional"]:
+            # Only ever imported under try/except ImportError or an if: the code copes without it
+            status = OPTIONAL
+            optional_missing[name] = entry["sources"]
+        else:
+            status = MISSING
+            missing[name] = entry["sources"]
+        yield ModuleResolved(name, package_name_map.get(name, name), status, tuple(entry["sources"]))
 
-    for root, _, files in walk_generator:
-        for file in files:
-            # 1. Check for requirements.txt files
-            if file == 'requirements.txt':
-                found_dependencies_to_check = True
-                req_file_path = os.path.join(root, file)
-                scan_summary_messages.append(f"\n--- Checking '{file}' ({os.path.relpath(req_file_path, folder_path)}) ---")
-                try:
-                    with open(req_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        for line in f:
-                            line = line.strip()
-                            if line and not line.startswith('#'):
-                                package_name = re.split(r'[<>=~]', line)[0].strip()
-                                if package_name:
-                                    scan_summary_messages.append(f"  Checking '{package_name}'...")
-                                    if not check_package_installed(package_name, package_name_map):
-                                        display_name = package_name_map.get(package_name, package_name)
-                                        missing_dependencies[package_name] = f'requirements.txt ({os.path.relpath(req_file_path, folder_path)})'
-                                        scan_summary_messages.append(f"  ❌ Missing: {display_name}")
-                                    else:
-                                        display_name = package_name_map.get(package_name, package_name)
-                                        scan_summary_messages.append(f"  ✅ Installed: {display_name}")
-                except Exception as e:
-                    scan_summary_messages.append(f"  Error reading {req_file_path}: {e}")
-
-            # 2. Check for .py files for import statements
-            elif file.endswith('.py'):
-                py_file_path = os.path.join(root, file)
-                if file == '__init__.py' and os.path.getsize(py_file_path) < 50:
-                    continue
+    yield ScanSummary(folder_path, files_scanned, missing, optional_missing, installed)
+
+
+def format_scan_event(event, package_name_map=None):
+    """Renders a scan event as a list of human-readable lines (the classic CLI/GUI output)."""
+    if package_name_map is None:
+        package_name_map = PACKAGE_NAME_MAP
+    if isinstance(event, ScanPhase):
+        if event.phase == "collect":
+            return [] if event.total else ["\nNo 'requirements.txt' files or Python files with significant imports found in the selected directory."]
+        return [f"\n--- Resolving {event.total} distinct dependencies ---"]
+    if isinstance(event, FileScanned):
+        if event.file_type == "REQ":
+            return [f"\n--- Checked 'requirements.txt' ({event.path}): {len(event.names)} package(s) ---"]
+        return [f"  Checked '{event.path}' ({len(event.names)} import(s))"]
+    if isinstance(event, ScanError):
+        return [f"  Warning: {event.message}"]
+    if isinstance(event, ModuleResolved):
+        sources = _format_sources(list(event.sources))
+        return [{
+            STANDARD: f"  (Skipping built-in/standard: {event.name})",
+            LOCAL: f"  (Skipping local module: {event.name})",
+            INSTALLED: f"  ✅ Installed: {event.display_name} ({sources})",
+            OPTIONAL: f"  ⚠️ Optional (guarded import), not installed: {event.display_name} ({sources})",
+            MISSING: f"  ❌ Missing: {event.display_name} ({sources})",
+        }[event.status]]
+    if isinstance(event, ScanSummary):
+        if not event.files_scanned:
+            return []
+        lines = ["\n--- Scan Complete ---"]
+        if event.missing:
+            lines.append("\nSummary of Missing Dependencies:")
+            for pkg, sources in event.missing.items():
+                lines.append(f"- {package_name_map.get(pkg, pkg)} (from {_format_sources(sources)})")
+        else:
+            lines.append("\nAll detected dependencies are installed! ✨")
+        return lines
+    return []
+
+
+def scan_event_to_dict(event):
+    """JSON-serialisable form of a scan event, tagged with its type."""
+    return {"event": type(event).__name__, **event._asdict()}
+
+
+def scan_dependencies(folder_path, recursive=True, standard_lib_modules=None, package_name_map=None,
+                      python_executable=None, on_event=None, cache=None):
+    """Runs a scan and returns its ScanSummary. on_event(event), if given, sees every event as it happens."""
+    summary = None
+    for event in iter_scan_events(folder_path, recursive, standard_lib_modules, package_name_map, python_executable,
+                                  cache):
+        if on_event:
+            on_event(event)
+        summary = event
+    return summary
 
-                found_dependencies_to_check = True
-                scan_summary_messages.append(f"\n--- Checking '{file}' ({os.path.relpath(py_file_path, folder_path)}) for imports ---")
-                imported_modules = extract_imports_from_file(py_file_path)
-
-                for module in imported_modules:
-                    module_lower = module.lower()
-
-                    # Skip built-in/standard library modules (case-insensitive check)
-                    if module_lower in standard_lib_modules:
-                        scan_summary_messages.append(f"  (Skipping built-in/standard: {module})")
-                        continue
-
-                    # Heuristic for local project modules: check if a .py file or folder exists
-                    is_local_module = False
-                    # Check in the root of the selected project folder
-                    if os.path.exists(os.path.join(folder_path, module + '.py')) or \
-                       os.path.exists(os.path.join(folder_path, module)):
-                        is_local_module = True
-                    # Also check relative to the current file's directory (for deeper nested modules)
-                    elif os.path.exists(os.path.join(root, module + '.py')) or \
-                         os.path.exists(os.path.join(root, module)):
-                        is_local_module = True
-
-                    if is_local_module:
-                        scan_summary_messages.append(f"  (Skipping local module: {module})")
-                        continue
-
-                    # Check if it's installed using the refined method
-                    display_module_name = package_name_map.get(module, module)
-                    scan_summary_messages.append(f"  Checking '{display_module_name}' (from import)...")
-                    if not check_package_installed(module, package_name_map):
-                        if module not in missing_dependencies:
-                            missing_dependencies[module] = f'import in {os.path.relpath(py_file_path, folder_path)}'
-                            scan_summary_messages.append(f"  ❌ Missing: {display_module_name}")
-                    else:
-                        scan_summary_messages.append(f"  ✅ Installed: {display_module_name}")
-
-    if not found_dependencies_to_check and not missing_dependencies:
-        scan_summary_messages.append("\nNo 'requirements.txt' files or Python files with significant imports found in the selected directory.")
-    elif missing_dependencies:
-        scan_summary_messages.append("\n--- Scan Complete ---")
-        scan_summary_messages.append("\nSummary of Missing Dependencies:")
-        for pkg, src in missing_dependencies.items():
-            display_pkg_name = package_name_map.get(pkg, pkg)
-            scan_summary_messages.append(f"- {display_pkg_name} (from {src})")
-    else:
-        scan_summary_messages.append("\n--- Scan Complete ---")
-        scan_summary_messages.append("\nAll detected dependencies are installed! �")
 
+def scan_dependencies_logic(folder_path, recursive=True, standard_lib_modules=None, package_name_map=None,
+                            python_executable=None):
+    """
+    Scans a folder for Python files and requirements.txt to identify dependencies.
+    python_executable selects the environment to check against (default: the running interpreter).
+    Returns a tuple: (missing_dependencies_dict, scan_summary_messages)
+    missing_dependencies_dict: {module_name: source_info}
+    scan_summary_messages: list of strings for detailed output.
+    Prefer iter_scan_events()/scan_dependencies() for large trees and machine-readable results.
+    """
+    scan_summary_messages = [f"Scanning folder: {folder_path}"]
+    summary = scan_dependencies(
+        folder_path, recursive, standard_lib_modules, package_name_map, python_executable,
+        on_event=lambda event: scan_summary_messages.extend(format_scan_event(event, package_name_map))
+    )
+    missing_dependencies = {name: ", ".join(sources) for name, sources in summary.missing.items()}
     return missing_dependencies, scan_summary_messages
 
 
-def install_dependencies_logic(missing_dependencies, package_name_map=None, verbose=False):
+class DirectoryScanCache:
+    """
+    Memoizes scan summaries per directory, for callers that ask about many files in the same
+    tree (e.g. DependencyCheckerPlugin, which is called once per visited file).
+    A recursive scan walks and parses its tree once and publishes the summaries of every
+    subdirectory holding scanned files along with its own, so visiting a tree top-down costs one
+    walk, not one per directory level. Summaries are computed outside the lock, which is only
+    taken to read or publish them, so other directories stay available during a scan.
+    A cached summary is dropped when a file beneath its directory changes: check_file() notices
+    new or modified files as they are visited, and invalidate() can be called by a watcher.
+    """
+
+    def __init__(self):
+        self._summaries = {}   # (folder, recursive, python_executable) -> ScanSummary
+        self._file_stats = {}  # file path -> (mtime_ns, size) when it was last scanned
+        self._generation = 0   # Bumped by every invalidation; scans that raced one are not published
+        self._lock = threading.Lock()
+
+    def get_summary(self, folder_path, recursive=True, python_executable=None):
+        folder_path = os.path.abspath(folder_path)
+        key = (folder_path, recursive, python_executable)
+        with self._lock:
+            summary = self._summaries.get(key)
+            generation = self._generation
+        if summary is not None:
+            return summary
+        summaries, file_stats = self._scan(folder_path, recursive, python_executable)
+        with self._lock:
+            if generation == self._generation:
+                for other_key, other in summaries.items():
+                    self._summaries.setdefault(other_key, other)
+                self._file_stats.update(file_stats)
+        return summaries[key]
+
+    @staticmethod
+    def _scan(folder_path, recursive, python_executable):
+        """Returns ({key: ScanSummary} for folder_path and its subdirectories, {file path: stat})."""
+        requirement_files, python_files, local_names = _collect_project_files(folder_path, recursive)
+        requirements = list(_iter_requirements(requirement_files))
+        imports = list(iter_imports_parallel(python_files))
+        # Tiny __init__.py files are skipped by the walk but still visited by callers of check_file()
+        skipped = [os.path.join(d, "__init__.py") for d, names in local_names.items() if "__init__.py" in names]
+        file_stats = {}
+        for path in requirement_files + python_files + skipped:
+            try:
+                st = os.stat(path)
+                file_stats[path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                file_stats[path] = None
+        # Bottom-up: a directory's files are its own followed by its subdirectories' in walk order,
+        # so each summary is what scanning that directory on its own would return
+        own = {directory: ([], []) for directory in local_names}
+        for entry in requirements:
+            own[os.path.dirname(entry[0])][0].append(entry)
+        for entry in imports:
+            own[os.path.dirname(entry[0])][1].append(entry)
+        wanted = {folder_path} | {os.path.dirname(path) for path in requirement_files + python_files}
+        children = {}  # directory -> subtree file lists of its subdirectories, in walk order
+        resolved = {}  # Each module is looked up once for the whole tree
+        summaries = {}
+        for directory in reversed(list(local_names)):  # os.walk order reversed: subdirectories first
+            subtree = ([], [])
+            for files in [own[directory]] + children.pop(directory, [])[::-1]:
+                subtree[0].extend(files[0])
+                subtree[1].extend(files[1])
+            if directory != folder_path:
+                children.setdefault(os.path.dirname(directory), []).append(subtree)
+            if directory in wanted:
+                summary = None
+                for event in _iter_collected_events(directory, subtree[0], subtree[1], local_names,
+                                                    STANDARD_LIBRARY_MODULES, PACKAGE_NAME_MAP, python_executable,
+                                                    resolved):
+                    summary = event
+                summaries[(directory, recursive, python_executable)] = summary
+        return summaries, file_stats
+
+    def check_file(self, file_path):
+        """Invalidates the directories above file_path if it is new or changed since it was scanned."""
+        file_path = os.path.abspath(file_path)
+        try:
+            st = os.stat(file_path)
+            current = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            current = None
+        with self._lock:
+            if self._file_stats.get(file_path) != current:
+                self._drop_summaries(file_path)
+                # Remember it even if the scan skips it (e.g. a tiny __init__.py), so it only invalidates once
+                self._file_stats[file_path] = current
+
+    def invalidate(self, path=None):
+        """Drops cached summaries of every directory containing path (all of them if path is None)."""
+        with self._lock:
+            if path is None:
+                self._generation += 1
+                self._summaries.clear()
+                self._file_stats.clear()
+                return
+            path = os.path.abspath(path)
+            self._file_stats.pop(path, None)
+            self._drop_summaries(path)
+
+    def _drop_summaries(self, path):
+        # Called with the lock held
+        self._generation += 1
+        for key in [k for k in self._summaries if path == k[0] or path.startswith(k[0].rstrip(os.sep) + os.sep)]:
+            del self._summaries[key]
+
+
+def _pip_index_options(wheelhouse=None, no_index=False):
+    """pip options that add a local wheelhouse (--find-links) and optionally disable PyPI (--no-index)."""
+    options = []
+    if wheelhouse:
+        options += ['--find-links', os.path.abspath(wheelhouse)]
+    if no_index:
+        options.append('--no-index')
+    return options
+
+
+def _install_error_hint(error_output):
+    """Adds guidance for common pip errors to the captured stderr."""
+    if "Microsoft Visual C++ 14.0 or greater is required" in error_output:
+        error_output += "\n  (HINT: Install Microsoft C++ Build Tools: https://visualstudio.microsoft.com/visual-cpp-build-tools/)"
+    elif "The 'sklearn' PyPI package is deprecated, use 'scikit-learn'" in error_output:
+        error_output += "\n  (HINT: Use 'scikit-learn' instead of 'sklearn'.)"
+    elif "You were probably trying to install `gdal` by running `pip install osgeo`" in error_output:
+        error_output += "\n  (HINT: Use 'gdal' instead of 'osgeo'.)"
+    elif "No matching distribution found for" in error_output:
+        error_output += "\n  (HINT: This package might not exist on PyPI, or its name is different, or it has specific build requirements.)"
+    elif "Permission denied" in error_output or "Access is denied" in error_output:
+        error_output += "\n  (HINT: Try running your terminal/command prompt as Administrator.)"
+    elif "Connection aborted" in error_output or "Failed to establish a new connection" in error_output:
+        error_output += "\n  (HINT: Check your internet connection or proxy settings.)"
+    return error_output
+
+
+def prefetch_wheels(packages, wheelhouse, python_executable=None, jobs=4):
+    """
+    Downloads or builds wheels for packages (and their dependencies) into wheelhouse, `jobs` pip
+    processes at a time. Wheels already in the wheelhouse are reused, so the directory can be
+    copied to offline hosts and installed from with --no-index.
+    Returns {package: (returncode, stderr)}.
+    """
+    os.makedirs(wheelhouse, exist_ok=True)
+
+    def build(package):
+        returncode, _, stderr = _run_pip_command(
+            ['wheel', '--wheel-dir', wheelhouse] + _pip_index_options(wheelhouse) + [package], python_executable
+        )
+        return package, (returncode, stderr)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return dict(pool.map(build, packages))
+
+
+def install_dependencies_logic(missing_dependencies, package_name_map=None, verbose=False, python_executable=None,
+                               batch=False, wheelhouse=None, no_index=False, jobs=0):
     """
     Performs pip installations for missing dependencies.
+    With batch, all packages are installed by a single pip run, so they are resolved together
+    (falling back to one run per package if it fails, to pin down the failures). wheelhouse adds a
+    local wheel directory (--find-links), no_index installs from it alone. jobs > 0 first downloads
+    or builds the wheels in parallel (into wheelhouse, or a temporary directory).
     Returns a tuple: (successful_installs, failed_installs, installation_messages)
     """
     if package_name_map is None:
@@ -243,44 +527,61 @@ def install_dependencies_logic(missing_dependencies, package_name_map=None, verb
 
     installation_messages.append("\n--- Starting Installation ---")
 
-    packages_to_install_pypi_names = [package_name_map.get(pkg, pkg) for pkg in list(missing_dependencies.keys())]
-    original_missing_keys = list(missing_dependencies.keys())
-
-    for i, pypi_package_name in enumerate(packages_to_install_pypi_names):
-        original_module_name = original_missing_keys[i]
-
-        installation_messages.append(f"Installing '{pypi_package_name}'...")
-        if verbose:
-            print(f"DEBUG: Attempting to install: {pypi_package_name}") # For console output
-
-        returncode, stdout, stderr = _run_pip_command(['install', pypi_package_name])
+    packages_to_install_pypi_names = list(dict.fromkeys(package_name_map.get(pkg, pkg) for pkg in missing_dependencies))
+
+    temp_wheelhouse = None
+    if jobs and not no_index:
+        if not wheelhouse:
+            wheelhouse = temp_wheelhouse = tempfile.mkdtemp(prefix="depcheck-wheels-")
+        installation_messages.append(f"Preparing wheels in '{wheelhouse}' ({jobs} parallel jobs)...")
+        for pypi_package_name, (returncode, stderr) in prefetch_wheels(
+                packages_to_install_pypi_names, wheelhouse, python_executable, jobs).items():
+            if returncode != 0:
+                installation_messages.append(
+                    f"  ⚠️ Could not prepare a wheel for {pypi_package_name}, pip will retry while installing:\n{stderr}"
+                )
+    index_options = _pip_index_options(wheelhouse, no_index)
 
-        if returncode == 0:
-            installation_messages.append(f"  ✅ Successfully installed: {pypi_package_name}")
-            successful_installs.append(pypi_package_name)
-        else:
-            error_output = stderr
-            # Provide specific guidance for common errors
-            if "Microsoft Visual C++ 14.0 or greater is required" in error_output:
-                error_output += "\n  (HINT: Install Microsoft C++ Build Tools: https://visualstudio.microsoft.com/visual-cpp-build-tools/)"
-            elif "The 'sklearn' PyPI package is deprecated, use 'scikit-learn'" in error_output:
-                error_output += "\n  (HINT: Use 'scikit-learn' instead of 'sklearn'.)"
-            elif "You were probably trying to install `gdal` by running `pip install osgeo`" in error_output:
-                error_output += "\n  (HINT: Use 'gdal' instead of 'osgeo'.)"
-            elif "No matching distribution found for" in error_output:
-                error_output += "\n  (HINT: This package might not exist on PyPI, or its name is different, or it has specific build requirements.)"
-            elif "Permission denied" in error_output or "Access is denied" in error_output:
-                error_output += "\n  (HINT: Try running your terminal/command prompt as Administrator.)"
-            elif "Connection aborted" in error_output or "Failed to establish a new connection" in error_output:
-                error_output += "\n  (HINT: Check your internet connection or proxy settings.)"
-
-
-            installation_messages.append(f"  ❌ Failed to install {pypi_package_name}:\n{error_output}")
-            failed_installs.append(pypi_package_name)
-        
-        if verbose:
-            print(f"DEBUG: Installation of {pypi_package_name} finished with return code {returncode}") # For console output
+    try:
+        pending = packages_to_install_pypi_names
+        if batch and len(pending) > 1:
+            installation_messages.append(f"Installing {len(pending)} packages in one pip run: {', '.join(pending)}...")
+            if verbose:
+                print(f"DEBUG: Attempting to install: {' '.join(pending)}") # For console output
+            returncode, stdout, stderr = _run_pip_command(['install'] + index_options + pending, python_executable)
+            if returncode == 0:
+                installation_messages.append(f"  ✅ Successfully installed: {', '.join(pending)}")
+                successful_installs.extend(pending)
+                pending = []
+            else:
+                # pip resolves everything before installing anything, so the environment is unchanged
+                installation_messages.append(
+                    f"  ⚠️ Batched install failed:\n{_install_error_hint(stderr)}\n  Retrying one package at a time..."
+                )
+
+        for pypi_package_name in pending:
+            installation_messages.append(f"Installing '{pypi_package_name}'...")
+            if verbose:
+                print(f"DEBUG: Attempting to install: {pypi_package_name}") # For console output
+
+            returncode, stdout, stderr = _run_pip_command(['install'] + index_options + [pypi_package_name],
+                                                          python_executable)
+
+            if returncode == 0:
+                installation_messages.append(f"  ✅ Successfully installed: {pypi_package_name}")
+                successful_installs.append(pypi_package_name)
+            else:
+                installation_messages.append(f"  ❌ Failed to install {pypi_package_name}:\n{_install_error_hint(stderr)}")
+                failed_installs.append(pypi_package_name)
+
+            if verbose:
+                print(f"DEBUG: Installation of {pypi_package_name} finished with return code {returncode}") # For console output
+    finally:
+        if temp_wheelhouse:
+            shutil.rmtree(temp_wheelhouse, ignore_errors=True)
 
+    if successful_installs:
+        invalidate_installed_index(python_executable)
 
     installation_messages.append("\n--- Installation Summary ---")
     if successful_installs:
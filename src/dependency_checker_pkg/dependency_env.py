@@ -0,0 +1,134 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import importlib
+import importlib.metadata
+
+# --- Installed Distribution Index ---
+# Loading every installed distribution once and answering lookups from memory replaces the
+# per-import `pip show` subprocesses (a fresh interpreter + pip import each, ~0.5-1s).
+
+def normalize_dist_name(name):
+    """PEP 503 normalization, so 'Foo_Bar', 'foo-bar' and 'foo.bar' compare equal."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _top_level_names(dist):
+    """Import names a distribution provides (equivalent of packages_distributions() on Python < 3.10)."""
+    top_level = dist.read_text("top_level.txt")
+    if top_level:
+        return {line.strip() for line in top_level.splitlines() if line.strip()}
+    names = set()
+    for file in dist.files or ():
+        parts = file.parts
+        if not parts or parts[0].endswith((".dist-info", ".egg-info")) or parts[0] in ("..", "__pycache__"):
+            continue
+        if len(parts) > 1:
+            names.add(parts[0])
+        elif parts[0].endswith(".py"):
+            names.add(parts[0][:-3])
+        elif parts[0].endswith((".so", ".pyd")):
+            names.add(parts[0].split(".")[0])
+    return names
+
+
+def collect_environment():
+    """
+    Returns {"distributions": [...], "packages": {import_name: [dist, ...]}} for the running interpreter.
+    Only uses the standard library so it can also run inside a foreign interpreter (see __main__).
+    """
+    distributions = set()
+    packages = {}
+    for dist in importlib.metadata.distributions():
+        name = dist.metadata["Name"]
+        if not name:
+            continue
+        distributions.add(name)
+        for import_name in _top_level_names(dist):
+            packages.setdefault(import_name, [])
+            if name not in packages[import_name]:
+                packages[import_name].append(name)
+    return {"distributions": sorted(distributions), "packages": packages}
+
+
+class InstalledIndex:
+    """In-memory view of the distributions installed in one Python environment."""
+
+    def __init__(self, distributions, packages, python_executable=None):
+        self.python_executable = python_executable or sys.executable
+        self.distributions = {normalize_dist_name(d) for d in distributions}
+        self.packages = {name: list(dists) for name, dists in packages.items()}
+
+    @classmethod
+    def for_current_environment(cls):
+        env = collect_environment()
+        return cls(env["distributions"], env["packages"])
+
+    @classmethod
+    def for_interpreter(cls, python_executable):
+        """Indexes another environment (e.g. a project venv) with a single subprocess."""
+        process = subprocess.run(
+            [python_executable, os.path.abspath(__file__)],
+            capture_output=True, text=True, check=False, encoding="utf-8", errors="ignore"
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"Could not inspect environment of {python_executable}: {process.stderr.strip()}")
+        env = json.loads(process.stdout)
+        return cls(env["distributions"], env["packages"], python_executable)
+
+    def is_installed(self, name):
+        """True if `name` is an installed distribution or a top-level module provided by one."""
+        return normalize_dist_name(name) in self.distributions or name in self.packages
+
+    def distributions_for(self, import_name):
+        return self.packages.get(import_name, [])
+
+
+_index_cache = {}  # interpreter -> (environment fingerprint, index)
+
+def _cache_key(python_executable):
+    if not python_executable or os.path.realpath(python_executable) == os.path.realpath(sys.executable):
+        return None
+    return os.path.abspath(python_executable)
+
+def _fingerprint(key):
+    # site-packages mtimes change whenever packages are (un)installed, also by another process
+    try:
+        from .dependency_cache import environment_fingerprint
+    except ImportError:
+        from dependency_cache import environment_fingerprint
+    return environment_fingerprint(key)
+
+def get_installed_index(python_executable=None):
+    """
+    Returns the (cached) index for an interpreter; None means the running one. A cached index is
+    rebuilt once the environment changed, so long-lived processes (codeaccountant serve) stay current.
+    """
+    key = _cache_key(python_executable)
+    fingerprint = _fingerprint(key)
+    cached = _index_cache.get(key)
+    if cached is None or cached[0] != fingerprint:
+        if key is None:
+            if cached is not None:
+                importlib.invalidate_caches()  # Finders cache directory listings
+            index = InstalledIndex.for_current_environment()
+        else:
+            index = InstalledIndex.for_interpreter(key)
+        cached = _index_cache[key] = (fingerprint, index)
+    return cached[1]
+
+
+def invalidate_installed_index(python_executable=None):
+    """Drops cached indexes, e.g. after installing packages. Without an argument, all are dropped."""
+    if python_executable:
+        _index_cache.pop(_cache_key(python_executable), None)
+    else:
+        _index_cache.clear()
+    importlib.invalidate_caches()
+
+
+if __name__ == "__main__":
+    # Run by InstalledIndex.for_interpreter() inside the target interpreter.
+    print(json.dumps(collect_environment()))
@@ -0,0 +1,267 @@
+import fnmatch
+import json
+import os
+import sys
+
+try:
+    from .dependency_cache import default_cache_path
+    from .dependency_core import parse_requirements_file, STANDARD_LIBRARY_MODULES, PACKAGE_NAME_MAP
+    from .dependency_env import get_installed_index, normalize_dist_name
+    from .dependency_imports import extract_import_references, map_files_parallel
+except ImportError:
+    from dependency_cache import default_cache_path
+    from dependency_core import parse_requirements_file, STANDARD_LIBRARY_MODULES, PACKAGE_NAME_MAP
+    from dependency_env import get_installed_index, normalize_dist_name
+    from dependency_imports import extract_import_references, map_files_parallel
+
+# --- Project Import Graph ---
+# A persisted, module-level import graph: project files are the nodes, edges point from a file to
+# the project modules it imports, and third-party imports are kept per file. update() only re-parses
+# files whose mtime or size changed; edges are resolved in memory on the first query after an update,
+# so reverse-dependency and unused-package queries never touch the files themselves.
+
+GRAPH_VERSION = 1
+SKIP_DIRS = {"__pycache__", ".git", ".hg", ".svn", ".venv", "venv", ".tox", "node_modules"}
+# Python 3.10+ knows its complete standard library; older versions rely on the checker's list
+STANDARD_MODULES = STANDARD_LIBRARY_MODULES | {m.lower() for m in getattr(sys, "stdlib_module_names", ())}
+
+
+def module_name_for(rel_path):
+    """'pkg/sub/mod.py' -> 'pkg.sub.mod'; 'pkg/__init__.py' -> 'pkg'."""
+    parts = rel_path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def is_excluded(rel_path, patterns, is_dir=False):
+    """
+    Whether a project-relative path matches one of the exclude patterns (gitignore-like globs:
+    "name" or "*.ext" match at any depth, "a/b" from the project root, a trailing "/" only dirs).
+    """
+    name = rel_path.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        pattern = pattern.strip().replace("\\", "/")
+        if not pattern or pattern.startswith("#") or (pattern.endswith("/") and not is_dir):
+            continue
+        pattern = pattern.rstrip("/")
+        if "/" in pattern:
+            if fnmatch.fnmatchcase(rel_path, pattern.lstrip("/")):
+                return True
+        elif fnmatch.fnmatchcase(name, pattern):
+            return True
+    return False
+
+
+def _fresh(entry, st):
+    return entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size
+
+
+class ImportGraph:
+    def __init__(self, root, path=None, data=None, python_executable=None, exclude=()):
+        self.root = os.path.abspath(root)
+        self.path = path
+        self.python_executable = python_executable
+        self.exclude = tuple(exclude)  # Extra patterns for is_excluded(), on top of SKIP_DIRS
+        data = data or {}
+        self.files = data.get("files", {})  # rel path -> [mtime_ns, size, [[level, module, [names]], ...]]
+        self.requirements = data.get("requirements", {})  # rel path -> [mtime_ns, size, [packages]]
+        self._resolved = None
+
+    @classmethod
+    def load(cls, root, path=None, python_executable=None, exclude=()):
+        """Loads the persisted graph of a project; a missing or outdated file yields an empty graph."""
+        path = path or default_cache_path(root, ".graph.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != GRAPH_VERSION or data.get("root") != os.path.abspath(root):
+                data = None
+        except (OSError, ValueError):
+            data = None
+        return cls(root, path, data, python_executable, exclude)
+
+    def save(self):
+        if not self.path:
+            return
+        data = {"version": GRAPH_VERSION, "root": self.root, "files": self.files, "requirements": self.requirements}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def update(self, max_workers=None, exclude=None):
+        """
+        Brings the graph up to date with the files on disk: new and changed files are (re-)parsed,
+        deleted ones are dropped. Returns (changed, removed) lists of project-relative paths.
+        exclude overrides the patterns given to the constructor; excluded files count as deleted.
+        """
+        exclude = self.exclude if exclude is None else tuple(exclude)
+        python_files, requirement_files = {}, {}
+        for root, dirs, files in os.walk(self.root):
+            rel_root = os.path.relpath(root, self.root).replace(os.sep, "/")
+            prefix = "" if rel_root == "." else rel_root + "/"
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.endswith(".egg-info")
+                       and not (exclude and is_excluded(prefix + d, exclude, is_dir=True))]
+            for file in files:
+                if not (file.endswith(".py") or file == "requirements.txt"):
+                    continue
+                if exclude and is_excluded(prefix + file, exclude):
+                    continue
+                file_path = os.path.join(root, file)
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    continue
+                rel_path = os.path.relpath(file_path, self.root).replace(os.sep, "/")
+                (python_files if file.endswith(".py") else requirement_files)[rel_path] = st
+
+        changed = [rel for rel, st in python_files.items() if not _fresh(self.files.get(rel), st)]
+        to_parse = [os.path.join(self.root, rel) for rel in changed]
+        for file_path, references, error in map_files_parallel(extract_import_references, to_parse, max_workers):
+            rel_path = os.path.relpath(file_path, self.root).replace(os.sep, "/")
+            st = python_files[rel_path]
+            self.files[rel_path] = [st.st_mtime_ns, st.st_size, references if not error else []]
+        for rel_path, st in requirement_files.items():
+            if not _fresh(self.requirements.get(rel_path), st):
+                try:
+                    packages = parse_requirements_file(os.path.join(self.root, rel_path))
+                except OSError:
+                    continue
+                self.requirements[rel_path] = [st.st_mtime_ns, st.st_size, packages]
+                changed.append(rel_path)
+
+        removed = [rel for rel in self.files if rel not in python_files]
+        removed += [rel for rel in self.requirements if rel not in requirement_files]
+        for rel_path in removed:
+            self.files.pop(rel_path, None)
+            self.requirements.pop(rel_path, None)
+        if changed or removed:
+            self._resolved = None
+        return sorted(changed), sorted(removed)
+
+    # --- Edge resolution ---
+
+    def _resolve(self):
+        if self._resolved is not None:
+            return self._resolved
+        modules = {module_name_for(rel): rel for rel in self.files}
+        imports = {}  # rel -> project files it imports
+        imported_by = {}  # rel -> project files importing it
+        third_party = {}  # top-level import name -> files importing it
+
+        def find_module(dotted, min_parts=1):
+            # Longest project module that dotted starts with ('pkg.mod.func' -> 'pkg.mod')
+            parts = dotted.split(".")
+            for i in range(len(parts), min_parts - 1, -1):
+                rel = modules.get(".".join(parts[:i]))
+                if rel:
+                    return rel
+            return None
+
+        for rel, (_, _, references) in self.files.items():
+            module = module_name_for(rel)
+            package = module if rel.endswith("__init__.py") else module.rpartition(".")[0]
+            directory = module.rpartition(".")[0]
+            targets = imports.setdefault(rel, set())
+            for level, name, names in references:
+                if level:
+                    base = package.split(".") if package else []
+                    if level - 1 > len(base):
+                        continue  # Relative import beyond the project root
+                    base = base[:len(base) - (level - 1)]
+                    dotted = ".".join(base + ([name] if name else []))
+                    candidates = [f"{dotted}.{n}" if dotted else n for n in names] + ([dotted] if dotted else [])
+                else:
+                    candidates = [f"{name}.{n}" for n in names] + [name]
+                found = False
+                for candidate in candidates:
+                    # Absolute first, then relative to the importing file's directory (script-style imports)
+                    target = find_module(candidate)
+                    if target is None and not level and directory:
+                        target = find_module(f"{directory}.{candidate}", directory.count(".") + 2)
+                    if target:
+                        found = True
+                        if target != rel:
+                            targets.add(target)
+                if not found and not level:
+                    top_level = name.split(".")[0]
+                    if top_level.lower() not in STANDARD_MODULES:
+                        third_party.setdefault(top_level, set()).add(rel)
+            for target in targets:
+                imported_by.setdefault(target, set()).add(rel)
+
+        self._resolved = (modules, imports, imported_by, third_party)
+        return self._resolved
+
+    def _import_names_for(self, distribution):
+        """Top-level import names, used in the project, that belong to a distribution (e.g. 'Pillow' -> {'PIL'})."""
+        _, _, _, third_party = self._resolve()
+        wanted = normalize_dist_name(distribution)
+        return {name for name in third_party if wanted in self._distributions_of(name)}
+
+    def _distributions_of(self, import_name):
+        names = {import_name, PACKAGE_NAME_MAP.get(import_name, import_name)}
+        try:
+            names.update(get_installed_index(self.python_executable).distributions_for(import_name))
+        except Exception:
+            pass  # Environment not inspectable: fall back to the name mapping alone
+        return {normalize_dist_name(n) for n in names}
+
+    # --- Queries ---
+
+    def _node(self, target):
+        modules = self._resolve()[0]
+        rel_path = target.replace(os.sep, "/")
+        if os.path.isabs(target):
+            rel_path = os.path.relpath(target, self.root).replace(os.sep, "/")
+        if rel_path in self.files:
+            return rel_path
+        return modules.get(target)
+
+    def dependents(self, target, transitive=True):
+        """
+        Project files that import target, directly or (with transitive) through other project modules.
+        target is a project file ('pkg/mod.py'), a module name ('pkg.mod'), or a third-party
+        import or distribution name ('PIL', 'Pillow'). Returns a sorted list of relative paths.
+        """
+        _, _, imported_by, third_party = self._resolve()
+        node = self._node(target)
+        if node is not None:
+            seeds = set(imported_by.get(node, ()))
+        else:
+            names = {target} if target in third_party else self._import_names_for(target)
+            seeds = set().union(*(third_party[name] for name in names)) if names else set()
+        if transitive:
+            seeds = self._closure(seeds)
+        seeds.discard(node)
+        return sorted(seeds)
+
+    def affected(self, paths):
+        """The given project files plus everything that transitively imports them (e.g. to select tests)."""
+        nodes = {node for node in (self._node(p) for p in paths) if node}
+        return sorted(self._closure(nodes))
+
+    def _closure(self, nodes):
+        imported_by = self._resolve()[2]
+        seen = set(nodes)
+        stack = list(nodes)
+        while stack:
+            for parent in imported_by.get(stack.pop(), ()):
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+        return seen
+
+    def third_party(self):
+        """{top-level import name: sorted files importing it} for every non-project, non-stdlib import."""
+        return {name: sorted(files) for name, files in sorted(self._resolve()[3].items())}
+
+    def unused_packages(self):
+        """Packages listed in the project's requirements.txt files that no project file imports."""
+        used = set()
+        for name in self._resolve()[3]:
+            used |= self._distributions_of(name)
+        declared = {package for _, _, packages in self.requirements.values() for package in packages}
+        return sorted(p for p in declared if normalize_dist_name(p) not in used)
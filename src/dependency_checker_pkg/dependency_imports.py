@@ -0,0 +1,200 @@
+import ast
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# --- Import Extraction ---
+# Imports are read from the AST, so `import a, b`, multi-line/parenthesised imports and imports
+# nested in functions or classes are all found, while text inside strings and docstrings is not.
+# Imports guarded by `try: ... except ImportError` or by an `if` are flagged as optional.
+
+IMPORT_ERRORS = {"ImportError", "ModuleNotFoundError", "Exception", "BaseException"}
+PARALLEL_MIN_FILES = 32  # Below this, starting worker processes costs more than it saves
+
+
+def _catches_import_error(handler):
+    if handler.type is None:
+        return True  # bare except
+    types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+    for t in types:
+        name = t.attr if isinstance(t, ast.Attribute) else getattr(t, "id", None)
+        if name in IMPORT_ERRORS:
+            return True
+    return False
+
+
+class _ImportVisitor(ast.NodeVisitor):
+    def __init__(self):
+        self.imports = {}  # top-level module -> optional (True only if every occurrence is guarded)
+        self._guard_depth = 0
+
+    def _add(self, module_name):
+        module = module_name.split(".")[0]
+        optional = self._guard_depth > 0
+        self.imports[module] = self.imports.get(module, True) and optional
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self._add(alias.name)
+
+    def visit_ImportFrom(self, node):
+        # Relative imports (from . import x) always refer to the project itself
+        if node.level == 0 and node.module and node.module != "__future__":
+            self._add(node.module)
+
+    def _visit_guarded(self, nodes):
+        self._guard_depth += 1
+        for child in nodes:
+            self.visit(child)
+        self._guard_depth -= 1
+
+    def visit_Try(self, node):
+        if any(_catches_import_error(h) for h in node.handlers):
+            self._visit_guarded(node.body)
+        else:
+            for child in node.body:
+                self.visit(child)
+        for child in node.handlers + node.orelse + node.finalbody:
+            self.visit(child)
+
+    visit_TryStar = visit_Try
+
+    def visit_If(self, node):
+        self.visit(node.test)
+        self._visit_guarded(node.body + node.orelse)
+
+
+def _extract_imports_regex(source):
+    """Line-based fallback for files the running interpreter cannot parse (e.g. Python 2 code)."""
+    imports = {}
+    for line in source.splitlines():
+        match = re.match(r'^\s*import\s+([a-zA-Z0-9_.]+)', line) or \
+                re.match(r'^\s*from\s+([a-zA-Z0-9_][a-zA-Z0-9_.]*)\s+import', line)
+        if match:
+            imports[match.group(1).split('.')[0]] = False
+    return imports
+
+
+def extract_import_details(file_path):
+    """
+    Returns {top_level_module: is_optional} for one Python file.
+    Raises OSError if the file cannot be read.
+    """
+    with open(file_path, 'rb') as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, filename=file_path)
+    except (SyntaxError, ValueError):
+        return _extract_imports_regex(source.decode('utf-8', errors='ignore'))
+    visitor = _ImportVisitor()
+    visitor.visit(tree)
+    return visitor.imports
+
+
+def extract_import_references(file_path):
+    """
+    Returns every import in a file as [level, module, [names]], keeping full dotted names and
+    relative imports (level > 0): `from ..a import b` -> [2, "a", ["b"]], `import x.y` -> [0, "x.y", []].
+    Used by the import graph (see dependency_graph). Raises OSError if the file cannot be read.
+    """
+    with open(file_path, 'rb') as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, filename=file_path)
+    except (SyntaxError, ValueError):
+        return [[0, module, []] for module in _extract_imports_regex(source.decode('utf-8', errors='ignore'))]
+    references = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            references.extend([0, alias.name, []] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module != "__future__":
+            references.append([node.level, node.module or "", [a.name for a in node.names if a.name != "*"]])
+    return references
+
+
+def _call_safely(func, file_path):
+    try:
+        return file_path, func(file_path), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+
+def map_files_parallel(func, file_paths, max_workers=None):
+    """
+    Yields (path, func(path), error) for each file as it is done, using a process pool when there
+    are enough files. func must be a module-level function; error is None or a message.
+    """
+    file_paths = list(file_paths)
+    done = set()
+    if len(file_paths) >= PARALLEL_MIN_FILES and (max_workers is None or max_workers > 1):
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                for result in pool.map(partial(_call_safely, func), file_paths, chunksize=16):
+                    done.add(result[0])
+                    yield result
+        except (OSError, RuntimeError, NotImplementedError):
+            pass  # No process support (e.g. restricted sandbox): handle the rest serially
+    for path in file_paths:
+        if path not in done:
+            yield _call_safely(func, path)
+
+
+class ImportCache:
+    """Per-file import sets keyed by (path, mtime, size); a file is only re-parsed when it changes."""
+
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})  # path -> [mtime_ns, size, {module: optional}]
+
+    def get(self, path, stat_result):
+        entry = self.entries.get(path)
+        if entry and entry[0] == stat_result.st_mtime_ns and entry[1] == stat_result.st_size:
+            return entry[2]
+        return None
+
+    def put(self, path, stat_result, imports):
+        self.entries[path] = [stat_result.st_mtime_ns, stat_result.st_size, imports]
+
+
+_default_cache = ImportCache()
+
+
+def iter_imports_parallel(file_paths, cache=None, max_workers=None):
+    """
+    Extracts imports from many files, yielding (path, {module: optional}, error) as each file is done.
+    Cached, unchanged files are not re-read; the rest are parsed on a process pool when there
+    are enough of them. error is None, or a message for files that could not be read.
+    """
+    if cache is None:
+        cache = _default_cache
+    to_parse = {}
+    for path in file_paths:
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            yield path, {}, str(e)
+            continue
+        cached = cache.get(path, st)
+        if cached is not None:
+            yield path, cached, None
+        else:
+            to_parse[path] = st
+    for path, imports, error in map_files_parallel(extract_import_details, to_parse, max_workers):
+        if error:
+            yield path, {}, error
+        else:
+            cache.put(path, to_parse[path], imports)
+            yield path, imports, None
+
+
+def extract_imports_parallel(file_paths, cache=None, max_workers=None, on_error=None):
+    """
+    Like iter_imports_parallel(), but returns {path: {module: optional}} once all files are done.
+    on_error(path, message) is called for files that could not be read.
+    """
+    results = {}
+    for path, imports, error in iter_imports_parallel(file_paths, cache, max_workers):
+        results[path] = imports
+        if error and on_error:
+            on_error(path, error)
+    return results
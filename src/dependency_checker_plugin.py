@@ -1,17 +1,23 @@
 # dependency_checker_plugin.py
 
+import os
 from filetracker.base_plugin import BasePlugin
-from dependency_checker_pkg.dependency_core import scan_dependencies_logic
+from dependency_checker_pkg.dependency_core import DirectoryScanCache
+
+# Shared by all plugin instances: each directory is scanned once per change, not once per visited file
+_scan_cache = DirectoryScanCache()
 
 class DependencyCheckerPlugin(BasePlugin):
     def process_file(self, file_path):
         if file_path.endswith((".py", "requirements.txt")):
-            missing, messages = scan_dependencies_logic(os.path.dirname(file_path))
+            _scan_cache.check_file(file_path)
+            summary = _scan_cache.get_summary(os.path.dirname(file_path))
             return {
                 "dependency_checker": {
                     "file_type": "PY" if file_path.endswith(".py") else "REQ",
-                    "missing_dependencies": list(missing.items()),
-                    "is_missing": bool(missing)
+                    "missing_dependencies": list(summary.missing.items()),
+                    "optional_missing": list(summary.optional_missing.items()),
+                    "is_missing": bool(summary.missing)
                 }
             }
         return None
\ No newline at end of file
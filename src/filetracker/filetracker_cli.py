@@ -6,12 +6,35 @@ import sys
 import json
 import importlib.util
 import traceback
-from filetracker_extreme import FileTracker
+try:
+    from .filetracker_extreme import FileTracker
+except ImportError:
+    from filetracker_extreme import FileTracker
 
 PLUGINS_DIR = os.path.join(os.path.dirname(__file__), "plugins")
 
-# Dynamically load all plugins from plugins directory
+# Loaded plugins and the shared FileTracker (with its thread pool) live as long as the process,
+# so a long-running `codeaccountant serve` loads them once rather than once per file
+_plugins = None  # ((file name, mtime) of each plugin, plugin functions)
+_tracker = None
+
+
+def _plugins_signature():
+    return tuple((fname, os.stat(os.path.join(PLUGINS_DIR, fname)).st_mtime_ns)
+                 for fname in sorted(os.listdir(PLUGINS_DIR)) if fname.endswith(".py") and not fname.startswith("__"))
+
+
 def load_plugins():
+    """The plugins' extract_metadata functions; reloaded only when a plugin file was added, removed or edited."""
+    global _plugins
+    signature = _plugins_signature()
+    if _plugins is None or _plugins[0] != signature:
+        _plugins = (signature, _load_plugins())
+    return _plugins[1]
+
+
+# Dynamically load all plugins from plugins directory
+def _load_plugins():
     plugin_functions = []
     for fname in os.listdir(PLUGINS_DIR):
         if fname.endswith(".py") and not fname.startswith("__"):
@@ -44,7 +67,14 @@ def extract_all_metadata(file_path, selected_plugins=None):
     return results
 
 
-def main():
+def get_tracker():
+    global _tracker
+    if _tracker is None:
+        _tracker = FileTracker()
+    return _tracker
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="FileTracker Extreme CLI")
     parser.add_argument('--dir', help='Directory to scan')
     parser.add_argument('--extract-metadata', action='store_true', help='Enable plugin-based metadata extraction')
@@ -52,7 +82,7 @@ def main():
     parser.add_argument('--json', action='store_true', help='Output results as JSON')
     parser.add_argument('--limit', type=int, help='Limit number of files to process')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if not args.dir or not os.path.isdir(args.dir):
         print("[ERROR] Please provide a valid directory using --dir")
@@ -74,8 +104,7 @@ def main():
             meta = extract_all_metadata(file_path, selected_plugins=args.plugin)
             results.append({"file": file_path, "metadata": meta})
         else:
-            tracker = FileTracker()
-            scan = tracker.scan_file(file_path)
+            scan = get_tracker().scan_file(file_path)
             results.append(scan)
 
     if args.json:
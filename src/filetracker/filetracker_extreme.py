@@ -7,7 +7,8 @@ import mimetypes
 import traceback
 from concurrent.futures import ThreadPoolExecutor
 from rapidfuzz import fuzz
-from typing import List, Dict, Any, Optional, Callable, Tuple, Set, Union
+from typing import List, Dict, Any, Optional, Callable, Tuple, Set, Union, Iterable
+from pathmatch import PathMatcher
 
 from collections import namedtuple
 FileMatchResult = namedtuple("FileMatchResult", ["name", "raw_path", "size_bytes", "mtime", "mime_type", "content_type"])
@@ -27,12 +28,14 @@ class FileTracker:
     DEFAULT_FUZZY_MATCH_THRESHOLD = 80
     DEFAULT_BATCH_SIZE = 100
 
-    def __init__(self, max_workers: Optional[int] = None):
+    DEFAULT_EXCLUDE_PATTERNS = ('*.log', '*.tmp')
+
+    def __init__(self, max_workers: Optional[int] = None, exclude_patterns: Optional[Iterable[str]] = None):
         self.files_data: List[Dict[str, Any]] = []
         self.stop_event = threading.Event()
         self.executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 4)
         self.cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
-        self.excluded_extensions = {'.log', '.tmp'}
+        self.matcher = PathMatcher(self.DEFAULT_EXCLUDE_PATTERNS if exclude_patterns is None else exclude_patterns)
 
     def _calculate_hash(self, path: str, algo: str) -> str:
         h = hashlib.new(algo)
@@ -85,12 +88,10 @@ class FileTracker:
     def scan_files(self, search_location: str, fields: List[str], hash_algo: Optional[str] = None,
                    extract_metadata: bool = False) -> List[Dict[str, Any]]:
         results = []
-        for root, _, files in os.walk(search_location):
+        for root, _, files in self.matcher.walk(search_location):
             for name in files:
                 if self.stop_event.is_set():
                     return results
-                if os.path.splitext(name)[1].lower() in self.excluded_extensions:
-                    continue
                 path = os.path.join(root, name)
                 try:
                     stat = os.stat(path)
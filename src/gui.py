@@ -1,10 +1,16 @@
 # gui.py
 
+import os
+import subprocess
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
-from codebuilder.cli import main as codebuilder_main
-from dependency_checker_pkg.dependency_core import scan_dependencies_logic
-from snapshot import create_snapshot
+try:
+    import cli_server
+except ImportError:  # Installed without the daemon module: every command runs in a new CLI process
+    cli_server = None
+
+CLI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
 
 class CodeAccountantGUI:
     def __init__(self, root):
@@ -28,19 +34,41 @@ class CodeAccountantGUI:
         ttk.Button(self.deps_frame, text="Check Dependencies", command=self.check_deps).pack()
 
     def build(self):
-        sys.argv = ["codebuilder", "build", "main.py"]  # Placeholder file
-        codebuilder_main()
-        self.output_text.insert(tk.END, "Build complete\n")  # Update with actual output
+        self.run_command(["build", os.path.join(self.project_folder.get(), "main.py")])  # Placeholder file
 
     def run(self):
-        sys.argv = ["codebuilder", "run", "main.py"]  # Placeholder file
-        codebuilder_main()
-        self.output_text.insert(tk.END, "Run complete\n")  # Update with actual output
+        self.run_command(["run", os.path.join(self.project_folder.get(), "main.py")])  # Placeholder file
 
     def check_deps(self):
-        missing, messages = scan_dependencies_logic(self.project_folder.get())
+        self.run_command(["deps", "check", self.project_folder.get()])
+
+    def run_command(self, argv):
+        """
+        Runs a CLI command in the `serve` daemon (started on first use), which keeps the subsystems
+        and their caches loaded between clicks; without one, in a new CLI process.
+        """
         self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(tk.END, "\n".join(messages))
+        folder = self.project_folder.get()
+        result = None
+        if cli_server is not None:
+            result = cli_server.capture(argv, on_output=self._show_output, cwd=folder)
+            if result is None and cli_server.start(cwd=folder):
+                result = cli_server.capture(argv, on_output=self._show_output, cwd=folder)
+        if result is None:
+            proc = subprocess.Popen([sys.executable, CLI_PATH] + argv, cwd=folder, text=True,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                    env=dict(os.environ, CODEACCOUNTANT_NO_DAEMON="1"))
+            for line in proc.stdout:
+                self._show_output(line)
+            result = (proc.wait(), None)
+        if result[0] != 0:
+            self._show_output(f"[exit code {result[0]}]\n")
+
+    def _show_output(self, line):
+        # Render each line as it arrives instead of waiting for the whole command
+        self.output_text.insert(tk.END, line)
+        self.output_text.see(tk.END)
+        self.root.update_idletasks()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,101 @@
+# pathmatch.py
+
+import os
+import re
+from functools import lru_cache
+
+# Gitignore-style exclusion patterns, shared by the watcher, snapshots and FileTracker.
+#   name, *.pyc        match a file or directory name at any depth
+#   build/, .venv/     trailing slash: directories only
+#   docs/build, /dist  a slash elsewhere anchors the pattern to the root of the walk
+#   **                 matches across directory levels (e.g. "src/**/gen", "logs/**")
+# All patterns are compiled into one regex per kind, so a directory costs a single match
+# no matter how many patterns there are, and excluded directories are pruned, not walked.
+
+def _translate(pattern):
+    regex = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            regex.append("[^/]*")
+        elif c == "?":
+            regex.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex.append(f"[{body}]")
+                i = end
+        else:
+            regex.append(re.escape(c))
+        i += 1
+    return "".join(regex)
+
+def _combine(regexes):
+    if not regexes:
+        return None
+    return re.compile("|".join(f"(?:{r})" for r in regexes))
+
+class PathMatcher:
+    def __init__(self, patterns):
+        self.patterns = tuple(patterns)
+        name_any, name_dir, path_any, path_dir = [], [], [], []
+        for pattern in self.patterns:
+            pattern = pattern.strip().replace("\\", "/")
+            if not pattern or pattern.startswith("#"):
+                continue
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            if "/" in pattern:
+                (path_dir if dir_only else path_any).append(_translate(pattern.lstrip("/")))
+            else:
+                (name_dir if dir_only else name_any).append(_translate(pattern))
+        self._name_any = _combine(name_any)
+        self._name_dir = _combine(name_any + name_dir)
+        self._path_any = _combine(path_any)
+        self._path_dir = _combine(path_any + path_dir)
+
+    def match(self, rel_path, is_dir=False):
+        """True if this entry itself matches a pattern (its parent directories are not checked)."""
+        rel_path = rel_path.replace(os.sep, "/").strip("/")
+        name = rel_path.rsplit("/", 1)[-1]
+        name_regex = self._name_dir if is_dir else self._name_any
+        path_regex = self._path_dir if is_dir else self._path_any
+        return bool((name_regex and name_regex.fullmatch(name)) or (path_regex and path_regex.fullmatch(rel_path)))
+
+    def is_excluded(self, rel_path, is_dir=False):
+        """True if the entry or any directory above it is excluded. For one-off paths such as watcher events."""
+        parts = rel_path.replace(os.sep, "/").strip("/").split("/")
+        for depth in range(1, len(parts)):
+            if self.match("/".join(parts[:depth]), is_dir=True):
+                return True
+        return self.match("/".join(parts), is_dir=is_dir)
+
+    def walk(self, top):
+        """os.walk() that prunes excluded directories and drops excluded files, yielding (root, dirs, files)."""
+        for root, dirs, files in os.walk(top):
+            rel_root = os.path.relpath(root, top).replace(os.sep, "/")
+            prefix = "" if rel_root == "." else rel_root + "/"
+            dirs[:] = [d for d in dirs if not self.match(prefix + d, is_dir=True)]
+            yield root, dirs, [f for f in files if not self.match(prefix + f)]
+
+@lru_cache(maxsize=32)
+def _cached_matcher(patterns):
+    return PathMatcher(patterns)
+
+def get_matcher(patterns):
+    """Returns a compiled matcher, reusing the previous compilation for an identical pattern list."""
+    return _cached_matcher(tuple(patterns))
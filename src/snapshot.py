@@ -1,17 +1,396 @@
 # snapshot.py
 
+import hashlib
+import json
 import os
-import shutil
+import tempfile
 import time
-from config import load_config
-from filetracker.utils import write_log_file  # Assuming FileTracker has a utils.py
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from config import load_config_cached
+from pathmatch import get_matcher
 
-def create_snapshot(project_folder, snapshot_dir="snapshots"):
-    os.makedirs(snapshot_dir, exist_ok=True)
+# Snapshots are stored content-addressed: every distinct file body is written once
+# under objects/<xx>/<rest-of-sha256>, and each snapshot is a JSONL manifest of
+# {path, hash, size, mode, mtime_ns} records under manifests/<snapshot_id>.jsonl.
+# heads/<project key>.json holds the ledger record of each project's latest snapshot, so a
+# new snapshot finds the one to compare against without reading the whole ledger.
+OBJECTS_DIR = "objects"
+MANIFESTS_DIR = "manifests"
+HEADS_DIR = "heads"
+LEDGER_FILE = "ledger.jsonl"
+CHUNK_SIZE = 1024 * 1024
+
+
+def _object_path(snapshot_dir, digest):
+    return os.path.join(snapshot_dir, OBJECTS_DIR, digest[:2], digest[2:])
+
+
+def _manifest_path(snapshot_dir, snapshot_id):
+    return os.path.join(snapshot_dir, MANIFESTS_DIR, f"{snapshot_id}.jsonl")
+
+
+def _touch_object(snapshot_dir, digest):
+    # Bumping the mtime of a reused blob keeps an in-flight garbage collection from sweeping it.
+    try:
+        os.utime(_object_path(snapshot_dir, digest))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _walk_project(project_folder, blacklist):
+    for root, dirs, files in get_matcher(blacklist).walk(project_folder):
+        dirs.sort()
+        for name in sorted(files):
+            full_path = os.path.join(root, name)
+            yield full_path, os.path.relpath(full_path, project_folder).replace(os.sep, "/")
+
+
+def _store_blob(snapshot_dir, src_path):
+    """
+    Copies a file into the object store, hashing it on the way so it is read once.
+    Returns (digest, size, bytes_written); bytes_written is 0 if the blob already existed.
+    """
+    tmp_dir = os.path.join(snapshot_dir, OBJECTS_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(src_path, "rb") as src, os.fdopen(fd, "wb") as dst:
+            while chunk := src.read(CHUNK_SIZE):
+                digest.update(chunk)
+                dst.write(chunk)
+                size += len(chunk)
+        object_path = _object_path(snapshot_dir, digest.hexdigest())
+        if _touch_object(snapshot_dir, digest.hexdigest()):
+            os.remove(tmp_path)
+            return digest.hexdigest(), size, 0
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        os.replace(tmp_path, object_path)
+        return digest.hexdigest(), size, size
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_ledger(snapshot_dir):
+    ledger_path = os.path.join(snapshot_dir, LEDGER_FILE)
+    if not os.path.exists(ledger_path):
+        return []
+    with open(ledger_path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _head_path(snapshot_dir, project_folder):
+    key = hashlib.sha256(project_folder.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(snapshot_dir, HEADS_DIR, f"{key}.json")
+
+
+def _write_head(snapshot_dir, record):
+    head_path = _head_path(snapshot_dir, record["project_folder"])
+    os.makedirs(os.path.dirname(head_path), exist_ok=True)
+    tmp_path = f"{head_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(tmp_path, head_path)
+
+
+def _previous_entries(snapshot_dir, project_folder):
+    # Files whose size and mtime match the last snapshot of this project are not re-read.
+    try:
+        with open(_head_path(snapshot_dir, project_folder), "r", encoding="utf-8") as f:
+            records = [json.load(f)]
+    except (OSError, ValueError):
+        records = []
+    if not records or not os.path.exists(_manifest_path(snapshot_dir, records[0]["snapshot_id"])):
+        # Stores written before heads existed, or a head pruned by retention
+        records = reversed(_read_ledger(snapshot_dir))
+    for record in records:
+        if record.get("project_folder") == project_folder:
+            if os.path.exists(_manifest_path(snapshot_dir, record["snapshot_id"])):
+                return {e["path"]: e for e in iter_manifest(record["snapshot_id"], snapshot_dir)}
+    return {}
+
+
+def _new_snapshot_id(snapshot_dir):
     timestamp = time.strftime("%Y%m%d_%H%M%S")
     snapshot_id = f"snapshot_{timestamp}"
-    snapshot_path = os.path.join(snapshot_dir, snapshot_id)
-    shutil.copytree(project_folder, snapshot_path, ignore=shutil.ignore_patterns(*load_config()["blacklist"]))
-    log_entry = {"snapshot_id": snapshot_id, "timestamp": timestamp, "path": snapshot_path}
-    write_log_file("ledger.json", log_entry)
-    return snapshot_id
\ No newline at end of file
+    suffix = 1
+    while os.path.exists(_manifest_path(snapshot_dir, snapshot_id)):
+        snapshot_id = f"snapshot_{timestamp}_{suffix}"
+        suffix += 1
+    return snapshot_id, timestamp
+
+
+def create_snapshot(project_folder, snapshot_dir="snapshots", blacklist=None):
+    return create_snapshot_record(project_folder, snapshot_dir, blacklist)["snapshot_id"]
+
+
+def create_snapshot_record(project_folder, snapshot_dir="snapshots", blacklist=None):
+    """
+    Like create_snapshot(), but returns the full ledger record (files scanned, bytes written, ...).
+    blacklist defaults to the one in ./config.json; callers with their own config pass theirs.
+    """
+    project_folder = os.path.abspath(project_folder)
+    os.makedirs(os.path.join(snapshot_dir, MANIFESTS_DIR), exist_ok=True)
+    snapshot_id, timestamp = _new_snapshot_id(snapshot_dir)
+    manifest_path = _manifest_path(snapshot_dir, snapshot_id)
+    previous = _previous_entries(snapshot_dir, project_folder)
+    if blacklist is None:
+        blacklist = load_config_cached()["blacklist"]
+
+    files_scanned = 0
+    bytes_written = 0
+    tmp_manifest = manifest_path + ".tmp"
+    with open(tmp_manifest, "w", encoding="utf-8", buffering=1) as manifest:
+        for full_path, rel_path in _walk_project(project_folder, blacklist):
+            try:
+                st = os.stat(full_path)
+                entry = previous.get(rel_path)
+                if not (entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+                        and _touch_object(snapshot_dir, entry["hash"])):
+                    digest, size, written = _store_blob(snapshot_dir, full_path)
+                    bytes_written += written
+                    entry = {"path": rel_path, "hash": digest, "size": size}
+                entry = dict(entry, mode=st.st_mode & 0o7777, mtime_ns=st.st_mtime_ns)
+            except OSError:
+                continue  # File vanished or became unreadable mid-walk
+            files_scanned += 1
+            manifest.write(json.dumps(entry) + "\n")
+    os.replace(tmp_manifest, manifest_path)
+
+    log_entry = {
+        "snapshot_id": snapshot_id,
+        "timestamp": timestamp,
+        "project_folder": project_folder,
+        "path": manifest_path,
+        "files": files_scanned,
+        "bytes_written": bytes_written,
+    }
+    with open(os.path.join(snapshot_dir, LEDGER_FILE), "a", encoding="utf-8") as ledger:
+        ledger.write(json.dumps(log_entry) + "\n")
+    _write_head(snapshot_dir, log_entry)
+    return log_entry
+
+
+def list_snapshots(snapshot_dir="snapshots"):
+    manifests_dir = os.path.join(snapshot_dir, MANIFESTS_DIR)
+    if not os.path.isdir(manifests_dir):
+        return []
+    return sorted(f[:-len(".jsonl")] for f in os.listdir(manifests_dir) if f.endswith(".jsonl"))
+
+
+def iter_manifest(snapshot_id, snapshot_dir="snapshots"):
+    """Yields the manifest records of a snapshot one at a time, without loading it whole."""
+    manifest_path = _manifest_path(snapshot_dir, snapshot_id)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"Snapshot {snapshot_id} not found in {snapshot_dir}")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _normalize(path):
+    path = path.replace(os.sep, "/").strip("/")
+    return "" if path == "." else path
+
+
+def _matches(entry_path, wanted):
+    return not wanted or entry_path == wanted or entry_path.startswith(wanted + "/")
+
+
+def open_snapshot_file(snapshot_id, path, snapshot_dir="snapshots"):
+    """Opens a single file from a snapshot for streaming reads (binary mode)."""
+    wanted = _normalize(path)
+    for entry in iter_manifest(snapshot_id, snapshot_dir):
+        if entry["path"] == wanted:
+            return open(_object_path(snapshot_dir, entry["hash"]), "rb")
+    raise FileNotFoundError(f"{path} is not in snapshot {snapshot_id}")
+
+
+def _extract_entry(snapshot_dir, entry, dest):
+    target = os.path.normpath(os.path.join(dest, *entry["path"].split("/")))
+    if os.path.commonpath([dest, target]) != dest:
+        raise ValueError(f"Refusing to restore {entry['path']} outside {dest}")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(_object_path(snapshot_dir, entry["hash"]), "rb") as src, open(target, "wb") as dst:
+        while chunk := src.read(CHUNK_SIZE):
+            dst.write(chunk)
+    os.chmod(target, entry["mode"])
+    os.utime(target, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+    return target
+
+
+def restore_paths(snapshot_id, paths, dest, snapshot_dir="snapshots", max_workers=None):
+    """
+    Restores individual files or whole subtrees from a snapshot into dest.
+    Only the blobs of the selected entries are read; extraction runs on a thread pool.
+    An empty path list (or ".") restores the whole snapshot. Returns the restored file paths.
+    """
+    wanted = [_normalize(p) for p in paths] or [""]
+    selected = []
+    matched = set()
+    for entry in iter_manifest(snapshot_id, snapshot_dir):
+        hits = [w for w in wanted if _matches(entry["path"], w)]
+        if hits:
+            selected.append(entry)
+            matched.update(hits)
+    missing = [w for w in wanted if w and w not in matched]
+    if missing:
+        raise FileNotFoundError(f"Not in snapshot {snapshot_id}: {', '.join(missing)}")
+
+    dest = os.path.abspath(dest)
+    with ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        return list(pool.map(lambda entry: _extract_entry(snapshot_dir, entry, dest), selected))
+
+
+def _snapshot_time(snapshot_id):
+    try:
+        return datetime.strptime(snapshot_id[len("snapshot_"):][:15], "%Y%m%d_%H%M%S")
+    except ValueError:
+        return None
+
+
+def select_snapshots_to_prune(snapshot_ids, policy, now=None):
+    """
+    Applies a retention policy ({"keep_last", "keep_hourly", "keep_daily"}) to snapshot IDs.
+    Keeps the newest keep_last snapshots, plus the newest snapshot of each hour (day) within
+    the last keep_hourly hours (keep_daily days). The newest snapshot and IDs without a
+    parseable timestamp are always kept. Returns the IDs to delete, oldest first.
+    """
+    now = now or datetime.now()
+    dated = sorted(((t, s) for s in snapshot_ids if (t := _snapshot_time(s))), reverse=True)
+    keep = {s for _, s in dated[:max(1, policy.get("keep_last", 0))]}
+    for bucket_format, window, count in (("%Y%m%d%H", 3600, policy.get("keep_hourly", 0)),
+                                         ("%Y%m%d", 86400, policy.get("keep_daily", 0))):
+        seen = set()
+        for t, snapshot_id in dated:
+            if (now - t).total_seconds() > window * count:
+                break
+            bucket = t.strftime(bucket_format)
+            if bucket not in seen:
+                seen.add(bucket)
+                keep.add(snapshot_id)
+    return sorted(s for _, s in dated if s not in keep)
+
+
+def _compact_ledger(snapshot_dir):
+    """Rewrites the ledger without the records of snapshots whose manifest is gone."""
+    ledger_path = os.path.join(snapshot_dir, LEDGER_FILE)
+    try:
+        with open(ledger_path, "rb") as f:
+            lines = f.readlines()
+            offset = f.tell()
+    except FileNotFoundError:
+        return
+    kept = [line for line in lines if line.strip() and
+            os.path.exists(_manifest_path(snapshot_dir, json.loads(line)["snapshot_id"]))]
+    if len(kept) == len(lines):
+        return
+    tmp_path = f"{ledger_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.writelines(kept)
+        with open(ledger_path, "rb") as ledger:
+            ledger.seek(offset)
+            f.write(ledger.read())  # Records appended by a snapshot taken meanwhile
+    os.replace(tmp_path, ledger_path)
+
+
+def apply_retention(snapshot_dir="snapshots", policy=None, dry_run=False):
+    """
+    Deletes the manifests of snapshots outside the retention policy and drops their ledger
+    records. Their blobs are left to the GC.
+    """
+    if policy is None:
+        policy = load_config_cached()["retention"]
+    pruned = select_snapshots_to_prune(list_snapshots(snapshot_dir), policy)
+    if not dry_run:
+        for snapshot_id in pruned:
+            os.remove(_manifest_path(snapshot_dir, snapshot_id))
+        if pruned:
+            _compact_ledger(snapshot_dir)
+    return pruned
+
+
+class GarbageCollector:
+    """
+    Incremental mark-and-sweep over the object store.
+
+    Each call to step() does at most time_budget seconds of work, so it can be interleaved with
+    the watcher. A cycle marks every blob referenced by a manifest, then sweeps unreferenced
+    blobs, and temporary files in objects/tmp left by interrupted snapshots. Files touched less
+    than grace_period seconds before the cycle started are never swept, so snapshots written
+    concurrently are safe.
+    """
+
+    def __init__(self, snapshot_dir="snapshots", grace_period=60):
+        self.snapshot_dir = snapshot_dir
+        self.grace_period = grace_period
+        self.stats = {"cycles": 0, "objects_removed": 0, "bytes_freed": 0}
+        self._cycle = None
+
+    def step(self, time_budget=0.05):
+        """Runs one time slice. Returns True when a full cycle has just completed."""
+        if self._cycle is None:
+            self._cycle = self._run_cycle()
+        deadline = time.monotonic() + time_budget
+        for _ in self._cycle:
+            if time.monotonic() >= deadline:
+                return False
+        self._cycle = None
+        self.stats["cycles"] += 1
+        return True
+
+    def collect(self, time_budget=0.05, pause=0.0):
+        """Runs a whole cycle in time slices, sleeping `pause` seconds between them."""
+        while not self.step(time_budget):
+            time.sleep(pause)
+        return self.stats
+
+    def _run_cycle(self):
+        cutoff = time.time() - self.grace_period
+        live = set()
+        manifests_dir = os.path.join(self.snapshot_dir, MANIFESTS_DIR)
+        # In-progress (.tmp) manifests are marked too; they are written line by line. The
+        # directory is re-listed until stable so manifests published mid-mark are not missed.
+        marked = set()
+        while True:
+            names = os.listdir(manifests_dir) if os.path.isdir(manifests_dir) else []
+            pending = sorted(n for n in names if n.endswith((".jsonl", ".jsonl.tmp")) and n not in marked)
+            if not pending:
+                break
+            for name in pending:
+                marked.add(name)
+                try:
+                    with open(os.path.join(manifests_dir, name), "r", encoding="utf-8") as f:
+                        for line in f:
+                            if line.endswith("\n"):
+                                live.add(json.loads(line)["hash"])
+                            yield
+                except FileNotFoundError:
+                    continue  # Pruned or published while we were marking
+
+        objects_dir = os.path.join(self.snapshot_dir, OBJECTS_DIR)
+        if not os.path.isdir(objects_dir):
+            return
+        for prefix in sorted(os.listdir(objects_dir)):
+            prefix_dir = os.path.join(objects_dir, prefix)
+            with os.scandir(prefix_dir) as it:
+                names = [(e.name, e.path) for e in it]
+            for name, path in names:
+                yield
+                if prefix != "tmp" and prefix + name in live:
+                    continue
+                try:
+                    st = os.stat(path)
+                    if st.st_mtime >= cutoff:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                self.stats["objects_removed"] += 1
+                self.stats["bytes_freed"] += st.st_size
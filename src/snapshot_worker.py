@@ -0,0 +1,171 @@
+# snapshot_worker.py
+
+import logging
+import os
+import queue
+import threading
+import time
+from config import load_config_cached
+from snapshot import create_snapshot_record, apply_retention, GarbageCollector
+
+_STOP = object()
+
+class SnapshotWorker:
+    """
+    Takes snapshots on a background thread so callers (e.g. the watchdog observer) never block on a copy.
+
+    request() marks a project as changed. Requests for a project that already has a pending snapshot are
+    merged into it; otherwise the project is put on a bounded job queue. A job runs once no request
+    for it has arrived for `debounce_seconds` and at least `snapshot_interval` seconds after the previous
+    snapshot of that project. While idle after new snapshots, retention and incremental GC run in small
+    time slices.
+    """
+
+    def __init__(self, snapshot_dir="snapshots", config_path="config.json", max_queue=8,
+                 before_snapshot=None, gc_time_slice=0.05):
+        self.snapshot_dir = snapshot_dir
+        self.config_path = config_path
+        self.before_snapshot = before_snapshot
+        self.gc = GarbageCollector(snapshot_dir) if gc_time_slice else None
+        self.gc_time_slice = gc_time_slice
+        self._jobs = queue.Queue(maxsize=max_queue)
+        self._pending = {}  # project folder -> {"paths": {path: event_type}, "last_request": monotonic time}
+        self._last_snapshot = {}
+        self._lock = threading.Lock()
+        self._flushing = False
+        self._gc_due = False
+        self._gc_running = False
+        self._metrics = {
+            "requests": 0,
+            "merged_requests": 0,
+            "rejected_requests": 0,
+            "snapshots": 0,
+            "failures": 0,
+            "last_snapshot_id": None,
+            "last_duration": 0.0,
+            "total_duration": 0.0,
+            "bytes_written": 0,
+            "files_scanned": 0,
+        }
+        self._thread = threading.Thread(target=self._run, name="snapshot-worker", daemon=True)
+        self._thread.start()
+
+    def request(self, project_folder, paths=None, block=True, timeout=None):
+        """
+        Asks for a snapshot of project_folder. `paths` maps changed paths to event types.
+        Returns False if the job queue stayed full for `timeout` seconds (or at once if block is False).
+        """
+        project_folder = os.path.abspath(project_folder)
+        with self._lock:
+            self._metrics["requests"] += 1
+            job = self._pending.get(project_folder)
+            if job is not None:
+                job["paths"].update(paths or {})
+                job["last_request"] = time.monotonic()
+                self._metrics["merged_requests"] += 1
+                return True
+            self._pending[project_folder] = {"paths": dict(paths or {}), "last_request": time.monotonic()}
+        try:
+            self._jobs.put(project_folder, block=block, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(project_folder, None)
+                self._metrics["rejected_requests"] += 1
+            return False
+        return True
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._metrics, queue_depth=self._jobs.qsize())
+
+    def close(self, flush=True):
+        """Stops the worker. With flush, pending snapshots are taken right away instead of being dropped."""
+        with self._lock:
+            self._flushing = flush
+            if not flush:
+                self._pending.clear()
+        self._jobs.put(_STOP)
+        self._thread.join()
+
+    def _deadline(self, project_folder, job):
+        config = load_config_cached(self.config_path)
+        deadline = job["last_request"] + config["debounce_seconds"]
+        last = self._last_snapshot.get(project_folder)
+        if last is not None:
+            deadline = max(deadline, last + config["snapshot_interval"])
+        return deadline
+
+    def _wait_until_quiet(self, project_folder):
+        # Requests merged while waiting push the deadline back, so a burst still yields one snapshot.
+        while True:
+            with self._lock:
+                job = self._pending.get(project_folder)
+                if job is None or self._flushing:
+                    return self._pending.pop(project_folder, None)
+                remaining = self._deadline(project_folder, job) - time.monotonic()
+                if remaining <= 0:
+                    return self._pending.pop(project_folder)
+            time.sleep(min(remaining, 0.1))
+
+    def _run(self):
+        while True:
+            try:
+                project_folder = self._jobs.get(timeout=1.0 if self.gc else None)
+            except queue.Empty:
+                self._collect_garbage()
+                continue
+            if project_folder is _STOP:
+                self._drain()
+                return
+            job = self._wait_until_quiet(project_folder)
+            if job is not None:
+                self._snapshot(project_folder, job)
+
+    def _drain(self):
+        while True:
+            try:
+                project_folder = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                job = self._pending.pop(project_folder, None)
+            if job is not None:
+                self._snapshot(project_folder, job)
+
+    def _snapshot(self, project_folder, job):
+        started = time.monotonic()
+        try:
+            if self.before_snapshot:
+                self.before_snapshot(project_folder, job["paths"])
+            record = create_snapshot_record(project_folder, self.snapshot_dir,
+                                            load_config_cached(self.config_path)["blacklist"])
+        except Exception as e:
+            logging.error(f"Snapshot of {project_folder} failed: {e}")
+            with self._lock:
+                self._metrics["failures"] += 1
+            return
+        finally:
+            self._last_snapshot[project_folder] = time.monotonic()
+        duration = time.monotonic() - started
+        with self._lock:
+            self._metrics["snapshots"] += 1
+            self._metrics["last_snapshot_id"] = record["snapshot_id"]
+            self._metrics["last_duration"] = duration
+            self._metrics["total_duration"] += duration
+            self._metrics["bytes_written"] += record["bytes_written"]
+            self._metrics["files_scanned"] += record["files"]
+        self._gc_due = True
+
+    def _collect_garbage(self):
+        if self.gc is None or not (self._gc_due or self._gc_running):
+            return
+        try:
+            if not self._gc_running:
+                apply_retention(self.snapshot_dir, load_config_cached(self.config_path)["retention"])
+                self._gc_due = False
+                self._gc_running = True
+            if self.gc.step(self.gc_time_slice):
+                self._gc_running = False
+        except Exception as e:
+            logging.error(f"Snapshot garbage collection failed: {e}")
+            self._gc_running = False
@@ -0,0 +1,206 @@
+# venv_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+# VENVs are built once per (interpreter, requirement set) into a template directory
+# <cache_dir>/<key>/ and cloned into projects: files are hardlinked where possible and
+# only the files that embed the VENV's own path (activate scripts, console-script
+# shebangs, pyvenv.cfg) are copied and rewritten for the new location.
+#
+# Only fully pinned requirement sets (name==version, as pip-compile or `pip freeze` write them)
+# are templated: the key is the requirement text, and "requests>=2.0" resolves differently
+# once a new release is out. Other sets are installed into the project's VENV directly.
+TEMPLATE_INFO = "template.json"
+
+
+def default_template_dir():
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "codeaccountant", "venvs")
+
+
+def _bin_dir(venv_path):
+    return os.path.join(venv_path, "Scripts" if os.name == "nt" else "bin")
+
+
+def read_requirements(project_folder):
+    """
+    Normalised requirement lines of the project's requirements.txt ([] if there is none).
+    Returns None when the set cannot be shared between projects (editable or local-path installs).
+    """
+    req_path = os.path.join(project_folder, "requirements.txt")
+    if not os.path.exists(req_path):
+        return []
+    lines = set()
+    with open(req_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            line = line.split(" #", 1)[0].strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith(("-e", "--editable", "-r", "--requirement", "-c", "--constraint", ".", "/", "file:")):
+                return None
+            lines.add(" ".join(line.split()))
+    return sorted(lines, key=str.lower)
+
+
+def is_pinned(requirement):
+    """Whether a requirement line names exactly one version ("pkg==1.2", with optional extras, markers and hashes)."""
+    spec = requirement.split(";", 1)[0].split(" --hash", 1)[0].strip()
+    name, sep, version = spec.partition("===" if "===" in spec else "==")
+    return bool(sep and name.strip() and version.strip()) and not any(c in version for c in "*,<>!~= ")
+
+
+def template_key(requirements, python_executable=None):
+    """Hash of the interpreter binary (path, size, mtime: changes on upgrade) and the requirement set."""
+    python_path = os.path.realpath(python_executable or sys.executable)
+    st = os.stat(python_path)
+    identity = {"python": [python_path, st.st_size, st.st_mtime_ns], "requirements": requirements}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+
+def _build_venv(path, requirements, python_executable=None, with_pip=True):
+    """`python -m venv path`, then one pip resolver run for all requirements."""
+    command = [python_executable or sys.executable, "-m", "venv", path]
+    if not with_pip:
+        command.append("--without-pip")
+    subprocess.run(command, check=True)
+    if requirements:
+        req_file = os.path.join(path, "requirements.txt")
+        with open(req_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(requirements) + "\n")
+        venv_python = os.path.join(_bin_dir(path), "python")
+        subprocess.run([venv_python, "-m", "pip", "install", "-r", req_file], check=True)
+
+
+def build_template(cache_dir, key, requirements, python_executable=None, with_pip=True):
+    """Creates the template VENV for key and returns its path."""
+    template = os.path.join(cache_dir, key)
+    building = f"{template}.tmp-{os.getpid()}"
+    os.makedirs(cache_dir, exist_ok=True)
+    shutil.rmtree(building, ignore_errors=True)
+    try:
+        _build_venv(building, requirements, python_executable, with_pip)
+        with open(os.path.join(building, TEMPLATE_INFO), "w", encoding="utf-8") as f:
+            # Scripts embed the path the VENV was created at, which is this build directory
+            json.dump({"prefix": os.path.abspath(building), "requirements": requirements}, f)
+        try:
+            os.rename(building, template)
+        except OSError:
+            if not os.path.isdir(template):
+                raise
+            # Another process built the same template first; use theirs
+    finally:
+        shutil.rmtree(building, ignore_errors=True)
+    return template
+
+
+def _relocated_copy(src, dest, old_prefix, new_prefix):
+    """Copies a text file, replacing the template path. Returns False (nothing written) for binaries."""
+    with open(src, "rb") as f:
+        data = f.read()
+    if b"\0" in data or old_prefix not in data:
+        return False
+    with open(dest, "wb") as f:
+        f.write(data.replace(old_prefix, new_prefix))
+    shutil.copystat(src, dest)
+    return True
+
+
+def _link_or_copy(src, dest, link):
+    if link:
+        try:
+            os.link(src, dest)
+            return
+        except OSError:
+            pass  # Different file system or no hardlink support
+    shutil.copy2(src, dest)
+
+
+def clone_venv(template, dest, link=True):
+    """
+    Clones a template VENV to dest. With link, files are hardlinked, so they must not be edited in
+    place in either copy (pip replaces files rather than rewriting them, so installs are safe).
+    Console-script .exe launchers on Windows keep the template path; use `python -m pip` there.
+    The clone is assembled next to dest and renamed into place, so an interrupted clone leaves no
+    half-made VENV behind. dest must not exist yet.
+    """
+    if os.path.lexists(dest):
+        raise FileExistsError(f"{dest} already exists")
+    with open(os.path.join(template, TEMPLATE_INFO), "r", encoding="utf-8") as f:
+        old_prefix = json.load(f)["prefix"].encode("utf-8")
+    new_prefix = os.path.abspath(dest).encode("utf-8")  # Where the files will live, not where they are built
+    building = f"{os.path.abspath(dest)}.tmp-{os.getpid()}"
+    shutil.rmtree(building, ignore_errors=True)
+    relocate_dirs = {os.path.abspath(_bin_dir(template)), os.path.abspath(template)}
+    try:
+        for root, dirs, files in os.walk(template):
+            rel_root = os.path.relpath(root, template)
+            out_root = os.path.normpath(os.path.join(building, rel_root))
+            os.makedirs(out_root, exist_ok=True)
+            for name in dirs + files:
+                src = os.path.join(root, name)
+                if os.path.islink(src):
+                    os.symlink(os.readlink(src), os.path.join(out_root, name))
+                    if name in dirs:
+                        dirs.remove(name)  # e.g. lib64 -> lib: recreated as a link, not walked
+            for name in files:
+                src = os.path.join(root, name)
+                out = os.path.join(out_root, name)
+                if os.path.islink(src) or name == TEMPLATE_INFO and root == template:
+                    continue
+                if os.path.abspath(root) in relocate_dirs and _relocated_copy(src, out, old_prefix, new_prefix):
+                    continue
+                _link_or_copy(src, out, link)
+        os.rename(building, dest)
+    finally:
+        shutil.rmtree(building, ignore_errors=True)
+
+
+def prune_templates(cache_dir, keep):
+    """Deletes all but the `keep` most recently used templates."""
+    try:
+        names = [n for n in os.listdir(cache_dir) if os.path.isfile(os.path.join(cache_dir, n, TEMPLATE_INFO))]
+    except FileNotFoundError:
+        return []
+    names.sort(key=lambda n: os.stat(os.path.join(cache_dir, n)).st_mtime, reverse=True)
+    for name in names[keep:]:
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+    return names[keep:]
+
+
+def create_venv(project_folder, dest, cache_dir=None, python_executable=None, link=True, with_pip=True,
+                max_templates=8, use_templates=True):
+    """
+    Creates a VENV at dest with the project's requirements installed, cloned from a cached template
+    when one exists for the same interpreter and requirement set. Returns True on a cache hit.
+    Projects whose requirements cannot be shared get a plain VENV, as `python -m venv` would.
+    Unpinned requirements, or use_templates=False, install the same packages into dest directly.
+    Raises FileExistsError if dest exists.
+    """
+    if os.path.lexists(dest):
+        raise FileExistsError(f"{dest} already exists")
+    requirements = read_requirements(project_folder)
+    if requirements is None:
+        _build_venv(dest, [], python_executable, with_pip)
+        return False
+    if not use_templates or not all(is_pinned(r) for r in requirements):
+        _build_venv(dest, requirements, python_executable, with_pip)
+        return False
+    cache_dir = cache_dir or default_template_dir()
+    key = template_key(requirements, python_executable)
+    template = os.path.join(cache_dir, key)
+    hit = os.path.isfile(os.path.join(template, TEMPLATE_INFO))
+    if not hit:
+        template = build_template(cache_dir, key, requirements, python_executable, with_pip)
+    os.utime(template)  # Marks the template as recently used for pruning
+    if not hit:
+        prune_templates(cache_dir, max(1, max_templates))
+    clone_venv(template, dest, link)
+    return hit
@@ -1,24 +1,55 @@
 # watcher.py
 
+import os
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from filetracker.ide_activity_monitor_plugin import FileTrackerActivityMonitor
-from snapshot import create_snapshot
+from config import load_config_cached
+from pathmatch import get_matcher
+from snapshot_worker import SnapshotWorker
 
 class Watcher(FileSystemEventHandler):
-    def __init__(self, project_folder, snapshot_dir):
+    """
+    Filters file events and hands them to a SnapshotWorker, which coalesces them into one
+    snapshot per burst. Nothing slow runs on the observer thread.
+    """
+
+    def __init__(self, project_folder, snapshot_dir, config_path="config.json", worker=None):
         self.project_folder = project_folder
         self.snapshot_dir = snapshot_dir
+        self.config_path = config_path
         self.monitor = FileTrackerActivityMonitor()
+        self.worker = worker or SnapshotWorker(snapshot_dir, config_path, before_snapshot=self._record_activity)
 
     def on_any_event(self, event):
-        if event.is_directory or any(p in event.src_path for p in load_config()["blacklist"]):
+        if event.is_directory:
+            return
+        matcher = get_matcher(load_config_cached(self.config_path)["blacklist"])
+        if matcher.is_excluded(os.path.relpath(event.src_path, self.project_folder)):
             return
-        self.monitor.process_file(event.src_path, event.event_type)
-        create_snapshot(self.project_folder, self.snapshot_dir)
+        self.worker.request(self.project_folder, {event.src_path: event.event_type})
+
+    def _record_activity(self, project_folder, paths):
+        for path, event_type in paths.items():
+            self.monitor.process_file(path, event_type)
+
+class WatcherHandle:
+    def __init__(self, observer, watcher):
+        self.observer = observer
+        self.watcher = watcher
+
+    def metrics(self):
+        return self.watcher.worker.metrics()
+
+    def stop(self, flush=True):
+        """Stops watching; with flush, a snapshot still pending for recent changes is taken first."""
+        self.observer.stop()
+        self.observer.join()
+        self.watcher.worker.close(flush=flush)
 
 def start_watcher(project_folder, snapshot_dir="snapshots"):
     observer = Observer()
     watcher = Watcher(project_folder, snapshot_dir)
     observer.schedule(watcher, project_folder, recursive=True)
-    observer.start()
\ No newline at end of file
+    observer.start()
+    return WatcherHandle(observer, watcher)